@@ -0,0 +1,143 @@
+import asyncio
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Optional, Tuple, TypeVar
+
+from fastapi import Header, HTTPException, Request
+
+T = TypeVar("T")
+
+# Time allowed for a request's LLM work unless the client sends X-Request-Timeout, and the most a client may ask for
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "120"))
+MAX_TIMEOUT_SECONDS = float(os.getenv("LLM_MAX_REQUEST_TIMEOUT_SECONDS", "600"))
+
+# How often a request waiting on an LLM checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Status for a request whose client went away (nginx's "client closed request"); nobody receives it
+CLIENT_CLOSED_REQUEST = 499
+
+# Absolute time.monotonic() by which the current request's LLM work must finish
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+def remaining_seconds() -> float:
+    """Seconds left before the current request's deadline (DEFAULT_TIMEOUT_SECONDS outside a request).
+
+    Raises a 504 HTTPException once the deadline has passed, so no provider
+    call starts without time to finish.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return DEFAULT_TIMEOUT_SECONDS
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise HTTPException(status_code=504, detail="The request deadline passed before the LLM answered")
+    return left
+
+
+def request_timeout(x_request_timeout: Optional[str] = Header(None)) -> float:
+    """The request's time budget in seconds: its X-Request-Timeout header, capped at MAX_TIMEOUT_SECONDS."""
+    if x_request_timeout is None:
+        return DEFAULT_TIMEOUT_SECONDS
+    try:
+        seconds = float(x_request_timeout)
+    except ValueError:
+        seconds = 0.0
+    if not seconds > 0:
+        raise HTTPException(status_code=400, detail="X-Request-Timeout must be a positive number of seconds")
+    return min(seconds, MAX_TIMEOUT_SECONDS)
+
+
+class LLMCallMetrics:
+    """Counts of finished and cancelled LLM calls, and an estimate of the work cancelling saved.
+
+    A cancelled call is assumed to have been as long as the provider's
+    average finished call, so the output tokens and seconds it saved are the
+    share of that average still ahead of it when it was cancelled.
+    """
+
+    def __init__(self):
+        self.providers: Dict[str, Dict[str, float]] = {}
+        self.client_disconnects = 0
+        self.deadlines_exceeded = 0
+
+    def _provider(self, provider: str) -> Dict[str, float]:
+        return self.providers.setdefault(provider, {
+            "completed": 0, "completed_seconds": 0.0, "output_tokens": 0,
+            "cancelled": 0, "cancelled_seconds": 0.0,
+            "estimated_seconds_saved": 0.0, "estimated_output_tokens_saved": 0.0,
+        })
+
+    def completed(self, provider: str, seconds: float, output_tokens: int):
+        counts = self._provider(provider)
+        counts["completed"] += 1
+        counts["completed_seconds"] += seconds
+        counts["output_tokens"] += output_tokens
+
+    def cancelled(self, provider: str, seconds: float):
+        counts = self._provider(provider)
+        counts["cancelled"] += 1
+        counts["cancelled_seconds"] += seconds
+        if counts["completed"]:
+            average_seconds = counts["completed_seconds"] / counts["completed"]
+            left = max(0.0, 1.0 - seconds / average_seconds) if average_seconds else 0.0
+            counts["estimated_seconds_saved"] += left * average_seconds
+            counts["estimated_output_tokens_saved"] += left * counts["output_tokens"] / counts["completed"]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "client_disconnects": self.client_disconnects,
+            "deadlines_exceeded": self.deadlines_exceeded,
+            "providers": {provider: {name: round(value, 2) for name, value in counts.items()}
+                          for provider, counts in self.providers.items()},
+        }
+
+
+_metrics = LLMCallMetrics()
+
+
+def get_llm_metrics():
+    return _metrics
+
+
+def start_with_deadline(work: Awaitable[T], timeout: float) -> Tuple["asyncio.Future[T]", float]:
+    """Start `work` as a task that sees a deadline `timeout` seconds away; returns the task and the deadline."""
+    deadline = time.monotonic() + timeout
+    token = _deadline.set(deadline)
+    try:
+        # The task copies the context now, deadline included
+        return asyncio.ensure_future(work), deadline
+    finally:
+        _deadline.reset(token)
+
+
+async def run_with_deadline(request: Request, work: Awaitable[T], timeout: float) -> T:
+    """Await a request's LLM work, cancelling it at the deadline or when the client disconnects.
+
+    `work` runs as a task that sees the deadline through remaining_seconds(),
+    so each provider call inside it is given only the time left. Cancelling
+    the task closes the provider connection, which stops generation and
+    frees the request's concurrency slot.
+    """
+    task, deadline = start_with_deadline(work, timeout)
+    try:
+        while True:
+            left = deadline - time.monotonic()
+            done, _ = await asyncio.wait({task}, timeout=max(0.0, min(DISCONNECT_POLL_SECONDS, left)))
+            if done:
+                return task.result()
+            if time.monotonic() >= deadline:
+                _metrics.deadlines_exceeded += 1
+                raise HTTPException(status_code=504, detail="The request deadline passed before the LLM answered")
+            if await request.is_disconnected():
+                _metrics.client_disconnects += 1
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+            # Let the provider call unwind, so its connection is closed before the response goes out
+            await asyncio.wait({task})
+            if not task.cancelled():
+                task.exception()
@@ -1,10 +1,62 @@
 import os
 import json
+import asyncio
+import datetime
+import logging
+import time
 import google.generativeai as genai
 import httpx
-from anthropic import Anthropic
-from fastapi import HTTPException, Depends
+from anthropic import APITimeoutError, AsyncAnthropic
+from google.api_core.exceptions import DeadlineExceeded
+from dataclasses import dataclass, field
+from fastapi import HTTPException
 from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from .deadlines import get_llm_metrics, remaining_seconds
+from .logging_config import sample_success
+from .ollama_pool import OllamaPool
+
+logger = logging.getLogger(__name__)
+
+# How long provider-side caches of a plan conversation are kept
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "1800"))
+
+@dataclass
+class ToolCall:
+    """A tool call the model asked for: an id to answer it under, the tool name and its arguments."""
+    id: str
+    name: str
+    arguments: Dict[str, Any]
+
+@dataclass
+class Completion:
+    """Generated text and the input tokens it cost, split into uncached and cache-read tokens."""
+    text: str
+    input_tokens: int = 0
+    cached_input_tokens: int = 0
+    output_tokens: int = 0
+    # Tokens written to a provider cache on this call (Claude, Gemini)
+    cache_write_tokens: int = 0
+    # Tools the model wants called before it answers (generate_with_tools)
+    tool_calls: List[ToolCall] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.cached_input_tokens + self.cache_write_tokens + self.output_tokens
+
+    def add_usage(self, other: "Completion"):
+        self.input_tokens += other.input_tokens
+        self.cached_input_tokens += other.cached_input_tokens
+        self.cache_write_tokens += other.cache_write_tokens
+        self.output_tokens += other.output_tokens
+
+    def usage(self) -> Dict[str, int]:
+        return {
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "output_tokens": self.output_tokens,
+        }
 
 class LLMService:
     def __init__(self):
@@ -12,106 +64,495 @@ class LLMService:
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
         if self.gemini_api_key:
             genai.configure(api_key=self.gemini_api_key)
-        
+        self.gemini_model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
         # Initialize Claude
         self.anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
-        
-        # Ollama base URL
-        self.ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        
-        # Default Ollama model
+        self.claude_model = os.getenv("CLAUDE_MODEL", "claude-sonnet-4-5")
+        self.anthropic_client = AsyncAnthropic(api_key=self.anthropic_api_key) if self.anthropic_api_key else None
+
+        # Ollama servers: a comma-separated OLLAMA_BASE_URLS, or the single OLLAMA_BASE_URL
+        base_urls = os.getenv("OLLAMA_BASE_URLS") or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+
+        # Default Ollama model, and the models a request may choose instead
         self.default_ollama_model = os.getenv("DEFAULT_OLLAMA_MODEL", "llama2")
-    
-    async def generate_completion(self, prompt: str, provider: str = "gemini"):
+        self.ollama_models = self._split(os.getenv("OLLAMA_MODELS")) or [self.default_ollama_model]
+        if self.default_ollama_model not in self.ollama_models:
+            self.ollama_models.append(self.default_ollama_model)
+
+        self.ollama_pool = OllamaPool(
+            self._split(base_urls),
+            max_concurrency=int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2")),
+            # How long Ollama keeps the model and its context loaded after a request ("-1" pins it)
+            keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+            warm_models=self._split(os.getenv("OLLAMA_WARM_MODELS")) or [self.default_ollama_model],
+            warm_interval=float(os.getenv("OLLAMA_WARM_INTERVAL_SECONDS", "240")),
+            queue_timeout=float(os.getenv("OLLAMA_QUEUE_TIMEOUT_SECONDS", "30")),
+        )
+
+    @staticmethod
+    def _split(value: Optional[str]) -> List[str]:
+        return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+    def model_name(self, provider: str, model: Optional[str] = None) -> str:
+        """The model a provider's requests go to, part of the stored plan's key.
+
+        Ollama requests may pick `model` from OLLAMA_MODELS; the other providers
+        use their configured model.
+        """
+        provider = (provider or "").lower()
+        models = {"gemini": self.gemini_model, "claude": self.claude_model, "ollama": self.default_ollama_model}
+        if provider not in models:
+            raise HTTPException(status_code=400, detail=f"Unsupported LLM provider: {provider}")
+        if model is None or model == models[provider]:
+            return models[provider]
+        if provider != "ollama":
+            raise HTTPException(status_code=400, detail="Choosing a model is only supported for Ollama")
+        if model not in self.ollama_models:
+            raise HTTPException(status_code=400,
+                                detail=f"Unsupported Ollama model: {model}. Available: {', '.join(self.ollama_models)}")
+        return model
+
+    async def generate_completion(self, prompt: str, provider: str = "gemini", model: Optional[str] = None):
+        completion = await self.generate_conversation([{"role": "user", "content": prompt}], provider, model=model)
+        return completion.text
+
+    async def generate_conversation(self, messages: List[Dict[str, str]], provider: str = "gemini",
+                                    cache: Optional[Dict[str, Any]] = None, cache_prefix: int = 0,
+                                    model: Optional[str] = None) -> Completion:
+        """Continue a conversation of alternating user/assistant messages ending with a user message.
+
+        The first `cache_prefix` messages are a stable prefix shared by later
+        calls (for a plan, the planning prompt and the original plan), which
+        each provider caches: Claude through cache_control breakpoints, Gemini
+        through a CachedContent resource and Ollama by continuing from the
+        context of the previous response while keep_alive holds it loaded.
+        `cache` holds the provider's handles between calls; the handles of the
+        returned conversation are written back to it. `model` picks an Ollama
+        model other than the default (see model_name). Provider calls are
+        given the time left before the request's deadline (see deadlines.py).
+        """
         provider = provider.lower()
-        
+        cache = cache if cache is not None else {}
+        model = self.model_name(provider, model)
+
         if provider == "gemini":
-            return await self._generate_with_gemini(prompt)
+            call = self._generate_with_gemini(messages, cache, cache_prefix)
         elif provider == "claude":
-            return await self._generate_with_claude(prompt)
-        elif provider == "ollama":
-            return await self._generate_with_ollama(prompt)
+            call = self._generate_with_claude(messages, cache_prefix)
         else:
-            raise HTTPException(status_code=400, detail=f"Unsupported LLM provider: {provider}")
-    
-    async def _generate_with_gemini(self, prompt: str):
+            call = self._generate_with_ollama(messages, cache, model)
+        return await self._measured(provider, model, call)
+
+    async def generate_with_tools(self, messages: List[Dict[str, str]], provider: str, tools: List[Dict[str, Any]],
+                                  call_tool: Callable[[str, Dict[str, Any]], Awaitable[str]],
+                                  max_turns: int = 6, max_tokens: int = 60000, max_calls_per_turn: int = 8,
+                                  on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                  model: Optional[str] = None) -> Completion:
+        """Continue a conversation, letting the model call `tools` before it answers.
+
+        `tools` are dicts with a name, description and JSON schema
+        `parameters`; `call_tool(name, arguments)` runs one and returns its
+        result as text. The calls the model asks for in one turn are
+        independent of each other, so they run concurrently and their results
+        go back together: a turn costs one model round trip however many
+        searches it makes. On the last of `max_turns` turns, or once the turns
+        have used `max_tokens` tokens, the model must answer without tools.
+        `on_event` is called with a dict for each turn, tool call and tool
+        result as they happen. The returned completion is the final answer,
+        with the usage of every turn.
+        """
+        provider = provider.lower()
+        model = self.model_name(provider, model)
+        emit = on_event or (lambda event: None)
+        if provider == "gemini":
+            conversation: List[Any] = [self._gemini_content(message) for message in messages]
+        else:
+            conversation = [{"role": message["role"], "content": message["content"]} for message in messages]
+
+        total = Completion(text="")
+        for turn in range(1, max_turns + 1):
+            final = turn == max_turns or total.total_tokens >= max_tokens
+            emit({"event": "turn", "turn": turn, "final": final, "usage": total.usage()})
+            if provider == "gemini":
+                call = self._tool_turn_gemini(conversation, tools, final)
+            elif provider == "claude":
+                call = self._tool_turn_claude(conversation, tools, final)
+            else:
+                call = self._tool_turn_ollama(conversation, tools, final, model)
+            completion = await self._measured(provider, model, call)
+            total.add_usage(completion)
+            total.text = completion.text
+            if final or not completion.tool_calls:
+                break
+
+            calls = completion.tool_calls
+            for tool_call in calls:
+                emit({"event": "tool_call", "turn": turn, "id": tool_call.id, "name": tool_call.name,
+                      "arguments": tool_call.arguments})
+            results = await asyncio.gather(*(self._run_tool(tool_call, call_tool, emit, turn)
+                                             for tool_call in calls[:max_calls_per_turn]))
+            # The model must get an answer for every call it made
+            results += [(f"Not run: at most {max_calls_per_turn} tool calls are allowed per turn", True)
+                        for _ in calls[max_calls_per_turn:]]
+            self._add_tool_results(provider, conversation, calls, results)
+
+        if not total.text.strip():
+            raise HTTPException(status_code=502, detail="The model did not answer within its tool call budget")
+        return total
+
+    @staticmethod
+    async def _run_tool(tool_call: ToolCall, call_tool: Callable[[str, Dict[str, Any]], Awaitable[str]],
+                        emit: Callable[[Dict[str, Any]], None], turn: int) -> Tuple[str, bool]:
+        started = time.monotonic()
+        try:
+            output, error = await call_tool(tool_call.name, tool_call.arguments), False
+        except HTTPException as e:
+            # Failures go back to the model, which can retry or do without
+            output, error = f"Error: {e.detail}", True
+        except Exception as e:
+            logger.exception(f"Tool {tool_call.name} failed: {str(e)}")
+            output, error = "Error: the tool failed", True
+        emit({"event": "tool_result", "turn": turn, "id": tool_call.id, "name": tool_call.name, "error": error,
+              "duration_ms": round((time.monotonic() - started) * 1000, 2)})
+        return output, error
+
+    @staticmethod
+    def _add_tool_results(provider: str, conversation: List[Any], calls: List[ToolCall],
+                          results: List[Tuple[str, bool]]):
+        if provider == "gemini":
+            conversation.append({"role": "user", "parts": [
+                genai.protos.Part(function_response=genai.protos.FunctionResponse(
+                    name=tool_call.name, response={"result": output}))
+                for tool_call, (output, _) in zip(calls, results)]})
+        elif provider == "claude":
+            conversation.append({"role": "user", "content": [
+                {"type": "tool_result", "tool_use_id": tool_call.id, "content": output, "is_error": error}
+                for tool_call, (output, error) in zip(calls, results)]})
+        else:
+            conversation += [{"role": "tool", "content": output, "tool_name": tool_call.name}
+                             for tool_call, (output, _) in zip(calls, results)]
+
+    async def _measured(self, provider: str, model: str, call: Awaitable[Completion]) -> Completion:
+        # Records the call's duration and tokens, or that it was cancelled
+        started = time.monotonic()
+        try:
+            completion = await call
+        except asyncio.CancelledError:
+            get_llm_metrics().cancelled(provider, time.monotonic() - started)
+            logger.info(f"{provider} call cancelled", extra={
+                "provider": provider, "duration_ms": round((time.monotonic() - started) * 1000, 2)})
+            raise
+        elapsed = time.monotonic() - started
+        get_llm_metrics().completed(provider, elapsed, completion.output_tokens)
+        if sample_success():
+            logger.info(f"{provider} call finished", extra={
+                "provider": provider, "model": model, "duration_ms": round(elapsed * 1000, 2), **completion.usage()})
+        return completion
+
+    async def _gemini_cached_prefix(self, messages: List[Dict[str, str]], cache: Dict[str, Any], cache_prefix: int):
+        # Reuse the cached prefix while it lives; otherwise cache it once
+        cached = cache.get("gemini_cached_content")
+        if cached and cached["expires_at"] > time.time() + 60:
+            return cached["content"], 0
+        if cache.get("gemini_uncacheable"):
+            return None, 0
+        try:
+            created = await asyncio.wait_for(asyncio.to_thread(
+                genai.caching.CachedContent.create,
+                model=f"models/{self.gemini_model}",
+                contents=[self._gemini_content(message) for message in messages[:cache_prefix]],
+                ttl=datetime.timedelta(seconds=PROMPT_CACHE_TTL_SECONDS),
+            ), remaining_seconds())
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Gemini API request timed out")
+        except Exception:
+            # Prefixes below the model's minimum cacheable size are sent uncached
+            cache["gemini_uncacheable"] = True
+            return None, 0
+        cache["gemini_cached_content"] = {"content": created,
+                                          "expires_at": time.time() + PROMPT_CACHE_TTL_SECONDS}
+        return created, created.usage_metadata.total_token_count
+
+    @staticmethod
+    def _gemini_content(message: Dict[str, str]) -> Dict[str, Any]:
+        return {"role": "model" if message["role"] == "assistant" else "user", "parts": [message["content"]]}
+
+    async def _generate_with_gemini(self, messages: List[Dict[str, str]], cache: Dict[str, Any], cache_prefix: int):
         try:
             if not self.gemini_api_key:
                 raise ValueError("Gemini API key not configured. Please set the GEMINI_API_KEY environment variable.")
-            
-            # Use the specified model (gemini-2.0-flash) as shown in your code
-            model = genai.GenerativeModel('gemini-2.0-flash')
-            
+
+            generation_config = {
+                "temperature": 0.7,
+                "top_p": 0.95,
+                "top_k": 40,
+                "max_output_tokens": 4096,
+            }
+
+            cached_prefix, written_tokens = None, 0
+            if cache_prefix:
+                cached_prefix, written_tokens = await self._gemini_cached_prefix(messages, cache, cache_prefix)
+            if cached_prefix:
+                model = genai.GenerativeModel.from_cached_content(cached_content=cached_prefix)
+                contents = [self._gemini_content(message) for message in messages[cache_prefix:]]
+            else:
+                model = genai.GenerativeModel(self.gemini_model)
+                contents = [self._gemini_content(message) for message in messages]
+
             # Set response parameters to ensure we get a well-formatted response
-            response = model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": 0.7,
-                    "top_p": 0.95,
-                    "top_k": 40,
-                    "max_output_tokens": 4096,
-                }
-            )
-            
+            response = await model.generate_content_async(contents, generation_config=generation_config,
+                                                          request_options={"timeout": remaining_seconds()})
+
             # Check if the response has an error
             if hasattr(response, 'error'):
                 raise ValueError(f"Gemini API error: {response.error}")
-                
+
             # Check if the response has text attribute
             if not hasattr(response, 'text'):
                 raise ValueError("Gemini API returned an unexpected response format")
-                
-            return response.text
+
+            usage = response.usage_metadata
+            cached_tokens = getattr(usage, "cached_content_token_count", 0) or 0
+            return Completion(
+                text=response.text,
+                input_tokens=usage.prompt_token_count - cached_tokens,
+                cached_input_tokens=cached_tokens,
+                cache_write_tokens=written_tokens,
+                output_tokens=usage.candidates_token_count,
+            )
+        except HTTPException:
+            raise
+        except DeadlineExceeded:
+            raise HTTPException(status_code=504, detail="Gemini API request timed out")
         except Exception as e:
             error_msg = f"Gemini API error: {str(e)}"
             raise HTTPException(status_code=500, detail=error_msg)
-    
-    async def _generate_with_claude(self, prompt: str):
+
+    async def _generate_with_claude(self, messages: List[Dict[str, str]], cache_prefix: int):
         try:
-            if not self.anthropic_api_key:
+            if not self.anthropic_client:
                 raise ValueError("Claude API key not configured. Please set the ANTHROPIC_API_KEY environment variable.")
-            
-            client = Anthropic(api_key=self.anthropic_api_key)
-            message = client.messages.create(
-                model="claude-3-sonnet-20240229",
+
+            # Cache breakpoints after the stable prefix and after the latest plan, so the
+            # next refinement reads everything but its own instruction from the cache
+            breakpoints = {cache_prefix - 1, len(messages) - 2} if cache_prefix else set()
+            request_messages = []
+            for position, message in enumerate(messages):
+                block = {"type": "text", "text": message["content"]}
+                if position in breakpoints:
+                    block["cache_control"] = {"type": "ephemeral"}
+                request_messages.append({"role": message["role"], "content": [block]})
+
+            message = await self.anthropic_client.messages.create(
+                model=self.claude_model,
                 max_tokens=4000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+                messages=request_messages,
+                timeout=remaining_seconds()
             )
-            
+
             if not message.content or len(message.content) == 0:
                 raise ValueError("Claude API returned an empty response")
-                
-            return message.content[0].text
+
+            usage = message.usage
+            return Completion(
+                text=message.content[0].text,
+                input_tokens=usage.input_tokens,
+                cached_input_tokens=usage.cache_read_input_tokens or 0,
+                cache_write_tokens=usage.cache_creation_input_tokens or 0,
+                output_tokens=usage.output_tokens,
+            )
+        except HTTPException:
+            raise
+        except APITimeoutError:
+            raise HTTPException(status_code=504, detail="Claude API request timed out")
         except Exception as e:
             error_msg = f"Claude API error: {str(e)}"
             raise HTTPException(status_code=500, detail=error_msg)
-    
-    async def _generate_with_ollama(self, prompt: str, model: str = None):
+
+    async def _generate_with_ollama(self, messages: List[Dict[str, str]], cache: Dict[str, Any], model: str = None):
         try:
             # Use the model passed or fall back to the default
             model_to_use = model or self.default_ollama_model
-            
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.ollama_base_url}/api/generate",
-                    json={"model": model_to_use, "prompt": prompt, "stream": False},
-                    timeout=60.0
+
+            # Continue from the context of the previous response when there is one, so
+            # Ollama only evaluates the new message; otherwise send the whole conversation
+            context = cache.get("ollama_context") if len(messages) > 1 else None
+            if context:
+                prompt = messages[-1]["content"]
+            else:
+                prompt = "\n\n".join(message["content"] for message in messages)
+            payload = {"model": model_to_use, "prompt": prompt, "stream": False}
+            if context:
+                payload["context"] = context
+
+            # The pool picks the least busy server and adds keep_alive
+            response = await self.ollama_pool.generate(payload, remaining_seconds())
+
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Ollama API error: {response.text}"
                 )
-                
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code, 
-                        detail=f"Ollama API error: {response.text}"
-                    )
-                
-                response_data = response.json()
-                if "response" not in response_data:
-                    raise ValueError("Ollama API returned an unexpected response format")
-                    
-                return response_data.get("response", "")
-        except httpx.TimeoutError:
+
+            response_data = response.json()
+            if "response" not in response_data:
+                raise ValueError("Ollama API returned an unexpected response format")
+
+            if response_data.get("context"):
+                cache["ollama_context"] = response_data["context"]
+            return Completion(
+                text=response_data.get("response", ""),
+                input_tokens=response_data.get("prompt_eval_count", 0),
+                cached_input_tokens=len(context) if context else 0,
+                output_tokens=response_data.get("eval_count", 0),
+            )
+        except HTTPException:
+            raise
+        except httpx.TimeoutException:
+            raise HTTPException(status_code=504, detail="Ollama API request timed out")
+        except Exception as e:
+            error_msg = f"Ollama API error: {str(e)}"
+            raise HTTPException(status_code=500, detail=error_msg)
+
+    @staticmethod
+    def _gemini_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+        # Gemini takes an OpenAPI subset: no titles or defaults, and nullable instead of anyOf with null
+        variants = schema.get("anyOf")
+        if variants:
+            types = [variant for variant in variants if variant.get("type") != "null"]
+            converted = LLMService._gemini_schema(types[0]) if types else {"type": "string"}
+            if len(types) < len(variants):
+                converted["nullable"] = True
+            if schema.get("description"):
+                converted["description"] = schema["description"]
+            return converted
+        converted = {key: value for key, value in schema.items()
+                     if key in ("type", "description", "enum", "format", "required", "nullable")}
+        if "properties" in schema:
+            converted["properties"] = {name: LLMService._gemini_schema(value)
+                                       for name, value in schema["properties"].items()}
+        if "items" in schema:
+            converted["items"] = LLMService._gemini_schema(schema["items"])
+        return converted
+
+    async def _tool_turn_gemini(self, conversation: List[Any], tools: List[Dict[str, Any]], final: bool):
+        try:
+            if not self.gemini_api_key:
+                raise ValueError("Gemini API key not configured. Please set the GEMINI_API_KEY environment variable.")
+
+            model = genai.GenerativeModel(self.gemini_model, tools=[{"function_declarations": [
+                {"name": tool["name"], "description": tool["description"],
+                 "parameters": self._gemini_schema(tool["parameters"])}
+                for tool in tools]}])
+            response = await model.generate_content_async(
+                conversation,
+                generation_config={"temperature": 0.7, "max_output_tokens": 4096},
+                tool_config={"function_calling_config": {"mode": "NONE" if final else "AUTO"}},
+                request_options={"timeout": remaining_seconds()},
+            )
+            if not response.candidates:
+                raise ValueError("Gemini API returned no candidates")
+
+            content = response.candidates[0].content
+            conversation.append(content)
+            usage = response.usage_metadata
+            cached_tokens = getattr(usage, "cached_content_token_count", 0) or 0
+            return Completion(
+                text="".join(part.text for part in content.parts if "text" in part),
+                input_tokens=usage.prompt_token_count - cached_tokens,
+                cached_input_tokens=cached_tokens,
+                output_tokens=usage.candidates_token_count,
+                # Gemini does not number its calls, so name them by their place in the conversation
+                tool_calls=[ToolCall(id=f"{len(conversation)}-{index}", name=part.function_call.name,
+                                     arguments=genai.protos.FunctionCall.to_dict(part.function_call).get("args", {}))
+                            for index, part in enumerate(content.parts) if "function_call" in part],
+            )
+        except HTTPException:
+            raise
+        except DeadlineExceeded:
+            raise HTTPException(status_code=504, detail="Gemini API request timed out")
+        except Exception as e:
+            error_msg = f"Gemini API error: {str(e)}"
+            raise HTTPException(status_code=500, detail=error_msg)
+
+    async def _tool_turn_claude(self, conversation: List[Dict[str, Any]], tools: List[Dict[str, Any]], final: bool):
+        try:
+            if not self.anthropic_client:
+                raise ValueError("Claude API key not configured. Please set the ANTHROPIC_API_KEY environment variable.")
+
+            message = await self.anthropic_client.messages.create(
+                model=self.claude_model,
+                max_tokens=4000,
+                messages=conversation,
+                # The tools stay declared on the last turn, since earlier turns used them
+                tools=[{"name": tool["name"], "description": tool["description"], "input_schema": tool["parameters"]}
+                       for tool in tools],
+                tool_choice={"type": "none"} if final else {"type": "auto"},
+                timeout=remaining_seconds()
+            )
+
+            if not message.content:
+                raise ValueError("Claude API returned an empty response")
+
+            conversation.append({"role": "assistant",
+                                 "content": [block.model_dump(exclude_none=True) for block in message.content]})
+            usage = message.usage
+            return Completion(
+                text="".join(block.text for block in message.content if block.type == "text"),
+                input_tokens=usage.input_tokens,
+                cached_input_tokens=usage.cache_read_input_tokens or 0,
+                cache_write_tokens=usage.cache_creation_input_tokens or 0,
+                output_tokens=usage.output_tokens,
+                tool_calls=[ToolCall(id=block.id, name=block.name, arguments=block.input)
+                            for block in message.content if block.type == "tool_use"],
+            )
+        except HTTPException:
+            raise
+        except APITimeoutError:
+            raise HTTPException(status_code=504, detail="Claude API request timed out")
+        except Exception as e:
+            error_msg = f"Claude API error: {str(e)}"
+            raise HTTPException(status_code=500, detail=error_msg)
+
+    async def _tool_turn_ollama(self, conversation: List[Dict[str, Any]], tools: List[Dict[str, Any]], final: bool,
+                                model: str):
+        try:
+            payload = {"model": model, "messages": conversation, "stream": False}
+            if not final:
+                payload["tools"] = [{"type": "function", "function": tool} for tool in tools]
+
+            # Tool calling needs the chat endpoint; the pool picks the least busy server as for generate
+            response = await self.ollama_pool.generate(payload, remaining_seconds(), endpoint="chat")
+
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Ollama API error: {response.text}"
+                )
+
+            response_data = response.json()
+            message = response_data.get("message")
+            if message is None:
+                raise ValueError("Ollama API returned an unexpected response format")
+
+            conversation.append(message)
+            tool_calls = []
+            for index, call in enumerate(message.get("tool_calls") or []):
+                arguments = call["function"].get("arguments") or {}
+                if isinstance(arguments, str):
+                    arguments = json.loads(arguments)
+                tool_calls.append(ToolCall(id=f"{len(conversation)}-{index}", name=call["function"]["name"],
+                                           arguments=arguments))
+            return Completion(
+                text=message.get("content", ""),
+                input_tokens=response_data.get("prompt_eval_count", 0),
+                output_tokens=response_data.get("eval_count", 0),
+                tool_calls=tool_calls,
+            )
+        except HTTPException:
+            raise
+        except httpx.TimeoutException:
             raise HTTPException(status_code=504, detail="Ollama API request timed out")
         except Exception as e:
             error_msg = f"Ollama API error: {str(e)}"
@@ -119,4 +560,4 @@ class LLMService:
 
 @lru_cache()
 def get_llm_service():
-    return LLMService() 
\ No newline at end of file
+    return LLMService()
@@ -0,0 +1,212 @@
+import atexit
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import secrets
+import sys
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# The id of the request being handled, added to every record logged while handling it
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not extra fields
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+# Share of success logs kept (see sample_success)
+_success_sample_rate = 1.0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request id and any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(
+                timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds the current request id to records; runs on the logging thread, where the id is known."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+def set_success_sample_rate(rate: float):
+    global _success_sample_rate
+    _success_sample_rate = rate
+
+
+def skip_record_details():
+    """Stop collecting process, thread and source location details for log records.
+
+    Neither log format shows them, and skipping them (the switches the
+    logging documentation lists under optimization) roughly halves the cost
+    of creating a record.
+    """
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging.logThreads = False
+    logging._srcfile = None
+
+
+def sample_success() -> bool:
+    """Whether to log this success: true for LOG_SUCCESS_SAMPLE_RATE of calls.
+
+    Checked before logging, so a skipped log costs no LogRecord.
+    """
+    return random.random() < _success_sample_rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread without blocking, dropping them when the queue is full.
+
+    Formatting, JSON encoding and I/O all happen on the writer thread; the
+    logging thread only merges the message arguments and enqueues the record.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler.prepare, tracebacks are formatted later on the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Losing a log line beats stalling requests behind a slow disk
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+
+
+def configure_logging():
+    """Route all logging through a queue to a background writer thread.
+
+    Records go to stderr, and with LOG_FILE also to a size-rotated file,
+    as JSON lines (LOG_FORMAT=json, the default) or text. Success logs are
+    kept at LOG_SUCCESS_SAMPLE_RATE (see sample_success).
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    set_success_sample_rate(float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "0.1")))
+    skip_record_details()
+
+    if os.getenv("LOG_FORMAT", "json").lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s")
+    handlers = [logging.StreamHandler(sys.stderr)]
+    log_file = os.getenv("LOG_FILE")
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+            backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+            encoding="utf-8",
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+    _queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Write out the queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+class RequestLoggingMiddleware:
+    """Gives each HTTP request an id and logs it with its status and duration.
+
+    The id is taken from a client's X-Request-ID header when it looks like
+    one, returned in X-Request-ID, and attached to every record logged while
+    the request is handled. Successful requests are sampled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger("api.requests")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+        if not request_id or len(request_id) > 64 or not request_id.replace("-", "").isalnum():
+            request_id = secrets.token_hex(8)
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if status_code >= 400 or sample_success():
+                fields = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                }
+                level = logging.ERROR if status_code >= 500 else logging.WARNING if status_code >= 400 else logging.INFO
+                self.logger.log(level, f"{scope['method']} {scope['path']} {status_code}", extra=fields)
+            request_id_var.reset(token)
@@ -0,0 +1,314 @@
+import asyncio
+import datetime
+import functools
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException
+from mcp import ClientSession, McpError, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.types import CONNECTION_CLOSED
+
+logger = logging.getLogger(__name__)
+
+# Scripts of the MCP tool servers, relative to MCP_SERVERS_DIR
+SERVER_SCRIPTS = {
+    "transport-hotels": "transport-hotels/transport_hotels.py",
+    "payment": "payment/payment_service.py",
+    "email-service": "email-service/email_service.py",
+}
+
+# Longest wait between restarts of a server that keeps crashing
+MAX_RESTART_BACKOFF_SECONDS = 30
+
+# A server that ran this long before stopping is restarted without backoff
+STABLE_SECONDS = 60
+
+
+class MCPServerConnection:
+    """One long-lived stdio session to an MCP tool server, restarted when it dies.
+
+    A supervisor task starts the server process, initializes the session and
+    pings it every `health_interval` seconds. Tool calls share the session:
+    MCP matches responses to requests by id, so any number of calls can be
+    in flight on one process at a time. When the process exits, a ping goes
+    unanswered or a call finds the connection closed, the supervisor starts
+    a new process, backing off while it keeps failing. `on_restart` is
+    called whenever the process has stopped, before a new one starts.
+    """
+
+    def __init__(self, name: str, params: StdioServerParameters, call_timeout: float = 10,
+                 startup_timeout: float = 15, health_interval: float = 10,
+                 on_restart: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.params = params
+        self.on_restart = on_restart
+        self.call_timeout = call_timeout
+        self.startup_timeout = startup_timeout
+        self.health_interval = health_interval
+        self.restarts = 0
+        self.calls = 0
+        self.errors = 0
+        self._session: Optional[ClientSession] = None
+        self._tools: Optional[List[Any]] = None
+        self._ready = asyncio.Event()
+        self._broken = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _supervise(self):
+        failures = 0
+        while True:
+            started = time.monotonic()
+            try:
+                async with stdio_client(self.params) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await asyncio.wait_for(session.initialize(), self.startup_timeout)
+                        self._broken.clear()
+                        self._session = session
+                        self._ready.set()
+                        logger.info(f"MCP server {self.name} is ready")
+                        await self._watch(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"MCP server {self.name} stopped: {e!r}")
+            finally:
+                self._ready.clear()
+                self._session = None
+            self.restarts += 1
+            if self.on_restart is not None:
+                self.on_restart()
+            failures = 0 if time.monotonic() - started > STABLE_SECONDS else failures + 1
+            await asyncio.sleep(min(MAX_RESTART_BACKOFF_SECONDS, 0.5 * 2 ** failures))
+
+    async def _watch(self, session: ClientSession):
+        while True:
+            try:
+                await asyncio.wait_for(self._broken.wait(), self.health_interval)
+                raise ConnectionError("a tool call found the connection closed")
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.wait_for(session.send_ping(), self.call_timeout)
+
+    async def _ready_session(self) -> Optional[ClientSession]:
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.startup_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail=f"The {self.name} service is unavailable")
+        return self._session
+
+    async def list_tools(self) -> List[Any]:
+        """The server's tools and their input schemas, fetched once."""
+        if self._tools is None:
+            session = await self._ready_session()
+            try:
+                if session is None:
+                    raise ConnectionError("the server restarted")
+                self._tools = (await session.list_tools()).tools
+            except (McpError, ConnectionError, anyio.ClosedResourceError, anyio.BrokenResourceError):
+                raise HTTPException(status_code=503, detail=f"The {self.name} service is unavailable")
+        return self._tools
+
+    async def call(self, tool: str, arguments: Dict[str, Any], retry: bool = False) -> str:
+        """Call `tool` and return its text result; `retry` repeats it once after a restart (for read-only tools)."""
+        for attempt in range(2 if retry else 1):
+            session = await self._ready_session()
+            if session is None:
+                # Died between being ready and this call waking up
+                continue
+            self.calls += 1
+            try:
+                result = await session.call_tool(tool, arguments,
+                                                 read_timeout_seconds=datetime.timedelta(seconds=self.call_timeout))
+            except McpError as e:
+                self.errors += 1
+                if e.error.code != CONNECTION_CLOSED:
+                    raise HTTPException(status_code=504, detail=f"The {self.name} service did not answer in time")
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                self.errors += 1
+            else:
+                text = "".join(getattr(block, "text", "") for block in result.content)
+                if result.isError:
+                    self.errors += 1
+                    raise HTTPException(status_code=502, detail=f"{tool} failed: {text}")
+                return text
+            # The process is gone: have the supervisor replace it before anyone else waits on this session
+            if self._session is session:
+                self._ready.clear()
+                self._broken.set()
+        raise HTTPException(status_code=503, detail=f"The {self.name} service restarted during the call")
+
+    def start(self):
+        if self._task is None:
+            # The events belong to the loop the app runs on
+            self._ready, self._broken = asyncio.Event(), asyncio.Event()
+            self._task = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ready": self._ready.is_set(), "restarts": self.restarts, "calls": self.calls, "errors": self.errors}
+
+
+class ToolResultCache:
+    """Parsed results of read-only tool calls, evicted least recently used first and after `ttl_seconds`.
+
+    Only successful results are kept. Only cache tools whose results stay
+    valid on their own: search results hand out option ids that the server
+    registers as it answers, and a cached copy would point at options the
+    server has since evicted or forgotten in a restart. The gateway clears a
+    server's results when it restarts.
+    """
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Tuple[str, str, str], value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self, server: str):
+        """Drop the results of every tool on `server`."""
+        for key in [key for key in self._entries if key[0] == server]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def _failed(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("success") is False
+
+
+class MCPGateway:
+    """Sessions to the MCP tool servers, shared by every request, with a cache of read-only results.
+
+    Concurrent cacheable calls with the same arguments share one call to the server.
+    """
+
+    def __init__(self, servers: Dict[str, StdioServerParameters], cache: ToolResultCache, **connection_settings):
+        self.servers = {name: MCPServerConnection(name, params, on_restart=functools.partial(cache.clear, name),
+                                                  **connection_settings)
+                        for name, params in servers.items()}
+        self.cache = cache
+        self._pending: Dict[Tuple[str, str, str], asyncio.Task] = {}
+
+    def _server(self, name: str) -> MCPServerConnection:
+        server = self.servers.get(name)
+        if server is None:
+            raise HTTPException(status_code=503, detail=f"The {name} service is not configured")
+        return server
+
+    async def tools(self, server: str, names: List[str]) -> List[Dict[str, Any]]:
+        """Name, description and JSON schema of the parameters of each of `names` on `server`."""
+        found = {tool.name: tool for tool in await self._server(server).list_tools()}
+        return [{"name": name, "description": found[name].description or "", "parameters": found[name].inputSchema}
+                for name in names if name in found]
+
+    async def call(self, server: str, tool: str, arguments: Dict[str, Any], cache: bool = False) -> Any:
+        """Call `tool` on `server` and return its parsed JSON result.
+
+        With `cache`, for tools that change nothing on the server (not even
+        registering the options they return), a recent result for the same arguments is returned without calling the server, and the call
+        is retried once if the server restarts during it.
+        """
+        connection = self._server(server)
+        arguments = {name: value for name, value in arguments.items() if value is not None}
+        if not cache:
+            return json.loads(await connection.call(tool, arguments))
+
+        key = (server, tool, json.dumps(arguments, sort_keys=True))
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.hits += 1
+            return result
+        task = self._pending.get(key)
+        if task is None:
+            self.cache.misses += 1
+            # A task of its own, so a caller that goes away does not cancel the call for the others
+            task = self._pending[key] = asyncio.ensure_future(self._fetch(connection, key, tool, arguments))
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.cache.hits += 1
+        return await asyncio.shield(task)
+
+    async def _fetch(self, connection: MCPServerConnection, key: Tuple[str, str, str], tool: str,
+                     arguments: Dict[str, Any]) -> Any:
+        result = json.loads(await connection.call(tool, arguments, retry=True))
+        if not _failed(result):
+            self.cache.put(key, result)
+        return result
+
+    def _finished(self, key: Tuple[str, str, str], task: asyncio.Task):
+        self._pending.pop(key, None)
+        # Retrieve the exception, which every caller may have stopped waiting for
+        if not task.cancelled():
+            task.exception()
+
+    def start(self):
+        for connection in self.servers.values():
+            connection.start()
+
+    async def stop(self):
+        await asyncio.gather(*(connection.stop() for connection in self.servers.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"servers": {name: connection.stats() for name, connection in self.servers.items()},
+                "cache": self.cache.stats()}
+
+
+def _server_params(names: List[str]) -> Dict[str, StdioServerParameters]:
+    directory = os.getenv("MCP_SERVERS_DIR") or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "mcp-servers")
+    python = os.getenv("MCP_PYTHON") or sys.executable
+    servers = {}
+    for name in names:
+        if name not in SERVER_SCRIPTS:
+            raise ValueError(f"Unknown MCP server {name!r} in MCP_GATEWAY_SERVERS")
+        servers[name] = StdioServerParameters(command=python, args=[os.path.join(directory, SERVER_SCRIPTS[name])],
+                                              env={"FASTMCP_LOG_LEVEL": "WARNING", **os.environ}, cwd=directory)
+    return servers
+
+
+_gateway = MCPGateway(
+    _server_params([name.strip() for name in os.getenv("MCP_GATEWAY_SERVERS", ",".join(SERVER_SCRIPTS)).split(",")
+                    if name.strip()]),
+    ToolResultCache(max_entries=int(os.getenv("MCP_CACHE_SIZE", "2000")),
+                    ttl_seconds=float(os.getenv("MCP_CACHE_TTL_SECONDS", "60"))),
+    call_timeout=float(os.getenv("MCP_CALL_TIMEOUT_SECONDS", "10")),
+    startup_timeout=float(os.getenv("MCP_STARTUP_TIMEOUT_SECONDS", "15")),
+    health_interval=float(os.getenv("MCP_HEALTH_INTERVAL_SECONDS", "10")),
+)
+
+
+def get_mcp_gateway():
+    return _gateway
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# How long a node that refused a connection is left out of the rotation
+NODE_DOWN_SECONDS = 30
+
+
+class OllamaNode:
+    def __init__(self, base_url: str, max_concurrency: int):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.outstanding = 0
+        self.completed = 0
+        self.down_until = 0.0
+
+    def up(self, now: float) -> bool:
+        return self.down_until <= now
+
+    def stats(self) -> Dict[str, Any]:
+        return {"base_url": self.base_url, "outstanding": self.outstanding, "completed": self.completed,
+                "up": self.up(time.monotonic())}
+
+
+class OllamaPool:
+    """Ollama servers shared by least outstanding requests, each with a concurrency cap.
+
+    A request goes to the reachable node with the fewest requests in flight
+    (ties rotate), and waits while every node is at `max_concurrency`, since
+    a CPU-bound Ollama server only slows down when given more. A node that
+    refuses connections is skipped for NODE_DOWN_SECONDS and the request is
+    retried on another node. Every `warm_interval` seconds each node is asked
+    to load the `warm_models` with `keep_alive`, so they are not unloaded
+    between requests and the first request after a quiet spell does not wait
+    for a reload.
+    """
+
+    def __init__(self, base_urls: List[str], max_concurrency: int = 2, keep_alive: str = "30m",
+                 warm_models: Optional[List[str]] = None, warm_interval: float = 240,
+                 queue_timeout: float = 30, request_timeout: float = 60):
+        if not base_urls:
+            raise ValueError("At least one Ollama base URL is required")
+        self.nodes = [OllamaNode(base_url, max_concurrency) for base_url in base_urls]
+        self.keep_alive = keep_alive
+        self.warm_models = warm_models or []
+        self.warm_interval = warm_interval
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self._turn = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Condition] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._warm_task: Optional[asyncio.Task] = None
+
+    def _bind(self):
+        # The condition and the client belong to one event loop; rebind if run from another one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._changed, self._client = loop, asyncio.Condition(), None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # One client for all requests, so connections to the nodes are reused
+        self._bind()
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.request_timeout)
+        return self._client
+
+    def _pick(self, exclude: List[OllamaNode]) -> Optional[OllamaNode]:
+        now = time.monotonic()
+        candidates = [node for node in self.nodes if node not in exclude]
+        # With every node down, try them anyway rather than fail without asking
+        reachable = [node for node in candidates if node.up(now)] or candidates
+        free = [node for node in reachable if node.outstanding < node.max_concurrency]
+        if not free:
+            return None
+        self._turn += 1
+        count = len(self.nodes)
+        return min(free, key=lambda node: (node.outstanding, (self.nodes.index(node) - self._turn) % count))
+
+    async def _acquire(self, exclude: List[OllamaNode], timeout: float) -> OllamaNode:
+        self._bind()
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self._pick(exclude) is not None),
+                                       min(self.queue_timeout, timeout))
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=503, detail="All Ollama servers are busy. Please try again later.")
+            node = self._pick(exclude)
+            node.outstanding += 1
+            return node
+
+    async def _release(self, node: OllamaNode):
+        async with self._changed:
+            node.outstanding -= 1
+            node.completed += 1
+            self._changed.notify_all()
+
+    async def generate(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+                       endpoint: str = "generate") -> httpx.Response:
+        """POST `payload` to /api/generate (or /api/`endpoint`) on the least busy node, retrying once elsewhere if a node is down.
+
+        `timeout` bounds the wait for a free node plus the request itself.
+        """
+        deadline = time.monotonic() + (timeout or self.request_timeout)
+        tried: List[OllamaNode] = []
+        while True:
+            node = await self._acquire(tried if len(tried) < len(self.nodes) else [], deadline - time.monotonic())
+            try:
+                return await self.client.post(f"{node.base_url}/api/{endpoint}",
+                                              json=dict(payload, keep_alive=self.keep_alive),
+                                              timeout=max(0.001, deadline - time.monotonic()))
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                node.down_until = time.monotonic() + NODE_DOWN_SECONDS
+                tried.append(node)
+                if len(tried) > 1 or len(self.nodes) == 1:
+                    raise
+                logger.warning(f"Ollama node {node.base_url} is unreachable, retrying on another node")
+            finally:
+                await self._release(node)
+
+    async def warm(self):
+        """Load the warm models on every node (a generate request without a prompt only loads the model)."""
+        async def ping(node: OllamaNode, model: str):
+            try:
+                response = await self.client.post(f"{node.base_url}/api/generate",
+                                                  json={"model": model, "keep_alive": self.keep_alive})
+                response.raise_for_status()
+                node.down_until = 0.0
+            except httpx.HTTPError as e:
+                # Warn when a node goes down, not on every ping while it stays down
+                if node.up(time.monotonic()):
+                    logger.warning(f"Warming {model} on Ollama node {node.base_url} failed: {e}")
+                if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+                    node.down_until = time.monotonic() + NODE_DOWN_SECONDS
+
+        await asyncio.gather(*(ping(node, model) for node in self.nodes for model in self.warm_models))
+
+    async def _warm_forever(self):
+        while True:
+            await self.warm()
+            await asyncio.sleep(self.warm_interval)
+
+    def start(self):
+        """Start the periodic warm-up pings; does nothing without warm models or with warm_interval 0."""
+        if self.warm_models and self.warm_interval > 0 and self._warm_task is None:
+            self._warm_task = asyncio.create_task(self._warm_forever())
+
+    async def stop(self):
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+            try:
+                await self._warm_task
+            except asyncio.CancelledError:
+                pass
+            self._warm_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [node.stats() for node in self.nodes]
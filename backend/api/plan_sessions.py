@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class PlanSession:
+    """The conversation that produced a plan: the planning prompt, the plan and any refinements.
+
+    Sessions are never changed once stored; refining a plan stores a new
+    session with the longer conversation under the refinement's plan id.
+    Several refinements of the same plan can therefore run side by side.
+    """
+    plan_id: str
+    provider: str
+    messages: List[Dict[str, str]]
+    model: Optional[str] = None
+    parent_id: Optional[str] = None
+    revision: int = 0
+    # Provider-side cache handles for this conversation (Gemini cached content, Ollama context)
+    cache: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def plan(self) -> str:
+        return self.messages[-1]["content"]
+
+
+class PlanSessionStore:
+    """In-memory plan sessions, evicted least recently used first and after `ttl_seconds`."""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 6 * 3600):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, PlanSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, session: PlanSession) -> PlanSession:
+        with self._lock:
+            self._sessions[session.plan_id] = session
+            self._sessions.move_to_end(session.plan_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, plan_id: str) -> Optional[PlanSession]:
+        with self._lock:
+            session = self._sessions.get(plan_id)
+            if session is None:
+                return None
+            if time.time() - session.created_at > self.ttl_seconds:
+                del self._sessions[plan_id]
+                return None
+            self._sessions.move_to_end(plan_id)
+            return session
+
+
+_store = PlanSessionStore(
+    max_sessions=int(os.getenv("PLAN_SESSIONS_MAX", "1000")),
+    ttl_seconds=float(os.getenv("PLAN_SESSION_TTL_SECONDS", str(6 * 3600))),
+)
+
+
+def get_plan_sessions():
+    return _store
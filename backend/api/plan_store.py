@@ -0,0 +1,147 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it plans are served gzip-encoded or plain
+    brotli = None
+
+# Bump when the planning or refinement prompt changes, so old plans are not served for new prompts
+PLAN_KEY_VERSION = 1
+
+# gzip level for stored plans: they are written once and served many times
+STORE_COMPRESSLEVEL = 9
+
+
+def normalize_text(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    value = " ".join(value.split()).casefold()
+    return value or None
+
+
+def plan_key(request: Dict[str, Any], model: str) -> str:
+    """Content hash of a planning request, ignoring case, spacing and interest order, plus the model.
+
+    For grounded plans, the start date, origin and guests are part of the hash.
+    """
+    interests = sorted({normalize_text(interest) for interest in request.get("interests") or []} - {None})
+    normalized = {
+        "version": PLAN_KEY_VERSION,
+        "destination": normalize_text(request.get("destination")),
+        "duration": request.get("duration"),
+        "budget": normalize_text(request.get("budget")),
+        "interests": interests,
+        "travel_style": normalize_text(request.get("travel_style")),
+        "provider": (request.get("llm_provider") or "").lower(),
+        "model": model,
+    }
+    if request.get("start_date"):
+        # A grounded plan (live offers for these dates) is a different plan from the plain one
+        normalized.update(start_date=request["start_date"], origin=normalize_text(request.get("origin")),
+                          guests=request.get("guests") or 1)
+    return _digest(normalized)
+
+
+def refinement_key(parent_id: str, instruction: str, model: str) -> str:
+    """Content hash of a refinement: the plan it refines, the normalized instruction and the model."""
+    return _digest({"version": PLAN_KEY_VERSION, "parent_id": parent_id,
+                    "instruction": normalize_text(instruction), "model": model})
+
+
+def _digest(value: Dict[str, Any]) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+class PlanStore:
+    """Generated plans on local disk, one gzip-compressed JSON document per plan id.
+
+    A plan id is the content hash of what produced the plan, so a stored
+    document never changes: the first plan written under an id wins, and the
+    id doubles as its ETag. The stored bytes are the gzip-encoded response
+    body of GET /api/plan/{id}, so clients that accept gzip are served the
+    file as it is.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, plan_id: str) -> str:
+        return os.path.join(self.directory, plan_id[:2], f"{plan_id}.json.gz")
+
+    @staticmethod
+    def valid_id(plan_id: str) -> bool:
+        return len(plan_id) == 32 and all(char in "0123456789abcdef" for char in plan_id)
+
+    def load_compressed(self, plan_id: str) -> Optional[bytes]:
+        if not self.valid_id(plan_id):
+            return None
+        try:
+            with open(self._path(plan_id), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def load(self, plan_id: str) -> Optional[Dict[str, Any]]:
+        compressed = self.load_compressed(plan_id)
+        if compressed is None:
+            return None
+        return json.loads(gzip.decompress(compressed))
+
+    def load_brotli(self, plan_id: str, compressed: bytes) -> Optional[bytes]:
+        """The brotli-encoded body of a stored plan, compressed on its first request and kept beside it."""
+        if brotli is None:
+            return None
+        path = self._path(plan_id)[:-len(".gz")] + ".br"
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            pass
+        encoded = brotli.compress(gzip.decompress(compressed), quality=11)
+        descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(encoded)
+        # The encoding is deterministic, so concurrent writers write the same bytes
+        os.replace(temp_path, path)
+        return encoded
+
+    def save(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a plan document under its `plan_id` and return the stored document.
+
+        If the id is already stored (the same request was planned concurrently),
+        the existing document is kept and returned.
+        """
+        plan_id = document["plan_id"]
+        document = dict(document, created_at=document.get("created_at") or time.time())
+        body = json.dumps(document, separators=(",", ":")).encode("utf-8")
+        # mtime=0 keeps the bytes a function of the document alone
+        compressed = gzip.compress(body, compresslevel=STORE_COMPRESSLEVEL, mtime=0)
+
+        path = self._path(plan_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(compressed)
+            try:
+                # Linking fails if the id exists, so the first complete write wins
+                os.link(temp_path, path)
+            except FileExistsError:
+                return self.load(plan_id)
+        finally:
+            os.unlink(temp_path)
+        return document
+
+
+_store = PlanStore(os.getenv("PLAN_STORE_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "plans")))
+
+
+def get_plan_store():
+    return _store
@@ -0,0 +1,190 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .plan_store import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Assumed tokens per plan until plans have been generated (prompt plus a full-length answer)
+DEFAULT_TOKENS_PER_PLAN = 5000
+
+
+class CountMinSketch:
+    """Approximate counts of many keys in `depth` rows of `width` counters.
+
+    An estimate never undercounts; with conservative updates it overcounts by
+    at most the total count over `width` in most rows. Memory stays fixed
+    however many distinct keys are seen.
+    """
+
+    def __init__(self, width: int = 4096, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self._rows = [[0] * width for _ in range(depth)]
+
+    def _cells(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8 * self.depth).digest()
+        return [int.from_bytes(digest[8 * row:8 * row + 8], "little") % self.width for row in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Count `key` and return its new estimate."""
+        cells = self._cells(key)
+        # Conservative update: only the smallest counters grow, which keeps estimates tighter
+        estimate = min(row[cell] for row, cell in zip(self._rows, cells)) + count
+        for row, cell in zip(self._rows, cells):
+            if row[cell] < estimate:
+                row[cell] = estimate
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[cell] for row, cell in zip(self._rows, self._cells(key)))
+
+    def decay(self):
+        """Halve all counts, so older traffic weighs less than recent traffic."""
+        for row in self._rows:
+            row[:] = [count >> 1 for count in row]
+
+
+def trend_key(request: Dict[str, Any]) -> str:
+    """The normalized (destination, duration, interests) a planning request is counted under."""
+    interests = sorted({normalize_text(interest) for interest in request.get("interests") or []} - {None})
+    return json.dumps([normalize_text(request.get("destination")), request.get("duration"), interests])
+
+
+def parse_window(window: str) -> Tuple[datetime.time, datetime.time]:
+    """Parse an "HH:MM-HH:MM" local time window; the end may be past midnight (raises ValueError if malformed)."""
+    start, separator, end = window.partition("-")
+    if not separator:
+        raise ValueError(f"Pre-warm window must look like 02:00-05:00, got {window!r}")
+    return (datetime.datetime.strptime(start.strip(), "%H:%M").time(),
+            datetime.datetime.strptime(end.strip(), "%H:%M").time())
+
+
+class PlanPrewarmer:
+    """Counts planning requests and regenerates the most requested ones off-peak.
+
+    Requests are counted per trend key in a count-min sketch, and the
+    `top_k` keys with the highest estimates are kept as candidates with the
+    latest full request seen for each. Once per off-peak window, the
+    candidates are handed, most requested first, to a `warm_plan` callable
+    that generates and stores the plan unless it is already stored, until the
+    window's `token_budget` would be exceeded. Counts are then halved, so the
+    candidates follow what is trending rather than what was popular once.
+    """
+
+    def __init__(self, window: Optional[str] = None, top_k: int = 20, token_budget: int = 200_000,
+                 check_seconds: float = 300, sketch: Optional[CountMinSketch] = None):
+        self.window = parse_window(window) if window else None
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.check_seconds = check_seconds
+        self.sketch = sketch or CountMinSketch()
+        # Trend key -> [estimate, latest request]; a few more than top_k, so newcomers can climb
+        self._candidates: Dict[str, List[Any]] = {}
+        self._capacity = 2 * top_k
+        self.tokens_per_plan = DEFAULT_TOKENS_PER_PLAN
+        self._warmed_window: Optional[datetime.date] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, request: Dict[str, Any]):
+        key = trend_key(request)
+        estimate = self.sketch.add(key)
+        candidate = self._candidates.get(key)
+        if candidate is not None:
+            candidate[0], candidate[1] = estimate, request
+            return
+        if len(self._candidates) >= self._capacity:
+            coldest = min(self._candidates, key=lambda other: self._candidates[other][0])
+            if self._candidates[coldest][0] >= estimate:
+                return
+            del self._candidates[coldest]
+        self._candidates[key] = [estimate, request]
+
+    def top(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """The `top_k` most requested candidates as (estimate, request), most requested first."""
+        ranked = sorted(self._candidates.values(), key=lambda candidate: -candidate[0])
+        return [(estimate, request) for estimate, request in ranked[:self.top_k]]
+
+    def window_start(self, now: datetime.datetime) -> Optional[datetime.date]:
+        """The date the off-peak window containing `now` started on, or None outside the window."""
+        if self.window is None:
+            return None
+        start, end = self.window
+        clock = now.time()
+        if start <= end:
+            return now.date() if start <= clock < end else None
+        # The window wraps past midnight
+        if clock >= start:
+            return now.date()
+        if clock < end:
+            return now.date() - datetime.timedelta(days=1)
+        return None
+
+    async def warm(self, warm_plan: Callable[[Dict[str, Any]], Awaitable[Optional[int]]]) -> Dict[str, int]:
+        """Warm the current top candidates within the token budget.
+
+        `warm_plan` generates and stores one request's plan and returns the
+        tokens spent, or None if the plan was already stored.
+        """
+        stats = {"candidates": 0, "generated": 0, "already_stored": 0, "tokens": 0}
+        for _, request in self.top():
+            stats["candidates"] += 1
+            if stats["tokens"] + self.tokens_per_plan > self.token_budget:
+                break
+            try:
+                tokens = await warm_plan(request)
+            except Exception as e:
+                # The provider is failing; leave the rest for the next window
+                logger.warning(f"Pre-warming stopped after an error: {e}")
+                break
+            if tokens is None:
+                stats["already_stored"] += 1
+                continue
+            stats["generated"] += 1
+            stats["tokens"] += tokens
+            # Moving average, so the budget check tracks what plans actually cost
+            self.tokens_per_plan = (3 * self.tokens_per_plan + tokens) // 4
+        self.sketch.decay()
+        for candidate in self._candidates.values():
+            candidate[0] >>= 1
+        return stats
+
+    async def _run(self, warm_plan: Callable[[Dict[str, Any]], Awaitable[Optional[int]]]):
+        while True:
+            started = self.window_start(datetime.datetime.now())
+            if started is not None and started != self._warmed_window:
+                self._warmed_window = started
+                stats = await self.warm(warm_plan)
+                logger.info(f"Pre-warmed trending plans: {stats}")
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self, warm_plan: Callable[[Dict[str, Any]], Awaitable[Optional[int]]]):
+        """Start warming in the background; does nothing if no off-peak window is configured."""
+        if self.window is not None and self._task is None:
+            self._task = asyncio.create_task(self._run(warm_plan))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_prewarmer = PlanPrewarmer(
+    window=os.getenv("PREWARM_WINDOW") or None,
+    top_k=int(os.getenv("PREWARM_TOP_K", "20")),
+    token_budget=int(os.getenv("PREWARM_TOKEN_BUDGET", "200000")),
+    check_seconds=float(os.getenv("PREWARM_CHECK_SECONDS", "300")),
+)
+
+
+def get_plan_prewarmer():
+    return _prewarmer
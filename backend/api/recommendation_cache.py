@@ -0,0 +1,204 @@
+import functools
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .plan_store import normalize_text
+
+# Words that name the same interest, mapped to one of them
+SYNONYMS = {
+    "beach": ["beaches", "seaside", "coast", "coastal", "coastline", "shore", "seashore", "sand", "sandy", "sea",
+              "ocean", "island", "islands", "sunbathing", "swimming"],
+    "food": ["cuisine", "culinary", "gastronomy", "gastronomic", "foodie", "eating", "dining", "restaurant",
+             "restaurants", "street food", "cooking", "dishes", "seafood", "eat"],
+    "hiking": ["hike", "hikes", "trekking", "trek", "treks", "trail", "trails", "walking", "backpacking"],
+    "museum": ["museums", "gallery", "galleries", "exhibition", "exhibitions"],
+    "art": ["arts", "painting", "paintings", "artwork"],
+    "history": ["historic", "historical", "heritage", "ancient", "ruin", "ruins", "castle", "castles", "old town",
+                "old towns", "monuments"],
+    "nightlife": ["night life", "bar", "bars", "club", "clubs", "clubbing", "party", "parties", "partying",
+                  "pub", "pubs"],
+    "nature": ["wildlife", "outdoors", "outdoor", "national park", "national parks", "landscape", "landscapes",
+               "scenery", "forest", "forests", "countryside", "rural"],
+    "mountain": ["mountains", "alps", "alpine", "peak", "peaks"],
+    "ski": ["skiing", "snowboard", "snowboarding", "snow", "winter sports"],
+    "diving": ["dive", "scuba", "snorkel", "snorkeling", "snorkelling", "reef", "reefs", "coral"],
+    "relaxation": ["relax", "relaxing", "spa", "spas", "wellness", "rest", "unwind"],
+    "adventure": ["adventures", "adventurous", "extreme sports", "thrill", "adrenaline"],
+    "culture": ["cultural", "tradition", "traditions", "local life", "customs"],
+    "shopping": ["shop", "shops", "market", "markets", "boutiques", "souvenirs"],
+    "wine": ["wines", "vineyard", "vineyards", "winery", "wineries", "wine tasting"],
+    "music": ["concert", "concerts", "live music", "festival", "festivals"],
+    "architecture": ["buildings", "cathedral", "cathedrals", "churches", "temples"],
+    "photography": ["photo", "photos", "photographs", "pictures", "instagram"],
+    "family": ["kids", "children", "family friendly", "family-friendly"],
+}
+
+# Words that add nothing to an interest
+STOPWORDS = {"and", "or", "the", "a", "an", "of", "in", "to", "with", "for", "on", "at", "some", "lots", "lot",
+             "good", "great", "nice", "love", "like", "i", "we", "my", "our", "local", "activities", "things",
+             "places", "spots", "experiences", "experience", "exploring", "explore", "visiting", "visit", "views", "view",
+             "sites", "site", "spot"}
+
+_CANONICAL = {variant: canonical for canonical, variants in SYNONYMS.items() for variant in variants}
+_PHRASE = re.compile(r"\b(" + "|".join(re.escape(variant) for variant in sorted(
+    (variant for variant in _CANONICAL if " " in variant or "-" in variant), key=len, reverse=True)) + r")\b")
+_WORD = re.compile(r"[a-z0-9]+")
+_VOCABULARY = {word for variant in _CANONICAL for word in variant.split() if "-" not in word} | set(SYNONYMS)
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+@functools.lru_cache(maxsize=10000)
+def _correct(word: str) -> str:
+    """A known word one swapped, missing or extra letter away from `word`, or `word` itself."""
+    if word in _VOCABULARY or len(word) < 5:
+        return word
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    # Substitutions are left out: they turn real words into other ones (bikes, hikes)
+    edits = ([left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1]
+             + [left + right[1:] for left, right in splits if right]
+             + [left + letter + right for left, right in splits for letter in _LETTERS])
+    return next((edit for edit in edits if edit in _VOCABULARY), word)
+
+
+def interest_terms(text: str) -> List[str]:
+    """The canonical words of a free-form interest or place: lowercased, typos, synonyms and plurals folded, filler dropped."""
+    text = _PHRASE.sub(lambda match: f" {_CANONICAL[match.group(1)]} ", " ".join((text or "").casefold().split()))
+    terms = []
+    for word in _WORD.findall(text):
+        if word in STOPWORDS:
+            continue
+        word = _CANONICAL.get(_correct(word), _correct(word))
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = _CANONICAL.get(word[:-1], word[:-1])
+        terms.append(word)
+    return terms
+
+
+def _bucket(feature: str, dimensions: int) -> Tuple[int, float]:
+    # crc32 is stable across processes (unlike hash()); its top bit picks the sign, evening out collisions
+    value = zlib.crc32(feature.encode("utf-8"))
+    return value % dimensions, 1.0 if value & 0x80000000 else -1.0
+
+
+def embed_terms(terms: List[str], dimensions: int, trigram_weight: float = 0.3) -> np.ndarray:
+    """Unit-length hashed vector of the terms and their character trigrams (so near spellings stay close)."""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for term in set(terms):
+        index, sign = _bucket(term, dimensions)
+        vector[index] += sign
+        padded = f"<{term}>"
+        for start in range(len(padded) - 2):
+            index, sign = _bucket(f"#{padded[start:start + 3]}", dimensions)
+            vector[index] += sign * trigram_weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def split_location(location: Optional[str]) -> Tuple[str, str]:
+    """The place ("Paris") and the normalized qualifier after it ("texas,usa" for "Paris, Texas, USA")."""
+    place, _, qualifier = (location or "").partition(",")
+    return place, ",".join(filter(None, (normalize_text(part) for part in qualifier.split(","))))
+
+
+def recommendation_scope(request: Dict[str, Any], model: str) -> str:
+    """Hash of the fields a cached recommendation must match exactly: model, budget, season, travel history
+    and the location's qualifier, so "Paris, Texas" never gets the answer for "Paris, France" or "Paris"."""
+    history = sorted({normalize_text(place) for place in request.get("travel_history") or []} - {None})
+    key = "\x1f".join([
+        (request.get("llm_provider") or "").lower(), model, normalize_text(request.get("budget")) or "",
+        normalize_text(request.get("season")) or "", "\x1e".join(history),
+        split_location(request.get("current_location"))[1],
+    ])
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class SemanticRecommendationCache:
+    """Recommendations kept for requests that say the same thing in other words.
+
+    A request is looked up by the similarity of its interests and of its
+    current location to those of cached requests with the same model,
+    budget, season, travel history and location qualifier. Interests and locations are embedded
+    as hashed vectors of their canonical words (see interest_terms) and
+    character trigrams; the cached answer is used when both cosine
+    similarities reach `threshold`.
+
+    Vectors live in preallocated NumPy arrays of `max_entries` rows, so
+    memory is fixed; a lookup is one matrix-vector product over the rows.
+    Entries expire after `ttl_seconds`, and when the cache is full the least
+    recently used entry is replaced.
+    """
+
+    def __init__(self, max_entries: int = 5000, threshold: float = 0.92, ttl_seconds: float = 24 * 3600,
+                 dimensions: int = 256):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.dimensions = dimensions
+        self.hits = 0
+        self.misses = 0
+        self._interests = np.zeros((max_entries, dimensions), dtype=np.float32)
+        self._locations = np.zeros((max_entries, dimensions), dtype=np.float32)
+        self._scopes = np.zeros(max_entries, dtype=np.uint64)
+        self._created = np.zeros(max_entries, dtype=np.float64)
+        # 0 marks a free row
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._values: List[Optional[str]] = [None] * max_entries
+        self._lock = threading.Lock()
+
+    def _embed(self, request: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        interests = [term for interest in request.get("interests") or [] for term in interest_terms(interest)]
+        # Only the place is compared by similarity; its qualifier is part of the scope
+        place = split_location(request.get("current_location"))[0]
+        return embed_terms(interests, self.dimensions), embed_terms(interest_terms(place), self.dimensions)
+
+    def similar(self, request: Dict[str, Any], model: str) -> Tuple[Optional[str], float]:
+        """The cached recommendations closest to `request` within the threshold, and their similarity."""
+        interests, location = self._embed(request)
+        scope = np.uint64(int(recommendation_scope(request, model), 16))
+        now = time.monotonic()
+        with self._lock:
+            # Scoring every row costs less than copying out the rows in scope first
+            live = (self._scopes == scope) & (self._last_used > 0) & (self._created > now - self.ttl_seconds)
+            # A match must be close on both; the weaker of the two decides
+            scores = np.where(live, np.minimum(self._interests @ interests, self._locations @ location), -1.0)
+            row = int(np.argmax(scores))
+            if scores[row] >= self.threshold:
+                self._last_used[row] = now
+                self.hits += 1
+                return self._values[row], float(scores[row])
+            self.misses += 1
+            return None, 0.0
+
+    def add(self, request: Dict[str, Any], model: str, recommendations: str):
+        interests, location = self._embed(request)
+        now = time.monotonic()
+        with self._lock:
+            # Expired rows go before live ones, then the least recently used
+            last_used = np.where(self._created > now - self.ttl_seconds, self._last_used, 0)
+            row = int(np.argmin(last_used))
+            self._interests[row] = interests
+            self._locations[row] = location
+            self._scopes[row] = int(recommendation_scope(request, model), 16)
+            self._created[row] = self._last_used[row] = now
+            self._values[row] = recommendations
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": int(np.count_nonzero(self._last_used)), "hits": self.hits, "misses": self.misses}
+
+
+_cache = SemanticRecommendationCache(
+    max_entries=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "5000")),
+    threshold=float(os.getenv("RECOMMENDATION_CACHE_THRESHOLD", "0.92")),
+    ttl_seconds=float(os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", str(24 * 3600))),
+)
+
+
+def get_recommendation_cache():
+    return _cache
@@ -1,7 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import datetime
+import gzip
+import json
+import logging
+import os
+import time
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from .llm_service import get_llm_service, LLMService
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from .deadlines import get_llm_metrics, request_timeout, run_with_deadline, start_with_deadline, LLMCallMetrics
+from .llm_service import get_llm_service, Completion, LLMService
+from .logging_config import dropped_records
+from .mcp_gateway import get_mcp_gateway, MCPGateway
+from .plan_sessions import get_plan_sessions, PlanSession, PlanSessionStore
+from .prewarm import get_plan_prewarmer, PlanPrewarmer
+from .plan_store import brotli, get_plan_store, plan_key, refinement_key, PlanStore
+from .recommendation_cache import get_recommendation_cache, SemanticRecommendationCache
+
+logger = logging.getLogger(__name__)
+
+# Refinements allowed on top of one original plan
+MAX_PLAN_REVISIONS = 20
+
+# Tools a grounded plan may call, all read-only searches, and the MCP server that has them
+PLANNING_TOOLS = {name: "transport-hotels" for name in (
+    "search_hotels", "search_flights", "search_trains", "search_buses", "search_flexible_dates",
+    "hotel_availability_calendar")}
+
+# Planning tools whose results are cached; the others register the options
+# they return on the server, so a cached result could point at forgotten ones
+CACHED_PLANNING_TOOLS = {"search_flexible_dates"}
+
+# Limits on a grounded plan's tool-calling loop
+TOOL_PLAN_MAX_TURNS = int(os.getenv("TOOL_PLAN_MAX_TURNS", "6"))
+TOOL_PLAN_MAX_TOKENS = int(os.getenv("TOOL_PLAN_MAX_TOKENS", "60000"))
+TOOL_PLAN_MAX_CALLS_PER_TURN = int(os.getenv("TOOL_PLAN_MAX_CALLS_PER_TURN", "8"))
+
+# Longest tool result passed to the model, in characters; search results are cut to fit
+TOOL_RESULT_MAX_CHARS = 8000
 
 travel_router = APIRouter(tags=["Travel"])
 
@@ -12,6 +49,15 @@ class TravelPlanRequest(BaseModel):
     interests: Optional[List[str]] = None
     travel_style: Optional[str] = None
     llm_provider: Optional[str] = "gemini" # Default to Gemini Pro
+    llm_model: Optional[str] = None # Ollama model from OLLAMA_MODELS; defaults to DEFAULT_OLLAMA_MODEL
+
+class GroundedPlanRequest(TravelPlanRequest):
+    start_date: str # YYYY-MM-DD, the day the trip starts
+    origin: Optional[str] = None # Where the trip starts, to search transport there and back
+    guests: int = 1
+
+class PlanRefinementRequest(BaseModel):
+    instruction: str
 
 class RecommendationRequest(BaseModel):
     current_location: str
@@ -20,22 +66,14 @@ class RecommendationRequest(BaseModel):
     budget: Optional[str] = None
     season: Optional[str] = None
     llm_provider: Optional[str] = "gemini" # Default to Gemini Pro
+    llm_model: Optional[str] = None # Ollama model from OLLAMA_MODELS; defaults to DEFAULT_OLLAMA_MODEL
 
-@travel_router.post("/plan", status_code=status.HTTP_200_OK)
-async def create_travel_plan(request: TravelPlanRequest, llm_service: LLMService = Depends(get_llm_service)):
-    try:
-        # Validate inputs
-        if request.duration <= 0:
-            raise ValueError("Duration must be greater than 0 days")
-            
-        if not request.destination or len(request.destination.strip()) == 0:
-            raise ValueError("Destination cannot be empty")
-        
-        prompt = f"""
-        Create a detailed travel plan for a trip to {request.destination} for {request.duration} days.
-        {f'Budget: {request.budget}' if request.budget else ''}
-        {f'Interests: {", ".join(request.interests)}' if request.interests else ''}
-        {f'Travel style: {request.travel_style}' if request.travel_style else ''}
+def _plan_prompt(request: Dict[str, Any]) -> str:
+    return f"""
+        Create a detailed travel plan for a trip to {request['destination']} for {request['duration']} days.
+        {f'Budget: {request["budget"]}' if request.get('budget') else ''}
+        {f'Interests: {", ".join(request["interests"])}' if request.get('interests') else ''}
+        {f'Travel style: {request["travel_style"]}' if request.get('travel_style') else ''}
         
         Include:
         1. Day-by-day itinerary with activities
@@ -48,10 +86,132 @@ async def create_travel_plan(request: TravelPlanRequest, llm_service: LLMService
         8. Safety tips
         
         Format the response neatly with clear sections and subsections.
+        """ + (_grounding_prompt(request) if request.get('start_date') else '')
+
+def _grounding_prompt(request: Dict[str, Any]) -> str:
+    # For grounded plans (see create_grounded_travel_plan)
+    start = datetime.date.fromisoformat(request['start_date'])
+    end = start + datetime.timedelta(days=request['duration'])
+    transport = (f"transport from {request['origin']} to {request['destination']} on {start} and back on {end}"
+                 if request.get('origin') else "")
+    return f"""
+        Use the tools to find real options and prices before writing the plan: hotels in
+        {request['destination']} from {start} to {end} for {request.get('guests', 1)} guest(s){' and ' + transport if transport else ''}.
+        Make independent searches together in the same turn. Recommend accommodations and transport
+        from the results, quoting their names, ids and prices, and base the estimated costs on them.
         """
-        
-        response = await llm_service.generate_completion(prompt, request.llm_provider)
-        return {"plan": response}
+
+def _refinement_prompt(instruction: str) -> str:
+    return f"""
+        Revise the travel plan above as follows: {instruction.strip()}
+
+        Return the complete updated plan in the same format, keeping everything the request does not change.
+        """
+
+def _plan_session(plan_id: str, plan_sessions: PlanSessionStore, plan_store: PlanStore) -> Optional[PlanSession]:
+    """The conversation behind a plan, rebuilt from the stored plans if it is no longer in memory."""
+    session = plan_sessions.get(plan_id)
+    if session is not None:
+        return session
+
+    # Walk back to the original plan, then replay the prompts and plans in order
+    documents = []
+    document_id = plan_id
+    while document_id is not None:
+        document = plan_store.load(document_id)
+        if document is None:
+            return None
+        documents.append(document)
+        document_id = document["parent_id"]
+    messages = []
+    for document in reversed(documents):
+        prompt = _refinement_prompt(document["instruction"]) if document["parent_id"] else _plan_prompt(document["request"])
+        messages += [{"role": "user", "content": prompt}, {"role": "assistant", "content": document["plan"]}]
+    latest = documents[0]
+    return plan_sessions.add(PlanSession(plan_id=plan_id, provider=latest["provider"], messages=messages,
+                                         model=latest["model"], parent_id=latest["parent_id"],
+                                         revision=latest["revision"]))
+
+def _stored_plan_response(document: Dict[str, Any]) -> Dict[str, Any]:
+    # A stored plan costs no tokens
+    return {
+        "plan": document["plan"],
+        "plan_id": document["plan_id"],
+        "parent_id": document["parent_id"],
+        "revision": document["revision"],
+        "usage": Completion(text=document["plan"]).usage(),
+        "cached": True,
+    }
+
+async def _generate_plan(plan_request: Dict[str, Any], provider: str, model: str, plan_id: str,
+                         llm_service: LLMService, plan_sessions: PlanSessionStore, plan_store: PlanStore,
+                         generate: Optional[Callable[[List[Dict[str, str]]], Awaitable[Completion]]] = None):
+    messages = [{"role": "user", "content": _plan_prompt(plan_request)}]
+    session = PlanSession(plan_id=plan_id, provider=provider, messages=messages, model=model)
+    if generate is None:
+        completion = await llm_service.generate_conversation(messages, provider, session.cache, model=model)
+    else:
+        completion = await generate(messages)
+    stored = plan_store.save({
+        "plan_id": plan_id,
+        "parent_id": None,
+        "revision": 0,
+        "provider": provider,
+        "model": model,
+        "request": plan_request,
+        "plan": completion.text,
+    })
+    session.messages = messages + [{"role": "assistant", "content": stored["plan"]}]
+    plan_sessions.add(session)
+    return stored, completion
+
+async def prewarm_plan(request: Dict[str, Any]) -> Optional[int]:
+    """Generate and store a trending request's plan for the pre-warmer; returns the tokens spent, or None if stored."""
+    llm_service = get_llm_service()
+    plan_store = get_plan_store()
+    model = llm_service.model_name(request["llm_provider"], request.get("llm_model"))
+    plan_id = plan_key(request, model)
+    if plan_store.load_compressed(plan_id) is not None:
+        return None
+    plan_request = {name: value for name, value in request.items() if name not in ("llm_provider", "llm_model")}
+    _, completion = await _generate_plan(plan_request, request["llm_provider"], model, plan_id, llm_service,
+                                         get_plan_sessions(), plan_store)
+    return sum(completion.usage().values())
+
+@travel_router.post("/plan", status_code=status.HTTP_200_OK)
+async def create_travel_plan(
+    request: TravelPlanRequest,
+    http_request: Request,
+    timeout: float = Depends(request_timeout),
+    llm_service: LLMService = Depends(get_llm_service),
+    plan_sessions: PlanSessionStore = Depends(get_plan_sessions),
+    plan_store: PlanStore = Depends(get_plan_store),
+    plan_prewarmer: PlanPrewarmer = Depends(get_plan_prewarmer)
+):
+    try:
+        # Validate inputs
+        if request.duration <= 0:
+            raise ValueError("Duration must be greater than 0 days")
+            
+        if not request.destination or len(request.destination.strip()) == 0:
+            raise ValueError("Destination cannot be empty")
+
+        # The same request to the same model is answered from the store
+        model = llm_service.model_name(request.llm_provider, request.llm_model)
+        plan_prewarmer.record(request.model_dump())
+        plan_id = plan_key(request.model_dump(), model)
+        stored = plan_store.load(plan_id)
+        if stored is not None:
+            return _stored_plan_response(stored)
+
+        # Cancelled at the deadline or when the client goes away
+        stored, completion = await run_with_deadline(
+            http_request,
+            _generate_plan(request.model_dump(exclude={"llm_provider", "llm_model"}), request.llm_provider, model,
+                           plan_id, llm_service, plan_sessions, plan_store),
+            timeout,
+        )
+        return {"plan": stored["plan"], "plan_id": plan_id, "usage": completion.usage()}
     except ValueError as e:
         # Client error - bad input
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -60,20 +220,277 @@ async def create_travel_plan(request: TravelPlanRequest, llm_service: LLMService
         raise e
     except Exception as e:
         # Server error - log and return generic error
-        print(f"Error in create_travel_plan: {str(e)}")
+        logger.exception(f"Error in create_travel_plan: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
                            detail="An error occurred while generating the travel plan. Please try again later.")
 
+@travel_router.post("/plan/grounded", status_code=status.HTTP_200_OK)
+async def create_grounded_travel_plan(
+    request: GroundedPlanRequest,
+    timeout: float = Depends(request_timeout),
+    llm_service: LLMService = Depends(get_llm_service),
+    plan_sessions: PlanSessionStore = Depends(get_plan_sessions),
+    plan_store: PlanStore = Depends(get_plan_store),
+    mcp_gateway: MCPGateway = Depends(get_mcp_gateway),
+    llm_metrics: LLMCallMetrics = Depends(get_llm_metrics)
+):
+    """Plan a trip with hotels and transport looked up through the MCP tools, streaming progress.
+
+    The response is NDJSON: a line for each model turn, tool call and tool
+    result as it happens, then a `plan` line with the plan, its id and the
+    usage of all turns, or an `error` line with a status and detail.
+    """
+    try:
+        # Validate inputs
+        if request.duration <= 0:
+            raise ValueError("Duration must be greater than 0 days")
+
+        if not request.destination or len(request.destination.strip()) == 0:
+            raise ValueError("Destination cannot be empty")
+
+        if request.guests <= 0:
+            raise ValueError("Guests must be at least 1")
+
+        try:
+            datetime.date.fromisoformat(request.start_date)
+        except ValueError:
+            raise ValueError("Start date must be in YYYY-MM-DD format")
+
+        # The same request to the same model is answered from the store
+        model = llm_service.model_name(request.llm_provider, request.llm_model)
+        plan_id = plan_key(request.model_dump(), model)
+        stored = plan_store.load(plan_id)
+        tools = [] if stored is not None else await mcp_gateway.tools("transport-hotels", list(PLANNING_TOOLS))
+        if stored is None and not tools:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="The travel search tools are unavailable. Please try again later.")
+    except ValueError as e:
+        # Client error - bad input
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except HTTPException as e:
+        # Re-raise HTTP exceptions as-is
+        raise e
+    except Exception as e:
+        # Server error - log and return generic error
+        logger.exception(f"Error in create_grounded_travel_plan: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                           detail="An error occurred while generating the travel plan. Please try again later.")
+
+    async def call_tool(name: str, arguments: Dict[str, Any]) -> str:
+        if name not in PLANNING_TOOLS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown tool: {name}")
+        result = json.dumps(await mcp_gateway.call(PLANNING_TOOLS[name], name, arguments,
+                                                 cache=name in CACHED_PLANNING_TOOLS),
+                            separators=(",", ":"))
+        if len(result) > TOOL_RESULT_MAX_CHARS:
+            result = result[:TOOL_RESULT_MAX_CHARS] + " ... (cut; narrow the search or lower its limit for more)"
+        return result
+
+    def generate(messages: List[Dict[str, str]]) -> Awaitable[Completion]:
+        return llm_service.generate_with_tools(
+            messages, request.llm_provider, tools, call_tool,
+            max_turns=TOOL_PLAN_MAX_TURNS, max_tokens=TOOL_PLAN_MAX_TOKENS,
+            max_calls_per_turn=TOOL_PLAN_MAX_CALLS_PER_TURN, on_event=events.put_nowait, model=model,
+        )
+
+    events: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    work = None if stored is not None else _generate_plan(
+        request.model_dump(exclude={"llm_provider", "llm_model"}), request.llm_provider, model, plan_id,
+        llm_service, plan_sessions, plan_store, generate=generate)
+    return StreamingResponse(_plan_events(work, stored, events, timeout, llm_metrics),
+                             media_type="application/x-ndjson")
+
+async def _plan_events(work: Optional[Awaitable], stored: Optional[Dict[str, Any]],
+                       events: "asyncio.Queue[Dict[str, Any]]", timeout: float,
+                       llm_metrics: LLMCallMetrics) -> AsyncIterator[str]:
+    """NDJSON lines for a streamed plan: the events `work` queues, then its plan or an error."""
+    def line(event: Dict[str, Any]) -> str:
+        return json.dumps(event) + "\n"
+
+    if stored is not None:
+        yield line({"event": "plan", **_stored_plan_response(stored)})
+        return
+
+    task, deadline = start_with_deadline(work, timeout)
+    try:
+        while True:
+            next_event = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait({next_event, task}, timeout=max(0.0, deadline - time.monotonic()),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if next_event in done:
+                yield line(next_event.result())
+                continue
+            next_event.cancel()
+            if task in done:
+                while not events.empty():
+                    yield line(events.get_nowait())
+                stored, completion = task.result()
+                yield line({"event": "plan", "plan": stored["plan"], "plan_id": stored["plan_id"],
+                            "usage": completion.usage()})
+                return
+            llm_metrics.deadlines_exceeded += 1
+            yield line({"event": "error", "status": status.HTTP_504_GATEWAY_TIMEOUT,
+                        "detail": "The request deadline passed before the plan was finished"})
+            return
+    except HTTPException as e:
+        yield line({"event": "error", "status": e.status_code, "detail": e.detail})
+    except asyncio.CancelledError:
+        # A streaming response is cancelled when its client disconnects
+        llm_metrics.client_disconnects += 1
+        raise
+    except Exception as e:
+        logger.exception(f"Error in create_grounded_travel_plan: {str(e)}")
+        yield line({"event": "error", "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    "detail": "An error occurred while generating the travel plan. Please try again later."})
+    finally:
+        if not task.done():
+            # Cancels the model call or tool calls in progress
+            task.cancel()
+            await asyncio.wait({task})
+            if not task.cancelled():
+                task.exception()
+
+@travel_router.get("/plan/{plan_id}", status_code=status.HTTP_200_OK)
+def get_travel_plan(
+    plan_id: str,
+    accept_encoding: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    plan_store: PlanStore = Depends(get_plan_store)
+):
+    # A plan id names immutable content, so it is the ETag and the plan may be cached indefinitely
+    etag = f'"{plan_id}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept-Encoding"}
+    compressed = plan_store.load_compressed(plan_id)
+    if compressed is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found.")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    encoding = _preferred_encoding(accept_encoding or "", ["br", "gzip"] if brotli else ["gzip"])
+    if encoding == "br":
+        body = plan_store.load_brotli(plan_id, compressed)
+    elif encoding == "gzip":
+        body = compressed
+    else:
+        body = gzip.decompress(compressed)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as If-None-Match requires
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+def _preferred_encoding(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """The available content coding the client weights highest (None for identity), ties going to `available` order."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding.strip():
+            weights[coding.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+@travel_router.post("/plan/{plan_id}/refine", status_code=status.HTTP_200_OK)
+async def refine_travel_plan(
+    plan_id: str,
+    request: PlanRefinementRequest,
+    http_request: Request,
+    timeout: float = Depends(request_timeout),
+    llm_service: LLMService = Depends(get_llm_service),
+    plan_sessions: PlanSessionStore = Depends(get_plan_sessions),
+    plan_store: PlanStore = Depends(get_plan_store)
+):
+    try:
+        if not request.instruction or len(request.instruction.strip()) == 0:
+            raise ValueError("Instruction cannot be empty")
+
+        parent = _plan_session(plan_id, plan_sessions, plan_store)
+        if parent is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail="Plan not found. Please create a new plan.")
+        if parent.revision >= MAX_PLAN_REVISIONS:
+            raise ValueError(f"A plan can be refined at most {MAX_PLAN_REVISIONS} times. Please create a new plan.")
+
+        # The same refinement of the same plan is answered from the store
+        model = parent.model or llm_service.model_name(parent.provider)
+        refined_id = refinement_key(parent.plan_id, request.instruction, model)
+        stored = plan_store.load(refined_id)
+        if stored is not None:
+            return _stored_plan_response(stored)
+
+        # The planning prompt and the original plan are the cached prefix; only the
+        # refinements after it are new input
+        messages = parent.messages + [{"role": "user", "content": _refinement_prompt(request.instruction)}]
+        session = PlanSession(plan_id=refined_id, provider=parent.provider, messages=messages, model=model,
+                              parent_id=parent.plan_id, revision=parent.revision + 1, cache=dict(parent.cache))
+        completion = await run_with_deadline(
+            http_request,
+            llm_service.generate_conversation(messages, parent.provider, session.cache, cache_prefix=2, model=model),
+            timeout,
+        )
+        stored = plan_store.save({
+            "plan_id": refined_id,
+            "parent_id": parent.plan_id,
+            "revision": session.revision,
+            "provider": parent.provider,
+            "model": model,
+            "instruction": request.instruction,
+            "plan": completion.text,
+        })
+        session.messages = messages + [{"role": "assistant", "content": stored["plan"]}]
+        plan_sessions.add(session)
+        return {
+            "plan": stored["plan"],
+            "plan_id": refined_id,
+            "parent_id": parent.plan_id,
+            "revision": session.revision,
+            "usage": completion.usage(),
+        }
+    except ValueError as e:
+        # Client error - bad input
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except HTTPException as e:
+        # Re-raise HTTP exceptions as-is
+        raise e
+    except Exception as e:
+        # Server error - log and return generic error
+        logger.exception(f"Error in refine_travel_plan: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                           detail="An error occurred while refining the travel plan. Please try again later.")
+
 @travel_router.post("/recommend", status_code=status.HTTP_200_OK)
 async def get_destination_recommendations(
     request: RecommendationRequest, 
-    llm_service: LLMService = Depends(get_llm_service)
+    http_request: Request,
+    timeout: float = Depends(request_timeout),
+    llm_service: LLMService = Depends(get_llm_service),
+    recommendation_cache: SemanticRecommendationCache = Depends(get_recommendation_cache)
 ):
     try:
         # Validate inputs
         if not request.interests or len(request.interests) == 0:
             raise ValueError("At least one interest must be provided")
         
+        # A request worded like an earlier one (same model, budget, season and history) gets its answer
+        model = llm_service.model_name(request.llm_provider, request.llm_model)
+        cached, similarity = recommendation_cache.similar(request.model_dump(), model)
+        if cached is not None:
+            return {"recommendations": cached, "cached": True, "similarity": round(similarity, 3)}
+        
         prompt = f"""
         Recommend 5 travel destinations based on the following information:
         Current location: {request.current_location}
@@ -92,7 +509,10 @@ async def get_destination_recommendations(
         Format as a structured list with clear sections for each destination.
         """
         
-        response = await llm_service.generate_completion(prompt, request.llm_provider)
+        response = await run_with_deadline(
+            http_request, llm_service.generate_completion(prompt, request.llm_provider, request.llm_model), timeout
+        )
+        recommendation_cache.add(request.model_dump(), model, response)
         return {"recommendations": response}
     except ValueError as e:
         # Client error - bad input
@@ -102,6 +522,21 @@ async def get_destination_recommendations(
         raise e
     except Exception as e:
         # Server error - log and return generic error
-        print(f"Error in get_destination_recommendations: {str(e)}")
+        logger.exception(f"Error in get_destination_recommendations: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
-                           detail="An error occurred while generating recommendations. Please try again later.") 
\ No newline at end of file
+                           detail="An error occurred while generating recommendations. Please try again later.") 
+
+@travel_router.get("/metrics", status_code=status.HTTP_200_OK)
+async def get_metrics(
+    llm_service: LLMService = Depends(get_llm_service),
+    llm_metrics: LLMCallMetrics = Depends(get_llm_metrics),
+    mcp_gateway: MCPGateway = Depends(get_mcp_gateway),
+    recommendation_cache: SemanticRecommendationCache = Depends(get_recommendation_cache)
+):
+    return {
+        "llm": llm_metrics.snapshot(),
+        "ollama_nodes": llm_service.ollama_pool.stats(),
+        "mcp": mcp_gateway.stats(),
+        "recommendation_cache": recommendation_cache.stats(),
+        "dropped_log_records": dropped_records(),
+    }
@@ -0,0 +1,142 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from .mcp_gateway import get_mcp_gateway, MCPGateway
+
+logger = logging.getLogger(__name__)
+
+services_router = APIRouter(tags=["Travel services"])
+
+class TransportReservationRequest(BaseModel):
+    transport_id: str
+    passenger_name: str
+    email: str
+    seats: int = 1
+
+class HotelReservationRequest(BaseModel):
+    hotel_id: str
+    guest_name: str
+    email: str
+    rooms: int = 1
+
+class ItineraryEmailRequest(BaseModel):
+    recipient_email: str
+    recipient_name: str
+    itinerary_text: str
+    booking_details: Optional[str] = None
+
+async def _call_tool(gateway: MCPGateway, server: str, tool: str, arguments: Dict[str, Any], cache: bool = False,
+                     error_status: int = status.HTTP_400_BAD_REQUEST) -> JSONResponse:
+    """Proxy one tool call; a `{"success": false}` result becomes an `error_status` error."""
+    try:
+        result = await gateway.call(server, tool, arguments, cache=cache)
+        if isinstance(result, dict) and result.get("success") is False:
+            raise HTTPException(status_code=error_status, detail=result.get("error", f"{tool} failed"))
+        # Already plain JSON, so skip FastAPI's encoding pass
+        return JSONResponse(content=result)
+    except HTTPException as e:
+        # Re-raise HTTP exceptions as-is
+        raise e
+    except Exception as e:
+        # Server error - log and return generic error
+        logger.exception(f"Error calling {server}/{tool}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail="An error occurred while contacting the travel services. Please try again later.")
+
+# Searches register the options they return on the server, which may
+# forget them, so they always reach it; fare calendars and details change
+# nothing and are cached
+
+@services_router.get("/search/flights", status_code=status.HTTP_200_OK)
+async def search_flights(origin: str, destination: str, date: str,
+                         gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "search_flights",
+                            {"origin": origin, "destination": destination, "date": date})
+
+@services_router.get("/search/trains", status_code=status.HTTP_200_OK)
+async def search_trains(origin: str, destination: str, date: str,
+                        gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "search_trains",
+                            {"origin": origin, "destination": destination, "date": date})
+
+@services_router.get("/search/buses", status_code=status.HTTP_200_OK)
+async def search_buses(origin: str, destination: str, date: str,
+                       gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "search_buses",
+                            {"origin": origin, "destination": destination, "date": date})
+
+@services_router.get("/search/flexible-dates", status_code=status.HTTP_200_OK)
+async def search_flexible_dates(origin: str, destination: str, start_date: str, end_date: str,
+                                transport_types: str = "flight,train,bus",
+                                gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "search_flexible_dates", {
+        "origin": origin, "destination": destination, "start_date": start_date, "end_date": end_date,
+        "transport_types": transport_types,
+    }, cache=True)
+
+@services_router.get("/search/hotels", status_code=status.HTTP_200_OK)
+async def search_hotels(city: str, check_in: str, check_out: str, guests: int = 1, max_price: Optional[int] = None,
+                        min_stars: Optional[int] = None, min_rating: Optional[float] = None,
+                        amenities: Optional[str] = None, sort_by: str = "price", limit: int = 10,
+                        gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "search_hotels", {
+        "city": city, "check_in": check_in, "check_out": check_out, "guests": guests, "max_price": max_price,
+        "min_stars": min_stars, "min_rating": min_rating, "amenities": amenities, "sort_by": sort_by,
+        "limit": limit,
+    })
+
+@services_router.get("/hotels/calendar", status_code=status.HTTP_200_OK)
+async def hotel_availability_calendar(city: str, month: str, nights: int = 1, guests: int = 1, rooms: int = 1,
+                                      hotel_id: Optional[str] = None, min_stars: Optional[int] = None,
+                                      limit: int = 5, gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "hotel_availability_calendar", {
+        "city": city, "month": month, "nights": nights, "guests": guests, "rooms": rooms, "hotel_id": hotel_id,
+        "min_stars": min_stars, "limit": limit,
+    })
+
+@services_router.get("/hotels/{hotel_id}", status_code=status.HTTP_200_OK)
+async def get_hotel_details(hotel_id: str, gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "get_hotel_details", {"hotel_id": hotel_id}, cache=True)
+
+@services_router.get("/transport/{transport_id}", status_code=status.HTTP_200_OK)
+async def get_transport_details(transport_id: str, gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "get_transport_details", {"transport_id": transport_id},
+                            cache=True)
+
+# Reservations, payments and emails change or report state, so they always reach the server
+
+@services_router.post("/reservations/transport", status_code=status.HTTP_200_OK)
+async def reserve_transport(request: TransportReservationRequest, gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "reserve_transport", request.model_dump(),
+                            error_status=status.HTTP_409_CONFLICT)
+
+@services_router.post("/reservations/hotel", status_code=status.HTTP_200_OK)
+async def reserve_hotel(request: HotelReservationRequest, gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "reserve_hotel", request.model_dump(),
+                            error_status=status.HTTP_409_CONFLICT)
+
+@services_router.get("/reservations/{reservation_id}", status_code=status.HTTP_200_OK)
+async def get_reservation_status(reservation_id: str, gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "get_reservation_status",
+                            {"reservation_id": reservation_id}, error_status=status.HTTP_404_NOT_FOUND)
+
+@services_router.delete("/reservations/{reservation_id}", status_code=status.HTTP_200_OK)
+async def cancel_reservation(reservation_id: str, gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "transport-hotels", "cancel_reservation", {"reservation_id": reservation_id},
+                            error_status=status.HTTP_409_CONFLICT)
+
+@services_router.get("/payments/{payment_id}", status_code=status.HTTP_200_OK)
+async def get_payment_status(payment_id: str, gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "payment", "get_payment_status", {"payment_id": payment_id},
+                            error_status=status.HTTP_404_NOT_FOUND)
+
+@services_router.post("/emails/itinerary", status_code=status.HTTP_200_OK)
+async def send_itinerary_email(request: ItineraryEmailRequest, gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "email-service", "send_itinerary_email", request.model_dump())
+
+@services_router.get("/emails/{email_id}", status_code=status.HTTP_200_OK)
+async def check_email_status(email_id: str, gateway: MCPGateway = Depends(get_mcp_gateway)):
+    return await _call_tool(gateway, "email-service", "check_email_status", {"email_id": email_id},
+                            error_status=status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,65 @@
+import gzip
+import json
+
+import pytest
+
+from api.plan_store import PlanStore, brotli, plan_key, refinement_key
+
+REQUEST = {"destination": "Paris", "duration": 3, "budget": "Medium", "interests": ["food", "art"],
+           "travel_style": "Relaxed", "llm_provider": "gemini"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PlanStore(str(tmp_path))
+
+
+def test_plan_key_ignores_case_spacing_and_interest_order():
+    same = dict(REQUEST, destination="  paris ", interests=["Art", "food", "art"], budget="medium")
+    assert plan_key(same, "model-a") == plan_key(REQUEST, "model-a")
+    assert plan_key(REQUEST, "model-b") != plan_key(REQUEST, "model-a")
+    assert plan_key(dict(REQUEST, duration=4), "model-a") != plan_key(REQUEST, "model-a")
+
+
+def test_grounded_request_is_a_different_plan():
+    grounded = dict(REQUEST, start_date="2026-11-02", origin="London")
+    assert plan_key(grounded, "model-a") != plan_key(REQUEST, "model-a")
+    assert plan_key(dict(grounded, guests=1), "model-a") == plan_key(grounded, "model-a")
+    assert plan_key(dict(grounded, guests=2), "model-a") != plan_key(grounded, "model-a")
+
+
+def test_refinement_key_normalizes_the_instruction():
+    parent = plan_key(REQUEST, "model-a")
+    assert refinement_key(parent, "More  Museums", "model-a") == refinement_key(parent, "more museums", "model-a")
+    assert refinement_key(parent, "more museums", "model-a") != refinement_key(parent, "fewer museums", "model-a")
+
+
+def test_saved_plan_loads_and_stored_bytes_are_the_gzip_body(store):
+    plan_id = plan_key(REQUEST, "model-a")
+    saved = store.save({"plan_id": plan_id, "plan": "Day 1: Louvre"})
+    assert saved["created_at"]
+    assert store.load(plan_id) == saved
+    assert json.loads(gzip.decompress(store.load_compressed(plan_id))) == saved
+
+
+def test_first_saved_plan_wins(store):
+    plan_id = plan_key(REQUEST, "model-a")
+    first = store.save({"plan_id": plan_id, "plan": "first"})
+    assert store.save({"plan_id": plan_id, "plan": "second"}) == first
+    assert store.load(plan_id)["plan"] == "first"
+
+
+def test_unknown_or_malformed_ids_are_not_found(store):
+    assert store.load("0" * 32) is None
+    assert store.load("../../etc/passwd") is None
+    assert store.load_compressed("A" * 32) is None
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+def test_brotli_body_is_kept_beside_the_plan(store):
+    plan_id = plan_key(REQUEST, "model-a")
+    store.save({"plan_id": plan_id, "plan": "Day 1: Louvre"})
+    compressed = store.load_compressed(plan_id)
+    encoded = store.load_brotli(plan_id, compressed)
+    assert brotli.decompress(encoded) == gzip.decompress(compressed)
+    assert store.load_brotli(plan_id, compressed) == encoded
@@ -0,0 +1,153 @@
+"""Benchmark for the per-request cost of request logging on the event loop.
+
+Sends N requests through RequestLoggingMiddleware around a trivial ASGI app,
+one after another on an asyncio loop, with the log written to a file in four
+ways: a plain text StreamHandler as logging.basicConfig sets up, JSON lines
+written synchronously, and the queue pipeline from api/logging_config.py
+keeping every success log or a sampled share of them. Each request also logs
+one LLM-call record, as a planning request does. The overhead is the
+per-request latency over the same app without the middleware; --slow-disk-ms
+adds a delay to every file write, to show what a slow or busy disk costs the
+event loop.
+
+Usage:
+    python benchmarks/bench_logging.py --requests 20000 --sample-rate 0.1
+    python benchmarks/bench_logging.py --requests 2000 --slow-disk-ms 1
+"""
+import argparse
+import asyncio
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import api.logging_config as logging_config  # noqa: E402
+from api.logging_config import (  # noqa: E402
+    DroppingQueueHandler,
+    JsonFormatter,
+    RequestContextFilter,
+    RequestLoggingMiddleware,
+    sample_success,
+)
+
+# Before skip_record_details changes it
+STOCK_SRCFILE = logging._srcfile
+
+
+class SlowFileHandler(logging.FileHandler):
+    """A file handler whose writes take at least `delay` seconds."""
+
+    def __init__(self, path: str, delay: float):
+        super().__init__(path, encoding="utf-8")
+        self.delay = delay
+
+    def emit(self, record):
+        super().emit(record)
+        if self.delay:
+            time.sleep(self.delay)
+
+
+async def app(scope, receive, send):
+    if sample_success():
+        logging.getLogger("api.llm_service").info("claude call finished", extra={
+            "provider": "claude", "duration_ms": 812.4, "input_tokens": 250, "output_tokens": 1800})
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def drive(handler, requests: int):
+    scope = {"type": "http", "method": "POST", "path": "/api/plan", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await handler(scope, receive, send)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def configure(kind: str, path: str, delay: float, sample_rate: float):
+    """Point the root logger at `path` the way `kind` does; returns a function that undoes it."""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    sink = SlowFileHandler(path, delay)
+    # Stock record details and no sampling, except for the pipeline's own settings
+    logging.logProcesses = logging.logMultiprocessing = logging.logThreads = True
+    logging._srcfile = STOCK_SRCFILE
+    logging_config.set_success_sample_rate(1.0)
+
+    if kind == "basicConfig text":
+        sink.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        root.addHandler(sink)
+        return lambda: (root.removeHandler(sink), sink.close())
+    if kind == "sync JSON":
+        sink.setFormatter(JsonFormatter())
+        sink.addFilter(RequestContextFilter())
+        root.addHandler(sink)
+        return lambda: (root.removeHandler(sink), sink.close())
+
+    sink.setFormatter(JsonFormatter())
+    logging_config.skip_record_details()
+    if kind != "queue JSON":
+        logging_config.set_success_sample_rate(sample_rate)
+    handler = DroppingQueueHandler(queue.Queue(maxsize=10000))
+    handler.addFilter(RequestContextFilter())
+    root.addHandler(handler)
+    listener = logging.handlers.QueueListener(handler.queue, sink)
+    listener.start()
+
+    def undo():
+        root.removeHandler(handler)
+        listener.stop()
+        sink.close()
+        if handler.dropped:
+            print(f"    ({handler.dropped:,} records dropped with the queue full)")
+    return undo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="share of success logs kept when sampling")
+    parser.add_argument("--slow-disk-ms", type=float, default=0.0, help="extra milliseconds per file write")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    baseline = asyncio.run(drive(app, args.requests))
+    base_p50 = statistics.median(baseline)
+    print(f"{args.requests:,} requests, {args.slow_disk_ms} ms extra per file write")
+    print(f"  {'no request logging':<30} p50 {base_p50 * 1e6:>8,.1f} us")
+
+    kinds = ["basicConfig text", "sync JSON", "queue JSON", f"queue JSON, {args.sample_rate:.0%} sampled"]
+    for number, kind in enumerate(kinds):
+        path = os.path.join(directory, f"log{number}.jsonl")
+        undo = configure(kind, path, args.slow_disk_ms / 1000, args.sample_rate)
+        start = time.perf_counter()
+        latencies = sorted(asyncio.run(drive(RequestLoggingMiddleware(app), args.requests)))
+        on_loop = time.perf_counter() - start
+        undo()
+        with open(path, encoding="utf-8") as file:
+            lines = sum(1 for _ in file)
+        overhead = statistics.median(latencies) - base_p50
+        print(f"  {kind:<30} p50 {statistics.median(latencies) * 1e6:>8,.1f} us   "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e6:>9,.1f} us   "
+              f"overhead {overhead * 1e6:>7,.1f} us/request   "
+              f"{args.requests / on_loop:>9,.0f} req/s   {lines:,} lines written")
+
+
+if __name__ == "__main__":
+    main()
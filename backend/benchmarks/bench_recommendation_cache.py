@@ -0,0 +1,155 @@
+"""Precision/recall and lookup cost of the semantic recommendation cache.
+
+Generates pairs of recommendation requests: paraphrases of the same request
+(interests reworded with synonyms and with phrases the synonym table does
+not know, typos, filler words and a different order; the location re-cased or
+respaced), which should share an answer, and near misses (one interest
+replaced, added or dropped, another city, or the same city with or without a
+country), which should not. For a
+range of thresholds it reports the precision and recall of treating a pair
+as a cache hit, then times lookups in a full cache and reports its memory.
+
+Usage:
+    python benchmarks/bench_recommendation_cache.py --pairs 4000
+    python benchmarks/bench_recommendation_cache.py --entries 20000 --lookups 5000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from api.recommendation_cache import SemanticRecommendationCache  # noqa: E402
+
+# Ways a client may write each interest; some ("long walks", "photo spots") are not in the synonym table
+INTERESTS = {
+    "beach": ["beaches", "beach", "seaside", "the coast", "sandy beaches", "sunbathing"],
+    "food": ["food", "cuisine", "local food", "gastronomy", "restaurants", "local dishes"],
+    "hiking": ["hiking", "trekking", "hiking trails", "hikes", "long walks"],
+    "museum": ["museums", "art galleries", "museum", "exhibitions"],
+    "history": ["history", "historical sites", "ancient ruins", "heritage", "old towns"],
+    "nightlife": ["nightlife", "bars", "clubs", "night life", "partying"],
+    "nature": ["nature", "wildlife", "national parks", "outdoors", "the countryside"],
+    "mountain": ["mountains", "the alps", "mountain views", "alpine scenery"],
+    "ski": ["skiing", "snowboarding", "ski", "winter sports"],
+    "diving": ["diving", "scuba diving", "snorkeling", "coral reefs"],
+    "relaxation": ["relaxation", "spa", "wellness", "relaxing"],
+    "culture": ["culture", "local culture", "traditions", "cultural experiences"],
+    "shopping": ["shopping", "markets", "boutiques", "flea markets"],
+    "wine": ["wine", "wine tasting", "vineyards", "wineries"],
+    "music": ["music", "live music", "concerts", "festivals"],
+    "architecture": ["architecture", "cathedrals", "old buildings"],
+    "photography": ["photography", "photo spots", "taking pictures"],
+}
+LOCATIONS = ["Paris", "London", "New York", "Tokyo", "Berlin", "Madrid", "Sydney", "Toronto", "Chicago", "Rome",
+             "San Francisco", "Mexico City", "Cape Town", "Buenos Aires", "Seoul", "Mumbai"]
+COUNTRIES = {"Paris": "France", "London": "UK", "New York": "USA", "Tokyo": "Japan", "Berlin": "Germany",
+             "Madrid": "Spain", "Sydney": "Australia", "Toronto": "Canada", "Chicago": "USA", "Rome": "Italy",
+             "San Francisco": "USA", "Mexico City": "Mexico", "Cape Town": "South Africa",
+             "Buenos Aires": "Argentina", "Seoul": "South Korea", "Mumbai": "India"}
+FILLERS = ["", "", "", "lots of ", "I love ", "good ", "great "]
+
+
+def typo(rng, text):
+    if len(text) < 5:
+        return text
+    position = rng.randrange(1, len(text) - 2)
+    return text[:position] + text[position + 1] + text[position] + text[position + 2:]
+
+
+def word(rng, concept, typos):
+    text = rng.choice(FILLERS) + rng.choice(INTERESTS[concept])
+    return typo(rng, text) if rng.random() < typos else text
+
+
+def location(rng, city, country):
+    variants = [city, city.lower(), city.upper(), f" {city} "]
+    return rng.choice([f"{variant}, {country}" for variant in variants] if country else variants)
+
+
+def request(rng, concepts, city, typos, country=None):
+    interests = [word(rng, concept, typos) for concept in concepts]
+    rng.shuffle(interests)
+    return {"interests": interests, "current_location": location(rng, city, country), "llm_provider": "gemini",
+            "budget": "Moderate", "season": "Summer"}
+
+
+def make_pairs(rng, count, typos):
+    """(first, second, same) pairs, half paraphrases and half near misses."""
+    pairs = []
+    concepts = list(INTERESTS)
+    for number in range(count):
+        chosen = rng.sample(concepts, rng.randint(1, 4))
+        city = rng.choice(LOCATIONS)
+        country = rng.choice([None, COUNTRIES[city]])
+        first = request(rng, chosen, city, typos, country)
+        if number % 2 == 0:
+            pairs.append((first, request(rng, chosen, city, typos, country), True))
+            continue
+        other, other_city, other_country = list(chosen), city, country
+        change = rng.choice(["replace", "add", "drop", "location", "country"])
+        if change == "drop" and len(other) == 1:
+            change = "add"
+        if change == "replace":
+            other[rng.randrange(len(other))] = rng.choice([concept for concept in concepts if concept not in other])
+        elif change == "add":
+            other.append(rng.choice([concept for concept in concepts if concept not in other]))
+        elif change == "drop":
+            other.pop(rng.randrange(len(other)))
+        elif change == "location":
+            other_city = rng.choice([place for place in LOCATIONS if place != city])
+        else:
+            other_country = None if country else COUNTRIES[city]
+        pairs.append((first, request(rng, other, other_city, typos, other_country), False))
+    return pairs
+
+
+def similarity(first, second):
+    cache = SemanticRecommendationCache(max_entries=1, threshold=-1.0)
+    cache.add(first, "model", "cached")
+    return cache.similar(second, "model")[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=4000)
+    parser.add_argument("--typos", type=float, default=0.1, help="share of interests written with a typo")
+    parser.add_argument("--entries", type=int, default=5000, help="cache size for the lookup timing")
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(11)
+
+    scored = [(similarity(first, second), same) for first, second, same in make_pairs(rng, args.pairs, args.typos)]
+    positives = sum(1 for _, same in scored if same)
+    print(f"{len(scored):,} pairs ({positives:,} paraphrases), {args.typos:.0%} of interests with a typo")
+    print(f"  {'threshold':>9} {'precision':>10} {'recall':>8} {'wrong hits':>11}")
+    for threshold in (0.6, 0.7, 0.8, 0.85, 0.9, 0.92, 0.94, 0.96, 0.99):
+        hits = [same for score, same in scored if score >= threshold]
+        correct = sum(hits)
+        precision = correct / len(hits) if hits else 1.0
+        print(f"  {threshold:>9.2f} {precision:>10.1%} {correct / positives:>8.1%} {len(hits) - correct:>11,}")
+
+    cache = SemanticRecommendationCache(max_entries=args.entries)
+    for _ in range(args.entries):
+        cache.add(request(rng, rng.sample(list(INTERESTS), rng.randint(1, 4)), rng.choice(LOCATIONS), 0.0),
+                  "model", "x" * 4000)
+    queries = [request(rng, rng.sample(list(INTERESTS), rng.randint(1, 4)), rng.choice(LOCATIONS), args.typos)
+               for _ in range(args.lookups)]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        cache.similar(query, "model")
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    index_bytes = sum(array.nbytes for array in (cache._interests, cache._locations, cache._scopes,
+                                                  cache._created, cache._last_used))
+    print(f"{args.entries:,} cached entries: lookup p50 {statistics.median(timings) * 1e6:,.0f} us, "
+          f"p99 {timings[int(len(timings) * 0.99) - 1] * 1e6:,.0f} us; index {index_bytes / 2 ** 20:.1f} MiB "
+          f"plus the cached answers, hit rate {cache.stats()['hits'] / args.lookups:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,41 @@
 import os
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from dotenv import load_dotenv
-from api.routes import travel_router
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Load environment variables before the api modules read their settings
+load_dotenv()
+
+from api.llm_service import get_llm_service
+from api.logging_config import configure_logging, shutdown_logging, RequestLoggingMiddleware
+from api.mcp_gateway import get_mcp_gateway
+from api.prewarm import get_plan_prewarmer
+from api.routes import prewarm_plan, travel_router
+from api.service_routes import services_router
+
+# Configure logging: JSON records written by a background thread, off the event loop
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the Ollama models loaded on every server
+    get_llm_service().ollama_pool.start()
+    # Regenerate trending plans off-peak, if PREWARM_WINDOW is set
+    get_plan_prewarmer().start(prewarm_plan)
+    # One long-lived session per MCP tool server, shared by all requests
+    get_mcp_gateway().start()
+    yield
+    await get_mcp_gateway().stop()
+    await get_plan_prewarmer().stop()
+    await get_llm_service().ollama_pool.stop()
+    shutdown_logging()
 
-app = FastAPI(title="Travel Planner API")
+app = FastAPI(title="Travel Planner API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -26,8 +44,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Request ids and request logs; added last so it wraps everything else
+app.add_middleware(RequestLoggingMiddleware)
+
 # Exception handlers
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -54,6 +76,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 # Include routers
 app.include_router(travel_router, prefix="/api")
+app.include_router(services_router, prefix="/api")
 
 @app.get("/")
 async def root():
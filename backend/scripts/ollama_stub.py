@@ -0,0 +1,153 @@
+"""Stub Ollama servers for trying the Ollama pool without a model.
+
+Starts one stub per port. Each answers POST /api/generate like Ollama with
+stream disabled: after --latency seconds, plus --load-seconds when the
+requested model is not loaded, it returns a canned plan naming the port, a
+growing context and token counts. A model stays loaded for the request's
+keep_alive ("30m", "90s", "-1" for ever, "0" to unload), and a request
+without a prompt only loads the model, as Ollama does. Every few seconds
+each stub prints the requests it served, the most it ran at once and the
+models it has loaded.
+
+Usage:
+    python scripts/ollama_stub.py --ports 11501 11502 --latency 2 --load-seconds 5
+    OLLAMA_BASE_URLS=http://localhost:11501,http://localhost:11502 uvicorn main:app
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def keep_alive_seconds(value) -> float:
+    """Seconds for an Ollama keep_alive value: a number of seconds or a duration such as "30m"; negative is for ever."""
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = re.fullmatch(r"(-?\d+(?:\.\d+)?)([smh]?)", str(value).strip())
+        if not match:
+            raise ValueError(f"Invalid keep_alive: {value!r}")
+        seconds = float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+class StubState:
+    def __init__(self, port: int, latency: float, load_seconds: float):
+        self.port = port
+        self.latency = latency
+        self.load_seconds = load_seconds
+        self.lock = threading.Lock()
+        self.loaded = {}  # model -> time it unloads
+        self.active = 0
+        self.most_active = 0
+        self.served = 0
+
+    def load(self, model: str, keep_alive) -> bool:
+        """Mark `model` loaded for `keep_alive`; returns whether it was loaded already."""
+        now = time.monotonic()
+        with self.lock:
+            was_loaded = self.loaded.get(model, 0) > now
+            self.loaded[model] = now + keep_alive_seconds(keep_alive)
+        return was_loaded
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, body: dict):
+            encoded = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def do_GET(self):
+            if self.path == "/api/ps":
+                now = time.monotonic()
+                with state.lock:
+                    models = [model for model, until in state.loaded.items() if until > now]
+                self._reply(200, {"models": [{"name": model} for model in models]})
+            else:
+                self._reply(200, {"status": "Ollama is running"})
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self._reply(404, {"error": "not found"})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = request.get("model")
+            if not model:
+                self._reply(400, {"error": "model is required"})
+                return
+            keep_alive = request.get("keep_alive", "5m")
+
+            if not request.get("prompt"):
+                # Load (or, with keep_alive 0, unload) the model without generating
+                if not state.load(model, keep_alive):
+                    time.sleep(state.load_seconds)
+                self._reply(200, {"model": model, "response": "", "done": True, "done_reason": "load"})
+                return
+
+            with state.lock:
+                state.active += 1
+                state.most_active = max(state.most_active, state.active)
+            try:
+                started = time.monotonic()
+                if not state.load(model, keep_alive):
+                    time.sleep(state.load_seconds)
+                time.sleep(state.latency)
+                prompt_tokens = len(request["prompt"].split())
+                context = list(request.get("context") or []) + list(range(prompt_tokens + 50))
+                self._reply(200, {
+                    "model": model,
+                    "response": f"# Plan from stub {state.port}\n\nDay 1: arrive and explore.",
+                    "done": True,
+                    "context": context,
+                    "prompt_eval_count": prompt_tokens,
+                    "eval_count": 50,
+                    "total_duration": int((time.monotonic() - started) * 1e9),
+                })
+            finally:
+                with state.lock:
+                    state.active -= 1
+                    state.served += 1
+
+    return Handler
+
+
+def report(states, interval: float):
+    while True:
+        time.sleep(interval)
+        now = time.monotonic()
+        for state in states:
+            with state.lock:
+                loaded = sorted(model for model, until in state.loaded.items() if until > now)
+                print(f"stub {state.port}: served {state.served}, most at once {state.most_active}, "
+                      f"loaded {loaded}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ports", type=int, nargs="+", default=[11501, 11502])
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per generate request")
+    parser.add_argument("--load-seconds", type=float, default=3.0, help="extra seconds when the model is not loaded")
+    parser.add_argument("--report-seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    states = []
+    for port in args.ports:
+        state = StubState(port, args.latency, args.load_seconds)
+        server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        states.append(state)
+        print(f"Stub Ollama listening on http://127.0.0.1:{port}", flush=True)
+    report(states, args.report_seconds)
+
+
+if __name__ == "__main__":
+    main()
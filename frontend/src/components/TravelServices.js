@@ -23,6 +23,9 @@ import {
   Alert,
   ToggleButtonGroup,
   ToggleButton,
+  TextField,
+  MenuItem,
+  CircularProgress,
 } from '@mui/material';
 import FlightIcon from '@mui/icons-material/Flight';
 import HotelIcon from '@mui/icons-material/Hotel';
@@ -40,12 +43,50 @@ import MailOutlineIcon from '@mui/icons-material/MailOutline';
 import ConfirmationNumberIcon from '@mui/icons-material/ConfirmationNumber';
 import HelpOutlineIcon from '@mui/icons-material/HelpOutline';
 import SmartToyIcon from '@mui/icons-material/SmartToy';
+import { reserveHotel, reserveTransport, searchHotels, searchTransport, sendItineraryEmail } from '../utils/api';
+
+// Format a date 30 days from now for examples
+const futureDate = () => {
+  const date = new Date();
+  date.setDate(date.getDate() + 30);
+  return date.toISOString().split('T')[0]; // YYYY-MM-DD format
+};
+
+// Return a date 5 days after the given date
+const laterDate = (startDate) => {
+  const date = new Date(startDate);
+  date.setDate(date.getDate() + 5);
+  return date.toISOString().split('T')[0];
+};
+
+// Simple display of tab content (defined outside the component so its inputs keep focus)
+const TabPanel = ({ children, value, index }) => {
+  return (
+    <div hidden={value !== index} style={{ padding: '20px 0' }}>
+      {value === index && children}
+    </div>
+  );
+};
+
+const errorMessage = (err) => err.response?.data?.detail || 'The travel services are unavailable. Please try again.';
 
 // Integration component for MCP servers
 const TravelServices = ({ itinerary, destination }) => {
   const [open, setOpen] = useState(false);
   const [tabValue, setTabValue] = useState(0);
   const [aiModel, setAiModel] = useState('claude'); // Default to Claude
+  const [traveller, setTraveller] = useState({ name: '', email: '' });
+  const [transportSearch, setTransportSearch] = useState({ transportType: 'flights', origin: '', date: futureDate() });
+  const [hotelSearch, setHotelSearch] = useState(() => {
+    const checkIn = futureDate();
+    return { checkIn, checkOut: laterDate(checkIn), guests: 1 };
+  });
+  const [transportResults, setTransportResults] = useState(null);
+  const [hotelResults, setHotelResults] = useState(null);
+  const [reservations, setReservations] = useState({});
+  const [emailResult, setEmailResult] = useState(null);
+  const [loading, setLoading] = useState('');
+  const [serviceError, setServiceError] = useState(null);
 
   const handleOpen = () => {
     setOpen(true);
@@ -65,29 +106,86 @@ const TravelServices = ({ itinerary, destination }) => {
     }
   };
 
-  // Format a date 30 days from now for examples
-  const futureDate = () => {
-    const date = new Date();
-    date.setDate(date.getDate() + 30);
-    return date.toISOString().split('T')[0]; // YYYY-MM-DD format
+  const handleTravellerChange = (e) => {
+    setTraveller({ ...traveller, [e.target.name]: e.target.value });
   };
 
-  // Return a date 5 days after the given date
-  const laterDate = (startDate) => {
-    const date = new Date(startDate);
-    date.setDate(date.getDate() + 5);
-    return date.toISOString().split('T')[0];
+  const handleTransportSearchChange = (e) => {
+    setTransportSearch({ ...transportSearch, [e.target.name]: e.target.value });
   };
 
-  // Simple display of tab content
-  const TabPanel = ({ children, value, index }) => {
-    return (
-      <div hidden={value !== index} style={{ padding: '20px 0' }}>
-        {value === index && children}
-      </div>
-    );
+  const handleHotelSearchChange = (e) => {
+    setHotelSearch({ ...hotelSearch, [e.target.name]: e.target.value });
+  };
+
+  // Runs one call to the travel services, tracking which action is loading
+  const runService = async (action, call) => {
+    setLoading(action);
+    setServiceError(null);
+    try {
+      return await call();
+    } catch (err) {
+      setServiceError(errorMessage(err));
+      return null;
+    } finally {
+      setLoading('');
+    }
   };
 
+  const handleTransportSearch = async (e) => {
+    e.preventDefault();
+    const results = await runService('transport', () => searchTransport(transportSearch.transportType, {
+      origin: transportSearch.origin,
+      destination,
+      date: transportSearch.date,
+    }));
+    if (results) setTransportResults(results);
+  };
+
+  const handleHotelSearch = async (e) => {
+    e.preventDefault();
+    const results = await runService('hotels', () => searchHotels({
+      city: destination,
+      check_in: hotelSearch.checkIn,
+      check_out: hotelSearch.checkOut,
+      guests: hotelSearch.guests,
+    }));
+    if (results) setHotelResults(results);
+  };
+
+  const handleReserve = async (option, kind) => {
+    const reservation = await runService(option.id, () => (kind === 'hotel'
+      ? reserveHotel({ hotel_id: option.id, guest_name: traveller.name, email: traveller.email })
+      : reserveTransport({ transport_id: option.id, passenger_name: traveller.name, email: traveller.email })));
+    if (reservation) setReservations({ ...reservations, [option.id]: reservation });
+  };
+
+  const handleSendItinerary = async () => {
+    const email = await runService('email', () => sendItineraryEmail({
+      recipient_email: traveller.email,
+      recipient_name: traveller.name,
+      itinerary_text: itinerary,
+    }));
+    if (email) setEmailResult(email);
+  };
+
+  const travellerMissing = !traveller.name.trim() || !traveller.email.trim();
+
+  const reserveButton = (option, kind) => (
+    reservations[option.id] ? (
+      <Chip label={`Held: ${reservations[option.id].reservation_id}`} color="success" size="small" />
+    ) : (
+      <Button
+        size="small"
+        variant="outlined"
+        onClick={() => handleReserve(option, kind)}
+        disabled={travellerMissing || loading === option.id}
+      >
+        {loading === option.id ? <CircularProgress size={18} /> : 'Reserve'}
+      </Button>
+    )
+  );
+
   // Random ID generators for examples
   const flightId = `F${Math.floor(1000 + Math.random() * 9000)}`;
   const hotelId = `H${Math.floor(1000 + Math.random() * 9000)}`;
@@ -157,9 +255,26 @@ const TravelServices = ({ itinerary, destination }) => {
         
         <DialogContent>
           <Alert severity="info" sx={{ mb: 2 }}>
-            These services are powered by the Model Context Protocol (MCP) and require {aiProductName}. 
+            Search, reserve and email below, or ask {aiProductName} using the examples; both use the Model Context Protocol (MCP) servers.
             See the <Link href="https://modelcontextprotocol.io" target="_blank" rel="noopener">MCP documentation</Link> for setup instructions.
           </Alert>
+
+          <Grid container spacing={2} sx={{ mb: 1 }}>
+            <Grid item xs={12} md={6}>
+              <TextField fullWidth size="small" label="Traveller name" name="name"
+                value={traveller.name} onChange={handleTravellerChange} />
+            </Grid>
+            <Grid item xs={12} md={6}>
+              <TextField fullWidth size="small" label="Email" name="email" type="email"
+                value={traveller.email} onChange={handleTravellerChange} />
+            </Grid>
+          </Grid>
+
+          {serviceError && (
+            <Alert severity="error" sx={{ mb: 2 }} onClose={() => setServiceError(null)}>
+              {serviceError}
+            </Alert>
+          )}
           
           <Box sx={{ borderBottom: 1, borderColor: 'divider' }}>
             <Tabs value={tabValue} onChange={handleTabChange} centered>
@@ -176,6 +291,53 @@ const TravelServices = ({ itinerary, destination }) => {
               <Typography paragraph>
                 Search and book flights, trains, and buses to your destination using {aiProductName} with the transport-hotels MCP server.
               </Typography>
+
+              <Box component="form" onSubmit={handleTransportSearch} sx={{ mb: 2 }}>
+                <Grid container spacing={2} alignItems="center">
+                  <Grid item xs={12} sm={3}>
+                    <TextField select fullWidth size="small" label="Type" name="transportType"
+                      value={transportSearch.transportType} onChange={handleTransportSearchChange}>
+                      <MenuItem value="flights">Flights</MenuItem>
+                      <MenuItem value="trains">Trains</MenuItem>
+                      <MenuItem value="buses">Buses</MenuItem>
+                    </TextField>
+                  </Grid>
+                  <Grid item xs={12} sm={4}>
+                    <TextField fullWidth size="small" required label="From" name="origin"
+                      value={transportSearch.origin} onChange={handleTransportSearchChange} />
+                  </Grid>
+                  <Grid item xs={12} sm={3}>
+                    <TextField fullWidth size="small" required type="date" label="Date" name="date"
+                      InputLabelProps={{ shrink: true }}
+                      value={transportSearch.date} onChange={handleTransportSearchChange} />
+                  </Grid>
+                  <Grid item xs={12} sm={2}>
+                    <Button type="submit" variant="contained" fullWidth disabled={!destination || loading === 'transport'}
+                      startIcon={loading === 'transport' ? <CircularProgress size={18} /> : <SearchIcon />}>
+                      Search
+                    </Button>
+                  </Grid>
+                </Grid>
+              </Box>
+
+              {transportResults && (
+                transportResults.length === 0 ? (
+                  <Typography variant="body2" color="text.secondary">No connections found for that date.</Typography>
+                ) : (
+                  <List dense>
+                    {transportResults.map((option) => (
+                      <ListItem key={option.id} secondaryAction={reserveButton(option, 'transport')}>
+                        <ListItemText
+                          primary={`${option.company} · ${option.departure} → ${option.arrival} (${option.duration})`}
+                          secondary={`${option.class} · ${option.price} ${option.currency} · ${option.seats_available} seats left`}
+                        />
+                      </ListItem>
+                    ))}
+                  </List>
+                )
+              )}
+
+              <Divider sx={{ my: 2 }} />
               
               <Grid container spacing={2}>
                 <Grid item xs={12} md={6}>
@@ -238,6 +400,51 @@ const TravelServices = ({ itinerary, destination }) => {
               <Typography paragraph>
                 Find and book hotels at your destination using {aiProductName} with the transport-hotels MCP server.
               </Typography>
+
+              <Box component="form" onSubmit={handleHotelSearch} sx={{ mb: 2 }}>
+                <Grid container spacing={2} alignItems="center">
+                  <Grid item xs={12} sm={4}>
+                    <TextField fullWidth size="small" required type="date" label="Check in" name="checkIn"
+                      InputLabelProps={{ shrink: true }}
+                      value={hotelSearch.checkIn} onChange={handleHotelSearchChange} />
+                  </Grid>
+                  <Grid item xs={12} sm={4}>
+                    <TextField fullWidth size="small" required type="date" label="Check out" name="checkOut"
+                      InputLabelProps={{ shrink: true }}
+                      value={hotelSearch.checkOut} onChange={handleHotelSearchChange} />
+                  </Grid>
+                  <Grid item xs={12} sm={2}>
+                    <TextField fullWidth size="small" type="number" label="Guests" name="guests"
+                      InputProps={{ inputProps: { min: 1, max: 10 } }}
+                      value={hotelSearch.guests} onChange={handleHotelSearchChange} />
+                  </Grid>
+                  <Grid item xs={12} sm={2}>
+                    <Button type="submit" variant="contained" fullWidth disabled={!destination || loading === 'hotels'}
+                      startIcon={loading === 'hotels' ? <CircularProgress size={18} /> : <SearchIcon />}>
+                      Search
+                    </Button>
+                  </Grid>
+                </Grid>
+              </Box>
+
+              {hotelResults && (
+                hotelResults.length === 0 ? (
+                  <Typography variant="body2" color="text.secondary">No hotels available for those dates.</Typography>
+                ) : (
+                  <List dense>
+                    {hotelResults.map((hotel) => (
+                      <ListItem key={hotel.id} secondaryAction={reserveButton(hotel, 'hotel')}>
+                        <ListItemText
+                          primary={`${hotel.name} · ${'★'.repeat(hotel.stars)} · rated ${hotel.rating}`}
+                          secondary={`${hotel.price_per_night} ${hotel.currency}/night, ${hotel.total_price} total · ${hotel.rooms_available} rooms left`}
+                        />
+                      </ListItem>
+                    ))}
+                  </List>
+                )
+              )}
+
+              <Divider sx={{ my: 2 }} />
               
               <Grid container spacing={2}>
                 <Grid item xs={12} md={6}>
@@ -399,6 +606,22 @@ const TravelServices = ({ itinerary, destination }) => {
               <Typography variant="subtitle2" gutterBottom>
                 Email Your Itinerary
               </Typography>
+              <Box display="flex" alignItems="center" sx={{ mb: 2 }}>
+                <Button
+                  variant="contained"
+                  size="small"
+                  startIcon={loading === 'email' ? <CircularProgress size={18} /> : <MailOutlineIcon />}
+                  onClick={handleSendItinerary}
+                  disabled={travellerMissing || !itinerary || loading === 'email'}
+                >
+                  Send to {traveller.email || 'my email'}
+                </Button>
+                {emailResult && (
+                  <Typography variant="body2" color="text.secondary" sx={{ ml: 2 }}>
+                    {`Email ${emailResult.email_id} queued for delivery`}
+                  </Typography>
+                )}
+              </Box>
               <Typography variant="body2">
                 Ask {aiProductName} to send your itinerary to your email with any of these example queries:
               </Typography>
@@ -2,7 +2,18 @@ const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
 
 const apiConfig = {
   plannerEndpoint: `${API_URL}/plan`,
+  groundedPlannerEndpoint: `${API_URL}/plan/grounded`,
+  planEndpoint: (planId) => `${API_URL}/plan/${planId}`,
+  planRefineEndpoint: (planId) => `${API_URL}/plan/${planId}/refine`,
   recommendationsEndpoint: `${API_URL}/recommend`,
+  // Travel services, proxied to the MCP tool servers
+  transportSearchEndpoint: (transportType) => `${API_URL}/search/${transportType}`,
+  hotelSearchEndpoint: `${API_URL}/search/hotels`,
+  transportReservationEndpoint: `${API_URL}/reservations/transport`,
+  hotelReservationEndpoint: `${API_URL}/reservations/hotel`,
+  itineraryEmailEndpoint: `${API_URL}/emails/itinerary`,
+  // Seconds the server may spend on one LLM request before giving up (sent as X-Request-Timeout)
+  requestTimeoutSeconds: 120,
   llmProviders: [
     { value: 'gemini', label: 'Google Gemini 2.0 Flash (Default)' },
     { value: 'claude', label: 'Anthropic Claude 3 Sonnet' },
@@ -1,4 +1,5 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
+import { useSearchParams } from 'react-router-dom';
 import {
   Container,
   Typography,
@@ -18,9 +19,12 @@ import {
   Grid,
   IconButton,
   Tooltip,
+  FormControlLabel,
+  Switch,
 } from '@mui/material';
 import ReactMarkdown from 'react-markdown';
-import { createTravelPlan } from '../utils/api';
+import axios from 'axios';
+import { createGroundedTravelPlan, createTravelPlan, getTravelPlan, refineTravelPlan } from '../utils/api';
 import apiConfig from '../config';
 import MapIcon from '@mui/icons-material/Map';
 import ItineraryMap from '../components/ItineraryMap';
@@ -52,6 +56,19 @@ const interestOptions = [
   'Architecture',
 ];
 
+// One line of progress for a grounded plan's event
+const describeProgress = (event) => {
+  if (event.event === 'turn') {
+    return event.final ? 'Writing the plan' : `Planning (step ${event.turn})`;
+  }
+  if (event.event === 'tool_call') {
+    const { city, origin, destination } = event.arguments || {};
+    const place = city || [origin, destination].filter(Boolean).join(' to ');
+    return `Looking up ${event.name.replace(/_/g, ' ')}${place ? ` (${place})` : ''}`;
+  }
+  return event.error ? `${event.name.replace(/_/g, ' ')} failed` : null;
+};
+
 const travelStyleOptions = [
   'Budget',
   'Mid-range',
@@ -76,6 +93,38 @@ function PlannerPage() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [result, setResult] = useState('');
+  const [planId, setPlanId] = useState('');
+  const [refinement, setRefinement] = useState('');
+  const [searchParams, setSearchParams] = useSearchParams();
+  const [refining, setRefining] = useState(false);
+  // Live prices: plan with hotel and transport searches, from start_date (and origin, for transport)
+  const [grounded, setGrounded] = useState(false);
+  const [grounding, setGrounding] = useState({ start_date: '', origin: '' });
+  const [progress, setProgress] = useState([]);
+
+  // Leaving the page cancels the plan being generated, and with it the LLM call on the server
+  const requestController = useRef(null);
+  useEffect(() => () => requestController.current?.abort(), []);
+
+  const startRequest = () => {
+    requestController.current?.abort();
+    requestController.current = new AbortController();
+    return requestController.current.signal;
+  };
+
+  // Plans are stored on the server, so a ?plan=<id> link reopens one without generating it again
+  const sharedPlanId = searchParams.get('plan');
+  useEffect(() => {
+    if (!sharedPlanId || sharedPlanId === planId) {
+      return;
+    }
+    getTravelPlan(sharedPlanId)
+      .then((plan) => {
+        setResult(plan.plan);
+        setPlanId(plan.plan_id);
+      })
+      .catch(() => setError('This plan could not be found.'));
+  }, [sharedPlanId, planId]);
   const [mapOpen, setMapOpen] = useState(false);
 
   const handleChange = (event) => {
@@ -98,16 +147,50 @@ function PlannerPage() {
     setLoading(true);
     setError('');
     setResult('');
+    setPlanId('');
+    setProgress([]);
+    setSearchParams({});
 
     try {
-      const response = await createTravelPlan(formData);
+      const response = grounded
+        ? await createGroundedTravelPlan(
+          { ...formData, start_date: grounding.start_date, origin: grounding.origin || null },
+          (event) => {
+            const line = describeProgress(event);
+            if (line) setProgress((lines) => [...lines, line]);
+          },
+          startRequest(),
+        )
+        : await createTravelPlan(formData, startRequest());
       setResult(response.plan);
+      setPlanId(response.plan_id);
+      setSearchParams({ plan: response.plan_id });
     } catch (err) {
+      if (axios.isCancel(err) || err.name === 'AbortError') return;
       setError(err.response?.data?.detail || 'An error occurred. Please try again.');
     } finally {
       setLoading(false);
     }
   };
+
+  const handleRefine = async (event) => {
+    event.preventDefault();
+    setRefining(true);
+    setError('');
+
+    try {
+      const response = await refineTravelPlan(planId, refinement, startRequest());
+      setResult(response.plan);
+      setPlanId(response.plan_id);
+      setSearchParams({ plan: response.plan_id });
+      setRefinement('');
+    } catch (err) {
+      if (axios.isCancel(err)) return;
+      setError(err.response?.data?.detail || 'An error occurred. Please try again.');
+    } finally {
+      setRefining(false);
+    }
+  };
   
   const handleOpenMap = () => {
     setMapOpen(true);
@@ -239,12 +322,45 @@ function PlannerPage() {
                 </FormControl>
               </Grid>
 
+              <Grid item xs={12}>
+                <FormControlLabel
+                  control={<Switch checked={grounded} onChange={(event) => setGrounded(event.target.checked)} />}
+                  label="Use live hotel and transport prices"
+                />
+              </Grid>
+
+              {grounded && (
+                <>
+                  <Grid item xs={12} md={6}>
+                    <TextField
+                      required
+                      fullWidth
+                      type="date"
+                      label="Start date"
+                      value={grounding.start_date}
+                      onChange={(event) => setGrounding({ ...grounding, start_date: event.target.value })}
+                      InputLabelProps={{ shrink: true }}
+                      helperText="First day of the trip, for hotel availability"
+                    />
+                  </Grid>
+                  <Grid item xs={12} md={6}>
+                    <TextField
+                      fullWidth
+                      label="Travelling from"
+                      value={grounding.origin}
+                      onChange={(event) => setGrounding({ ...grounding, origin: event.target.value })}
+                      helperText="Optional: include flights, trains or buses from here"
+                    />
+                  </Grid>
+                </>
+              )}
+
               <Grid item xs={12}>
                 <Button
                   type="submit"
                   variant="contained"
                   size="large"
-                  disabled={loading || !formData.destination || !formData.duration}
+                  disabled={loading || !formData.destination || !formData.duration || (grounded && !grounding.start_date)}
                   sx={{ mt: 2 }}
                 >
                   {loading ? <CircularProgress size={24} /> : 'Generate Travel Plan'}
@@ -254,6 +370,16 @@ function PlannerPage() {
           </form>
         </Paper>
 
+        {loading && progress.length > 0 && (
+          <Paper elevation={1} sx={{ p: 2, mb: 4 }}>
+            {progress.map((line, index) => (
+              <Typography key={index} variant="body2" color={index === progress.length - 1 ? 'text.primary' : 'text.secondary'}>
+                {line}
+              </Typography>
+            ))}
+          </Paper>
+        )}
+
         {error && (
           <Alert severity="error" sx={{ mb: 4 }}>
             {error}
@@ -275,6 +401,21 @@ function PlannerPage() {
               </Box>
             </Box>
             <ReactMarkdown>{result}</ReactMarkdown>
+            {planId && (
+              <Box component="form" onSubmit={handleRefine} sx={{ mt: 3, display: 'flex', gap: 2 }}>
+                <TextField
+                  fullWidth
+                  label="Refine this plan"
+                  placeholder="e.g. Make day 3 more relaxed"
+                  value={refinement}
+                  onChange={(event) => setRefinement(event.target.value)}
+                  disabled={refining}
+                />
+                <Button type="submit" variant="contained" disabled={refining || !refinement.trim()}>
+                  {refining ? <CircularProgress size={24} /> : 'Refine'}
+                </Button>
+              </Box>
+            )}
             <Box sx={{ mt: 3, display: 'flex', justifyContent: 'flex-start' }}>
               <TravelServices itinerary={result} destination={formData.destination} />
               <Button 
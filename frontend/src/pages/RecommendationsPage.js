@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import {
   Container,
   Typography,
@@ -18,6 +18,7 @@ import {
   Grid,
 } from '@mui/material';
 import ReactMarkdown from 'react-markdown';
+import axios from 'axios';
 import { getDestinationRecommendations } from '../utils/api';
 import apiConfig from '../config';
 
@@ -80,6 +81,10 @@ function RecommendationsPage() {
   
   const [travelHistoryInput, setTravelHistoryInput] = useState('');
 
+  // Leaving the page cancels the recommendations being generated, and with them the LLM call on the server
+  const requestController = useRef(null);
+  useEffect(() => () => requestController.current?.abort(), []);
+
   const handleChange = (event) => {
     const { name, value } = event.target;
     setFormData((prev) => ({ ...prev, [name]: value }));
@@ -131,9 +136,12 @@ function RecommendationsPage() {
     setResult('');
 
     try {
-      const response = await getDestinationRecommendations(formData);
+      requestController.current?.abort();
+      requestController.current = new AbortController();
+      const response = await getDestinationRecommendations(formData, requestController.current.signal);
       setResult(response.recommendations);
     } catch (err) {
+      if (axios.isCancel(err)) return;
       setError(err.response?.data?.detail || 'An error occurred. Please try again.');
     } finally {
       setLoading(false);
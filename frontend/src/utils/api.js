@@ -1,22 +1,138 @@
 import axios from 'axios';
 import apiConfig from '../config';
 
-export const createTravelPlan = async (planData) => {
+// Passing an AbortSignal lets a page cancel its request, which also cancels the LLM call on the server
+const llmRequestOptions = (signal) => ({
+  signal,
+  headers: { 'X-Request-Timeout': apiConfig.requestTimeoutSeconds },
+});
+
+export const createTravelPlan = async (planData, signal) => {
+  try {
+    const response = await axios.post(apiConfig.plannerEndpoint, planData, llmRequestOptions(signal));
+    return response.data;
+  } catch (error) {
+    if (!axios.isCancel(error)) console.error('Error creating travel plan:', error);
+    throw error;
+  }
+};
+
+// Streams progress (each model turn, tool call and tool result) to onEvent, then resolves with the plan.
+// Uses fetch, as axios cannot read a response while it streams in the browser.
+export const createGroundedTravelPlan = async (planData, onEvent, signal) => {
+  try {
+    const response = await fetch(apiConfig.groundedPlannerEndpoint, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', 'X-Request-Timeout': apiConfig.requestTimeoutSeconds },
+      body: JSON.stringify(planData),
+      signal,
+    });
+    if (!response.ok) {
+      const body = await response.json().catch(() => ({}));
+      throw Object.assign(new Error('Request failed'), { response: { status: response.status, data: body } });
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+      const lines = buffered.split('\n');
+      buffered = lines.pop();
+      for (const line of lines.filter((text) => text.trim())) {
+        const event = JSON.parse(line);
+        if (event.event === 'plan') return event;
+        if (event.event === 'error') {
+          throw Object.assign(new Error(event.detail), { response: { status: event.status, data: event } });
+        }
+        onEvent(event);
+      }
+      if (done) throw new Error('The plan stream ended early');
+    }
+  } catch (error) {
+    if (error.name !== 'AbortError') console.error('Error creating grounded travel plan:', error);
+    throw error;
+  }
+};
+
+export const getTravelPlan = async (planId) => {
+  try {
+    const response = await axios.get(apiConfig.planEndpoint(planId));
+    return response.data;
+  } catch (error) {
+    console.error('Error loading travel plan:', error);
+    throw error;
+  }
+};
+
+export const refineTravelPlan = async (planId, instruction, signal) => {
+  try {
+    const response = await axios.post(apiConfig.planRefineEndpoint(planId), { instruction },
+      llmRequestOptions(signal));
+    return response.data;
+  } catch (error) {
+    if (!axios.isCancel(error)) console.error('Error refining travel plan:', error);
+    throw error;
+  }
+};
+
+export const getDestinationRecommendations = async (recData, signal) => {
   try {
-    const response = await axios.post(apiConfig.plannerEndpoint, planData);
+    const response = await axios.post(apiConfig.recommendationsEndpoint, recData, llmRequestOptions(signal));
     return response.data;
   } catch (error) {
-    console.error('Error creating travel plan:', error);
+    if (!axios.isCancel(error)) console.error('Error getting recommendations:', error);
     throw error;
   }
 };
 
-export const getDestinationRecommendations = async (recData) => {
+export const searchTransport = async (transportType, searchParams) => {
   try {
-    const response = await axios.post(apiConfig.recommendationsEndpoint, recData);
+    const response = await axios.get(apiConfig.transportSearchEndpoint(transportType), { params: searchParams });
     return response.data;
   } catch (error) {
-    console.error('Error getting recommendations:', error);
+    console.error('Error searching transport:', error);
     throw error;
   }
-}; 
\ No newline at end of file
+};
+
+export const searchHotels = async (searchParams) => {
+  try {
+    const response = await axios.get(apiConfig.hotelSearchEndpoint, { params: searchParams });
+    return response.data;
+  } catch (error) {
+    console.error('Error searching hotels:', error);
+    throw error;
+  }
+};
+
+export const reserveTransport = async (reservation) => {
+  try {
+    const response = await axios.post(apiConfig.transportReservationEndpoint, reservation);
+    return response.data;
+  } catch (error) {
+    console.error('Error reserving transport:', error);
+    throw error;
+  }
+};
+
+export const reserveHotel = async (reservation) => {
+  try {
+    const response = await axios.post(apiConfig.hotelReservationEndpoint, reservation);
+    return response.data;
+  } catch (error) {
+    console.error('Error reserving hotel:', error);
+    throw error;
+  }
+};
+
+export const sendItineraryEmail = async (emailData) => {
+  try {
+    const response = await axios.post(apiConfig.itineraryEmailEndpoint, emailData);
+    return response.data;
+  } catch (error) {
+    console.error('Error sending itinerary email:', error);
+    throw error;
+  }
+};
@@ -0,0 +1,162 @@
+"""Benchmark for vectorized bulk generation of transport and hotel options.
+
+Generates N options with per-row generators (the transport search tools' own,
+and the per-row hotel generator search_hotels used before the hotel index),
+called repeatedly as a load test or fixture script would, and with the NumPy
+bulk generators, reporting the time to produce the columns alone, to materialize
+dicts, and to serialize JSON.
+
+Usage:
+    python benchmarks/bench_bulk_generators.py --options 200000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BASE)
+sys.path.insert(0, os.path.join(BASE, "transport-hotels"))
+os.environ.setdefault("EVENT_BUS_PATH", os.path.join(tempfile.mkdtemp(), "events.db"))
+
+import numpy as np  # noqa: E402
+
+import transport_hotels  # noqa: E402
+from bulk_generators import generate_hotel_batch, generate_transport_batch  # noqa: E402
+from common.ids import new_id  # noqa: E402
+from sample_data import HOTEL_CHAINS  # noqa: E402
+
+
+class NoInventory:
+    """Stands in for the reservation store so both paths measure generation only."""
+
+    def register(self, item_id, capacity, info=None):
+        return capacity
+
+
+def timed(label, fn, count):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<30} {elapsed:>7.3f} s  {count / elapsed:>12,.0f} options/s")
+    return result, elapsed
+
+
+def per_row_transport(n):
+    rows = []
+    while len(rows) < n:
+        rows += transport_hotels.generate_transport_options("Paris", "Rome", "2026-11-01", "flight")
+    return rows[:n]
+
+
+def generate_hotel_options(city: str, check_in: str, check_out: str, guests: int) -> List[Dict]:
+    """Hotel options built one dict at a time, as search_hotels did before the hotel index."""
+    try:
+        # Parse dates
+        check_in_date = datetime.datetime.strptime(check_in, "%Y-%m-%d")
+        check_out_date = datetime.datetime.strptime(check_out, "%Y-%m-%d")
+        
+        # Calculate number of nights
+        nights = (check_out_date - check_in_date).days
+        if nights <= 0:
+            return []
+        
+        # Generate 3-7 hotel options
+        num_options = random.randint(3, 7)
+        options = []
+        
+        for i in range(num_options):
+            # Random hotel chain
+            hotel_chain = random.choice(HOTEL_CHAINS)
+            
+            # Hotel name (chain + city + descriptor)
+            descriptors = ["Plaza", "Grand", "Royal", "Central", "Resort", "Suites", "Inn"]
+            hotel_name = f"{hotel_chain} {city} {random.choice(descriptors)}"
+            
+            # Random star rating (3-5)
+            stars = random.randint(3, 5)
+            
+            # Base price per night (varies by star rating)
+            base_price = 50 + (stars * 30) + random.randint(0, 100)
+            
+            # Adjust price for number of guests
+            guest_factor = 1.0 + ((guests - 1) * 0.3)  # Each additional guest adds 30%
+            price_per_night = int(base_price * guest_factor)
+            
+            # Total price for the stay
+            total_price = price_per_night * nights
+            
+            # Random amenities
+            all_amenities = ["WiFi", "Pool", "Gym", "Restaurant", "Bar", "Room Service", "Spa", "Parking", "Airport Shuttle", "Breakfast Included"]
+            num_amenities = random.randint(3, len(all_amenities))
+            amenities = random.sample(all_amenities, num_amenities)
+            
+            # Generate hotel ID
+            hotel_id = new_id("H")
+            address = f"{random.randint(1, 999)} {random.choice(['Main', 'First', 'Park', 'Oak', 'Maple', 'Pine'])} {random.choice(['Street', 'Avenue', 'Boulevard', 'Road'])}"
+            
+            options.append({
+                "id": hotel_id,
+                "name": hotel_name,
+                "chain": hotel_chain,
+                "city": city,
+                "address": address,
+                "stars": stars,
+                "price_per_night": price_per_night,
+                "total_price": total_price,
+                "currency": "USD",
+                "check_in": check_in,
+                "check_out": check_out,
+                "nights": nights,
+                "guests": guests,
+                "amenities": amenities,
+                "rooms_available": random.randint(1, 10),
+                "rating": round(3.0 + random.random() * 2.0, 1),  # Random rating between 3.0 and 5.0
+                "reviews": random.randint(50, 500)
+            })
+        
+        return sorted(options, key=lambda x: x["total_price"])
+        
+    except Exception as e:
+        print(f"Error generating hotel options: {e}")
+        return []
+
+
+def per_row_hotels(n):
+    rows = []
+    while len(rows) < n:
+        rows += generate_hotel_options("Paris", "2026-11-01", "2026-11-04", 2)
+    return rows[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--options", type=int, default=200_000)
+    args = parser.parse_args()
+    n = args.options
+    transport_hotels.reservations = NoInventory()
+    rng = np.random.default_rng(11)
+
+    for kind, per_row, bulk in (
+        ("transport", per_row_transport, lambda: generate_transport_batch(n, "Paris", "Rome", "2026-11-01", "flight", rng)),
+        ("hotels", per_row_hotels, lambda: generate_hotel_batch(n, "Paris", "2026-11-01", "2026-11-04", 2, rng)),
+    ):
+        print(f"{kind}, {n:,} options")
+        rows, per_row_elapsed = timed("per-row dicts", lambda: per_row(n), n)
+        timed("per-row dicts + JSON", lambda: json.dumps(per_row(n)), n)
+        batch, _ = timed("bulk columns", bulk, n)
+        bulk_rows, bulk_elapsed = timed("bulk columns + dicts", lambda: bulk().to_dicts(), n)
+        timed("bulk columns + JSON", lambda: bulk().to_json(), n)
+        assert len(batch) == n and len(bulk_rows) == n and rows[0].keys() == bulk_rows[0].keys()
+        print(f"  speedup to dicts: {per_row_elapsed / bulk_elapsed:.1f}x, columns hold "
+              f"{sum(getattr(batch, name).nbytes for name in vars(batch) if isinstance(getattr(batch, name), np.ndarray)) / n:.0f} "
+              f"bytes per option")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark rendering throughput of the email service's precompiled templates.
+
+Usage:
+    python benchmarks/bench_email_templates.py --emails 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "email-service"))
+
+from templates import render_booking_confirmation, render_itinerary_email  # noqa: E402
+
+FLIGHT = {
+    "booking_reference": "REF48213", "origin": "Paris", "destination": "Rome",
+    "departure": "2025-06-15 09:30", "company": "SkyWings", "ticket_class": "Economy",
+    "check_in_time": "2 hours before departure", "baggage_allowance": "1 x 23kg",
+    "gate": "B12", "terminal": "2",
+}
+HOTEL = {
+    "booking_reference": "BK55120", "name": "LuxStay Rome Grand", "address": "12 Park Avenue, Rome",
+    "check_in": "2025-06-15", "check_out": "2025-06-20", "room_type": "Deluxe", "guests": 2,
+    "special_requests": "Late check-in <after 10pm> & quiet room",
+}
+ITINERARY = "\n".join(f"Day {day}: Explore the old town, lunch at a trattoria, evening walk." for day in range(1, 8))
+
+
+def timed(label, count, render):
+    start = time.perf_counter()
+    for i in range(count):
+        render(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<26} {count:>9,} emails  {elapsed:>6.2f} s  {count / elapsed:>10,.0f} emails/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=100_000)
+    args = parser.parse_args()
+
+    assert "&lt;after 10pm&gt; &amp; quiet room" in render_booking_confirmation("Ann", "hotel", HOTEL)["body"]
+
+    timed("flight confirmation", args.emails, lambda i: render_booking_confirmation("Ann Lee", "flight", FLIGHT))
+    timed("hotel confirmation", args.emails, lambda i: render_booking_confirmation("Ann Lee", "hotel", HOTEL))
+    timed("itinerary + 2 bookings", args.emails, lambda i: render_itinerary_email(
+        "Ann Lee", ITINERARY, [dict(FLIGHT, type="Flight"), dict(HOTEL, type="Hotel")]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Throughput benchmark for the payment -> reservation -> email event pipeline.
+
+Publishes payment.completed events for held reservations and runs the same
+handlers the servers use: the transport/hotel consumer confirms each
+reservation and publishes reservation.confirmed, the email consumer renders
+and stores the confirmation. Each stage uses its own EventBus connection on
+a shared log, as separate server processes would. Some payments are
+published twice, and the email consumer is finally rewound to the start of
+the log, to check that every reservation still gets exactly one email.
+
+Usage:
+    python benchmarks/bench_events.py --payments 20000 --publish-batch 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BASE)
+sys.path.insert(0, os.path.join(BASE, "transport-hotels"))
+sys.path.insert(0, os.path.join(BASE, "email-service"))
+
+from common.events import PAYMENT_COMPLETED, RESERVATION_CONFIRMED, EventBus  # noqa: E402
+from common.ids import new_id  # noqa: E402
+from email_store import EmailStore  # noqa: E402
+from reservation_store import ReservationStore  # noqa: E402
+from templates import render_booking_confirmation  # noqa: E402
+
+
+async def run(args, workdir):
+    events_path = os.path.join(workdir, "events.db")
+    payments_bus = EventBus(events_path)
+    transport_bus = EventBus(events_path, poll_interval=args.poll_interval)
+    email_bus = EventBus(events_path, poll_interval=args.poll_interval)
+    emails = EmailStore(os.path.join(workdir, "emails.db"))
+    reservations = ReservationStore()
+
+    holds = []
+    for i in range(args.payments):
+        item_id = new_id("F")
+        reservations.register(item_id, 1, {"origin": "Paris", "destination": "Rome", "departure": "2026-11-01 09:00",
+                                           "company": "SkyWings", "ticket_class": "Economy"})
+        holds.append(reservations.hold(item_id, details={"transport_type": "flight", "passenger_name": f"P{i}",
+                                                         "email": f"p{i}@example.com"}))
+
+    latencies = []
+    done = asyncio.Event()
+
+    async def on_payment_completed(event):
+        hold = reservations.confirm(event.payload["reservation_id"])
+        await transport_bus.publish(RESERVATION_CONFIRMED, {
+            "reservation_id": hold.reservation_id,
+            "booking_type": hold.details["transport_type"],
+            "recipient_email": hold.details["email"],
+            "recipient_name": hold.details["passenger_name"],
+            "booking": {"booking_reference": hold.reservation_id, **hold.details},
+            "paid_at": event.payload["paid_at"],
+        }, f"{RESERVATION_CONFIRMED}:{hold.reservation_id}")
+
+    async def on_reservation_confirmed(event):
+        confirmation = event.payload
+        content = render_booking_confirmation(confirmation["recipient_name"], confirmation["booking_type"],
+                                              confirmation["booking"])
+        record = {"email_id": new_id("EMAIL-"), "recipient": confirmation["recipient_email"],
+                  "subject": content["subject"], "status": "queued",
+                  "queued_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        if emails.add(record, content["parts"], dedupe_key=event.dedupe_key):
+            latencies.append(time.time() - confirmation["paid_at"])
+            if len(latencies) == args.payments:
+                done.set()
+
+    transport_bus.subscribe("transport-hotels", [PAYMENT_COMPLETED], on_payment_completed)
+    email_bus.subscribe("email-service", [RESERVATION_CONFIRMED], on_reservation_confirmed)
+    consumers = [asyncio.create_task(transport_bus.run_consumers()), asyncio.create_task(email_bus.run_consumers())]
+
+    rng = random.Random(3)
+    start = time.perf_counter()
+    for first in range(0, len(holds), args.publish_batch):
+        batch = []
+        for hold in holds[first:first + args.publish_batch]:
+            payment_id = new_id("PAY-")
+            event = (PAYMENT_COMPLETED, {"payment_id": payment_id, "reservation_id": hold.reservation_id,
+                                         "paid_at": time.time()}, f"{PAYMENT_COMPLETED}:{payment_id}")
+            batch.append(event)
+            if rng.random() < args.duplicate_rate:
+                batch.append(event)
+        await payments_bus.publish_batch(batch)
+    publish_elapsed = time.perf_counter() - start
+
+    await asyncio.wait_for(done.wait(), timeout=300)
+    elapsed = time.perf_counter() - start
+
+    # Simulate a crash that lost the email consumer's offset: everything is redelivered
+    consumers[1].cancel()
+    email_bus._conn.execute("UPDATE consumer_offsets SET seq = 0 WHERE consumer = 'email-service'")
+    replay_start = time.perf_counter()
+    replay = asyncio.create_task(email_bus.run_consumers())
+    while email_bus.lag("email-service", [RESERVATION_CONFIRMED]):
+        await asyncio.sleep(0.05)
+    replay_elapsed = time.perf_counter() - replay_start
+    replay.cancel()
+    consumers[0].cancel()
+    await asyncio.gather(*consumers, replay, return_exceptions=True)
+
+    stored = emails.stats()["emails"]
+    assert stored == args.payments, f"{stored} emails stored for {args.payments} payments"
+    assert all(reservations.get(hold.reservation_id).status == "Confirmed" for hold in holds)
+
+    latencies.sort()
+    print(f"Published {args.payments:,} payments in {publish_elapsed:.2f} s "
+          f"({args.payments / publish_elapsed:,.0f} events/s)")
+    print(f"End to end: {args.payments:,} confirmations in {elapsed:.2f} s ({args.payments / elapsed:,.0f} bookings/s)")
+    print(f"Payment -> email latency: p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+    print(f"Redelivered {args.payments:,} events in {replay_elapsed:.2f} s, {stored:,} emails stored (no duplicates)")
+
+    for bus in (payments_bus, transport_bus, email_bus):
+        bus.close()
+    emails.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=20_000)
+    parser.add_argument("--publish-batch", type=int, default=100)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        asyncio.run(run(args, workdir))
+
+
+if __name__ == "__main__":
+    main()
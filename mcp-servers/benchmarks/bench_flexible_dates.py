@@ -0,0 +1,82 @@
+"""Benchmark for flexible-date transport search.
+
+Finds the cheapest fare per day over a date range for every transport type,
+once by generating each day's options with the search tools' generator (the
+sequential per-day tool calls an agent makes without the flexible-date tool)
+and once from the route price index, cold (first use of the route) and warm.
+
+Usage:
+    python benchmarks/bench_flexible_dates.py --days 7 30 62 --routes 200
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BASE)
+sys.path.insert(0, os.path.join(BASE, "transport-hotels"))
+os.environ.setdefault("EVENT_BUS_PATH", os.path.join(tempfile.mkdtemp(), "events.db"))
+
+import transport_hotels  # noqa: E402
+from route_prices import RoutePriceIndex  # noqa: E402
+from sample_data import CITIES  # noqa: E402
+
+TRANSPORT_TYPES = ("flight", "train", "bus")
+
+
+class NoInventory:
+    """Stands in for the reservation store so the per-day path measures generation only."""
+
+    def register(self, item_id, capacity, info=None):
+        return capacity
+
+
+def per_day(origin, destination, start, days):
+    fares = {}
+    for transport_type in TRANSPORT_TYPES:
+        fares[transport_type] = [
+            min(option["price"] for option in transport_hotels.generate_transport_options(
+                origin, destination, (start + datetime.timedelta(days=offset)).isoformat(), transport_type))
+            for offset in range(days)]
+    return fares
+
+
+def indexed(index, origin, destination, start, days):
+    return {transport_type: index.fares(origin, destination, transport_type, start.isoformat(), days).tolist()
+            for transport_type in TRANSPORT_TYPES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 62])
+    parser.add_argument("--routes", type=int, default=200)
+    args = parser.parse_args()
+    transport_hotels.reservations = NoInventory()
+    rng = random.Random(4)
+    start = datetime.date(2026, 12, 15)
+
+    for days in args.days:
+        routes = [rng.sample(CITIES, 2) for _ in range(args.routes)]
+        index = RoutePriceIndex()
+        timings = {}
+        for label, fn in (("per-day generation", lambda o, d: per_day(o, d, start, days)),
+                          ("index, cold", lambda o, d: indexed(index, o, d, start, days)),
+                          ("index, warm", lambda o, d: indexed(index, o, d, start, days))):
+            began = time.perf_counter()
+            results = [fn(origin, destination) for origin, destination in routes]
+            timings[label] = (time.perf_counter() - began) / len(routes)
+            if label == "per-day generation":
+                expected = results
+            else:
+                assert results == expected
+        print(f"{days} days x {len(TRANSPORT_TYPES)} types, {args.routes} routes")
+        for label, elapsed in timings.items():
+            print(f"  {label:<22} {elapsed * 1e6:>10,.1f} us per search")
+
+
+if __name__ == "__main__":
+    main()
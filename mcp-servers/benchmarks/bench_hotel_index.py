@@ -0,0 +1,144 @@
+"""Benchmark for filtered hotel search over the indexed hotel inventory.
+
+Builds one HotelIndex over N hotels and runs a mix of filtered queries
+(price cap, minimum stars and rating, required amenities, each sort key)
+three ways: filtering materialized dicts with amenity string lists, as an
+agent or client would without server-side filters, a full NumPy scan with
+a sort, and the index. Index results are checked against the full scan.
+Then finds the cheapest 3-night stay in a month for a city-sized hotel set,
+once with one search per check-in date and once with the availability
+calendar's sliding windows.
+
+Usage:
+    python benchmarks/bench_hotel_index.py --hotels 1000000 --queries 2000 --city-hotels 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BASE)
+sys.path.insert(0, os.path.join(BASE, "transport-hotels"))
+
+import numpy as np  # noqa: E402
+
+from bulk_generators import amenity_mask, generate_hotel_batch, guest_factor  # noqa: E402
+from hotel_calendar import day_number  # noqa: E402
+from hotel_index import SORT_KEYS, HotelIndex  # noqa: E402
+from sample_data import AMENITIES  # noqa: E402
+
+
+def random_query(rng):
+    return {
+        "max_price": rng.choice([None, None, 150, 220, 300]),
+        "min_stars": rng.choice([None, None, 4, 5]),
+        "min_rating": rng.choice([None, None, 4.0, 4.5, 4.9]),
+        "amenities": rng.sample(AMENITIES, rng.choice([0, 0, 1, 2, 4])),
+        "sort_by": rng.choice(SORT_KEYS),
+        "limit": rng.choice([5, 10, 50]),
+        "guests": rng.choice([1, 2]),
+    }
+
+
+def index_query(index, query):
+    return index.search(query["max_price"], query["min_stars"], query["min_rating"], amenity_mask(query["amenities"]),
+                        query["sort_by"], query["limit"], query["guests"])
+
+
+def scan_query(index, query):
+    batch = index.batch
+    mask = np.ones(len(batch), dtype=bool)
+    if query["max_price"] is not None:
+        mask &= (batch.price_per_night * guest_factor(query["guests"])).astype(np.int32) <= query["max_price"]
+    if query["min_stars"] is not None:
+        mask &= batch.stars >= query["min_stars"]
+    if query["min_rating"] is not None:
+        mask &= batch.rating >= np.float32(query["min_rating"])
+    required = amenity_mask(query["amenities"])
+    if required:
+        mask &= (batch.amenities & required) == required
+    rows = np.flatnonzero(mask)
+    return rows[np.argsort(index._ranks[query["sort_by"]][rows], kind="stable")][:query["limit"]]
+
+
+def dict_query(hotels, query):
+    factor = guest_factor(query["guests"])
+    matches = [hotel for hotel in hotels
+               if (query["max_price"] is None or int(hotel["price_per_night"] * factor) <= query["max_price"])
+               and (query["min_stars"] is None or hotel["stars"] >= query["min_stars"])
+               and (query["min_rating"] is None or hotel["rating"] >= query["min_rating"])
+               and all(name in hotel["amenities"] for name in query["amenities"])]
+    if query["sort_by"] == "price":
+        matches.sort(key=lambda hotel: hotel["price_per_night"])
+    else:
+        matches.sort(key=lambda hotel: -hotel[query["sort_by"]])
+    return matches[:query["limit"]]
+
+
+def timed(label, fn, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"  {label:<28} p50 {statistics.median(latencies) * 1e6:>10,.1f} us   "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e6:>10,.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hotels", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--dict-queries", type=int, default=20, help="queries for the slow dict filter")
+    parser.add_argument("--city-hotels", type=int, default=200, help="hotels for the cheapest-stay search")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    batch = generate_hotel_batch(args.hotels, "Paris", "1970-01-01", "1970-01-02", 1, np.random.default_rng(5))
+    index = HotelIndex(batch, ids=[f"H{i}" for i in range(args.hotels)])
+    print(f"Indexed {args.hotels:,} hotels in {time.perf_counter() - start:.2f} s")
+
+    rng = random.Random(9)
+    queries = [random_query(rng) for _ in range(args.queries)]
+    for query in queries:
+        assert np.array_equal(index_query(index, query), scan_query(index, query)), query
+
+    hotels = batch.to_dicts(np.arange(args.hotels), ids=index.ids)
+    print(f"{args.queries:,} filtered queries (dict filter: {args.dict_queries})")
+    timed("dicts with amenity lists", lambda query: dict_query(hotels, query), queries[:args.dict_queries])
+    timed("full NumPy scan", lambda query: scan_query(index, query), queries)
+    timed("index", lambda query: index_query(index, query), queries)
+    check_in = day_number("2026-11-01")
+    timed("index + materialize rows", lambda query: index.rows(index_query(index, query), check_in, 3,
+                                                                query["guests"]), queries)
+
+    city = HotelIndex(generate_hotel_batch(args.city_hotels, "Paris", "1970-01-01", "1970-01-02", 1,
+                                           np.random.default_rng(6)), seed=6)
+    first_day, nights = day_number("2026-11-01"), 3
+
+    def per_date():
+        # What an agent does without the calendar: one search per check-in date, cheapest result of each
+        best = None
+        for day in range(first_day, first_day + 30):
+            rows = city.search(limit=1, stay=(day, nights))
+            if len(rows):
+                total = city.rows(rows, day, nights, 1)[0]["total_price"]
+                best = min(best or (total, day), (total, day))
+        return best
+
+    def windows():
+        found = city.cheapest_stays(np.arange(len(city)), first_day, 30, nights, limit=1)[0]
+        return found["total_price"], found["check_in"]
+
+    assert per_date() == windows()
+    print(f"Cheapest {nights}-night stay in a month, {args.city_hotels} hotels")
+    timed("one search per check-in", lambda _: per_date(), range(50))
+    timed("calendar windows", lambda _: windows(), range(50))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark for the shared time-ordered id generator.
+
+Generates ids from several threads and several processes, checks that none
+collide and that each thread's ids sort in creation order, and compares the
+generation rate with the previous random.randint and uuid4 based ids.
+
+Usage:
+    python benchmarks/bench_ids.py --ids 1000000 --threads 8 --processes 4
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.ids import id_timestamp, new_id  # noqa: E402
+
+
+def timed(label, fn, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count / elapsed / 1e6:>8.2f} M ids/s  ({elapsed:.2f} s)")
+
+
+def generate_in_thread(count, results, index):
+    results[index] = [new_id("PAY-") for _ in range(count)]
+
+
+def generate_in_process(count):
+    return [new_id("PAY-") for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ids", type=int, default=1_000_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    timed("random.randint (previous)", lambda: f"EMAIL-{random.randint(10000, 99999)}", args.ids)
+    timed("uuid4 (previous)", lambda: f"PAY-{uuid.uuid4().hex[:10].upper()}", args.ids)
+    timed("new_id", lambda: new_id("PAY-"), args.ids)
+
+    per_thread = args.ids // args.threads
+    results = [None] * args.threads
+    threads = [threading.Thread(target=generate_in_thread, args=(per_thread, results, i)) for i in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"{args.threads} threads: {per_thread * args.threads / elapsed / 1e6:.2f} M ids/s")
+    for ids in results:
+        assert ids == sorted(ids), "ids from one thread must be time-ordered"
+
+    per_process = args.ids // args.processes
+    with multiprocessing.Pool(args.processes) as pool:
+        process_ids = pool.map(generate_in_process, [per_process] * args.processes)
+
+    all_ids = [i for ids in results for i in ids] + [i for ids in process_ids for i in ids]
+    assert len(set(all_ids)) == len(all_ids), "duplicate id generated"
+    print(f"{len(all_ids):,} ids from {args.threads} threads and {args.processes} processes, no duplicates")
+
+    drift = abs(id_timestamp(new_id("PAY-")) - time.time())
+    assert drift < 1, drift
+    print(f"Sample id: {new_id('PAY-')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark payments/sec written to the payment ledger with durability on.
+
+Appends payments from many concurrent asyncio tasks with synchronous=FULL
+(every commit is fsynced), once with group commit and once committing each
+payment on its own, then checks every payment can be read back.
+
+Usage:
+    python benchmarks/bench_ledger.py --payments 5000 --concurrency 200
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "payment"))
+
+from ledger import PaymentLedger  # noqa: E402
+
+
+def make_record(i):
+    return {
+        "payment_id": f"PAY-{uuid.uuid4().hex[:10].upper()}",
+        "reservation_id": f"R{i:06d}",
+        "amount": 100.0 + i % 50,
+        "currency": "USD",
+        "status": "completed",
+        "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "payment_method": "Credit Card",
+        "card_details": {"card_type": "Visa", "masked_number": "************1111",
+                         "expiry": "12/30", "cardholder": "Bench Mark"},
+        "email": "bench@example.com",
+        "transaction_reference": f"TX{i:06d}",
+        "success": True,
+    }
+
+
+async def run(ledger, payments, concurrency):
+    records = [make_record(i) for i in range(payments)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def pay(i, record):
+        async with semaphore:
+            await ledger.write(lambda conn: PaymentLedger.append(conn, record, "payment", f"idem-{i}"))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(pay(i, record) for i, record in enumerate(records)))
+    elapsed = time.perf_counter() - start
+
+    for record in records[:: max(1, payments // 100)]:
+        assert ledger.get(record["payment_id"])["payment_id"] == record["payment_id"]
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--synchronous", default="FULL", help="SQLite synchronous pragma (FULL = fsync every commit)")
+    args = parser.parse_args()
+
+    for label, max_batch in (("group commit", 256), ("commit per payment", 1)):
+        with tempfile.TemporaryDirectory() as tmp:
+            ledger = PaymentLedger(os.path.join(tmp, "payments.db"), max_batch=max_batch, synchronous=args.synchronous)
+            elapsed = asyncio.run(run(ledger, args.payments, args.concurrency))
+            ledger.close()
+        print(f"{label:<20} {args.payments:>8,} payments  {elapsed:>7.2f} s  {args.payments / elapsed:>10,.0f} payments/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark payment reports from the rollups against reading every payment.
+
+Fills a ledger with N payments spread over days, currencies, card types and
+statuses, refunding a share of them, then times the same reports answered
+from the payment_rollup table (what payment_report does) and by
+recomputing them from every payment's latest ledger row (what a report
+without the rollups has to do), checks both agree, and times a full
+reconciliation.
+
+Usage:
+    python benchmarks/bench_payment_report.py --payments 1000000 --days 365
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "payment"))
+
+from ledger import LATEST_ROLLUP_KEYS, PaymentLedger  # noqa: E402
+
+CURRENCIES = ["USD", "EUR", "GBP", "JPY", "CHF"]
+CARD_TYPES = ["Visa", "MasterCard", "American Express", "Discover"]
+
+# (label, group_by, filters)
+REPORTS = [
+    ("totals per currency", ["currency"], {}),
+    ("per day, currency and status", ["day", "currency", "status"], {}),
+    ("one month per card type", ["card_type"], {"start_day": "2026-03-01", "end_day": "2026-03-31"}),
+    ("refunds per month", ["month", "currency"], {"status": "refunded"}),
+]
+
+
+def make_record(i, rng, first_day, days):
+    day = first_day + datetime.timedelta(days=rng.randrange(days))
+    success = rng.random() < 0.95
+    return {
+        "payment_id": f"PAY-{i:010d}",
+        "reservation_id": f"R{i:08d}",
+        "amount": round(rng.uniform(20, 2000), 2),
+        "currency": rng.choice(CURRENCIES),
+        "status": "completed" if success else "failed",
+        "timestamp": f"{day.isoformat()} 12:00:00",
+        "payment_method": "Credit Card",
+        "card_details": {"card_type": rng.choice(CARD_TYPES), "masked_number": "************1111",
+                         "expiry": "12/30", "cardholder": "Bench Mark"},
+        "email": "bench@example.com",
+        "transaction_reference": f"TX{i:010d}",
+        "success": success,
+    }
+
+
+def fill(ledger, payments, days, refund_share, rng):
+    first_day = datetime.date(2026, 1, 1)
+    batch = 20000
+    refunded = 0
+    for start in range(0, payments, batch):
+        records = [make_record(i, rng, first_day, days) for i in range(start, min(start + batch, payments))]
+        refunds = [record for record in records if record["success"] and rng.random() < refund_share]
+
+        def append_all(conn):
+            for record in records:
+                PaymentLedger.append(conn, record, "payment")
+            for record in refunds:
+                PaymentLedger.append(conn, dict(record, status="refunded", refund_reason="Bench"), "refund")
+
+        ledger.submit(append_all).result()
+        refunded += len(refunds)
+    return refunded
+
+
+def time_report(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--refund-share", type=float, default=0.05, help="share of completed payments refunded")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = PaymentLedger(os.path.join(tmp, "payments.db"), synchronous="NORMAL")
+        start = time.perf_counter()
+        refunded = fill(ledger, args.payments, args.days, args.refund_share, random.Random(7))
+        elapsed = time.perf_counter() - start
+        print(f"{args.payments:,} payments ({refunded:,} refunded) over {args.days} days written in {elapsed:.1f} s")
+
+        for label, group_by, filters in REPORTS:
+            rollup_time, rollup_rows = time_report(lambda: ledger.report(group_by, **filters), args.repeat)
+            with ledger._read_lock:
+                scan_time, scan_rows = time_report(
+                    lambda: PaymentLedger._totals(ledger._read_conn, LATEST_ROLLUP_KEYS, group_by, filters), 1)
+            assert rollup_rows == scan_rows, f"{label}: rollups and ledger disagree"
+            print(f"  {label:<30} {len(rollup_rows):>6,} rows   rollups {rollup_time * 1000:>8.2f} ms   "
+                  f"every payment {scan_time * 1000:>9.1f} ms   {scan_time / rollup_time:>7,.0f}x")
+
+        start = time.perf_counter()
+        reconciliation = ledger.reconcile()
+        elapsed = time.perf_counter() - start
+        print(f"  reconciliation of {reconciliation['payments']:,} payments: "
+              f"{len(reconciliation['mismatches'])} mismatches in {elapsed:.2f} s")
+        ledger.close()
+
+
+if __name__ == "__main__":
+    main()
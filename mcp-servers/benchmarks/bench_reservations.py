@@ -0,0 +1,124 @@
+"""Stress benchmark for the transport-hotels reservation store.
+
+Places thousands of concurrent holds against a small inventory, from asyncio
+tasks and from worker threads, checks that no item is ever oversold, then
+expires every hold and checks that all capacity comes back.
+
+Usage:
+    python benchmarks/bench_reservations.py --holds 20000 --items 200 --capacity 50
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "transport-hotels"))
+
+from reservation_store import ReservationStore, ReservationError  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def build_store(items, capacity, clock):
+    store = ReservationStore(clock=clock, max_finished_holds=10_000_000)
+    item_ids = [f"H{i:06d}" for i in range(items)]
+    for item_id in item_ids:
+        store.register(item_id, capacity)
+    return store, item_ids
+
+
+def check_invariants(store, item_ids, capacity, granted):
+    for item_id in item_ids:
+        available = store.available(item_id)
+        assert available >= 0, f"{item_id} oversold"
+        assert available + granted.get(item_id, 0) == capacity, f"{item_id} capacity leaked"
+
+
+def report(label, count, elapsed):
+    print(f"{label:<32} {count:>9,} ops  {elapsed * 1000:>9.1f} ms  {count / elapsed:>12,.0f} ops/s")
+
+
+async def run_async(store, item_ids, holds):
+    granted = {}
+
+    async def reserve(item_id):
+        # Yield first so all tasks contend for the store at the same time
+        await asyncio.sleep(0)
+        try:
+            store.hold(item_id, 1)
+            granted[item_id] = granted.get(item_id, 0) + 1
+        except ReservationError:
+            pass
+
+    targets = [random.choice(item_ids) for _ in range(holds)]
+    start = time.perf_counter()
+    await asyncio.gather(*(reserve(item_id) for item_id in targets))
+    return granted, time.perf_counter() - start
+
+
+def run_threads(store, item_ids, holds, threads):
+    granted = {}
+
+    def reserve(item_id):
+        try:
+            store.hold(item_id, 1)
+            return item_id
+        except ReservationError:
+            return None
+
+    targets = [random.choice(item_ids) for _ in range(holds)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for item_id in pool.map(reserve, targets):
+            if item_id is not None:
+                granted[item_id] = granted.get(item_id, 0) + 1
+    return granted, time.perf_counter() - start
+
+
+def expire_all(store, clock):
+    clock.now += store.hold_ttl + 1
+    start = time.perf_counter()
+    released = store.expire_due()
+    return released, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--holds", type=int, default=20000, help="number of concurrent hold attempts")
+    parser.add_argument("--items", type=int, default=200, help="number of inventory items")
+    parser.add_argument("--capacity", type=int, default=50, help="units per inventory item")
+    parser.add_argument("--threads", type=int, default=16, help="worker threads for the threaded run")
+    args = parser.parse_args()
+
+    for mode in ("asyncio", "threads"):
+        clock = FakeClock()
+        store, item_ids = build_store(args.items, args.capacity, clock)
+
+        if mode == "asyncio":
+            granted, elapsed = asyncio.run(run_async(store, item_ids, args.holds))
+        else:
+            granted, elapsed = run_threads(store, item_ids, args.holds, args.threads)
+
+        check_invariants(store, item_ids, args.capacity, granted)
+        report(f"hold ({mode})", args.holds, elapsed)
+
+        released, elapsed = expire_all(store, clock)
+        assert released == sum(granted.values())
+        check_invariants(store, item_ids, args.capacity, {})
+        report(f"expire ({mode})", released, elapsed)
+
+    print("OK: no oversell, all expired capacity released")
+
+
+if __name__ == "__main__":
+    main()
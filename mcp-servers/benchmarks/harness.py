@@ -0,0 +1,464 @@
+"""Latency, throughput and allocation harness for the MCP tool servers.
+
+Drives each server's tools either in-process (through FastMCP's call_tool,
+so argument validation and the concurrency limit are included) or over
+stdio (a real server subprocess and MCP client session), with a configurable
+number of concurrent callers. For every tool it reports p50/p99 latency,
+throughput, response size and, in-process, tracemalloc peak and retained
+memory per call. A single tool can be run under cProfile, or sampled into
+folded stacks for flamegraph.pl / speedscope. Results can be saved as a
+baseline JSON file and later runs compared against it.
+
+Usage:
+    python benchmarks/harness.py --mode inprocess --iterations 200 --concurrency 8
+    python benchmarks/harness.py --mode stdio --servers payment --concurrency 16
+    python benchmarks/harness.py --save-baseline benchmarks/baselines/inprocess.json
+    python benchmarks/harness.py --compare benchmarks/baselines/inprocess.json --tolerance 0.25
+    python benchmarks/harness.py --profile search_hotels --flamegraph search_hotels.folded
+"""
+import argparse
+import asyncio
+import contextlib
+import cProfile
+import datetime
+import importlib
+import json
+import os
+import platform
+import pstats
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+CARD = {"card_number": "4111111111111111", "card_expiry": "12/30", "card_cvv": "123"}
+CITIES = ["Paris", "London", "Rome", "Tokyo", "Berlin", "Madrid"]
+
+# Arguments for one call: fn(rng, context) -> dict
+ArgFactory = Callable[[random.Random, Dict[str, Any]], Dict[str, Any]]
+
+
+class ServerSpec(NamedTuple):
+    script: str
+    module: str
+    # Calls the server's tools once to collect ids the other tools need
+    setup: Callable
+    tools: Dict[str, ArgFactory]
+
+
+def _route(rng):
+    origin, destination = rng.sample(CITIES, 2)
+    return {"origin": origin, "destination": destination, "date": "2026-11-01"}
+
+
+async def setup_transport(call, rng):
+    transport_ids, hotel_ids, reservation_ids = [], [], []
+    for day in range(1, 21):
+        transport_ids += [option["id"] for option in await call("search_flights", _route(rng))]
+        # Hotel options are per stay, so vary the dates to spread reservations over more inventory
+        hotels = await call("search_hotels", {"city": rng.choice(CITIES), "check_in": f"2026-11-{day:02d}",
+                                              "check_out": f"2026-11-{day + 3:02d}"})
+        hotel_ids += [hotel["id"] for hotel in hotels]
+    for transport_id in transport_ids[:20]:
+        reservation = await call("reserve_transport", {"transport_id": transport_id, "passenger_name": "Bench",
+                                                       "email": "bench@example.com"})
+        if reservation.get("reservation_id"):
+            reservation_ids.append(reservation["reservation_id"])
+    return {"transport_ids": transport_ids, "hotel_ids": hotel_ids, "reservation_ids": reservation_ids}
+
+
+async def setup_payment(call, rng):
+    payment_ids = []
+    for i in range(20):
+        payment = await call("process_payment", {"reservation_id": f"BENCH-{i}", "amount": 100.0, "currency": "USD",
+                                                 "cardholder_name": "Bench", "email": "bench@example.com", **CARD})
+        payment_ids.append(payment["payment_id"])
+    return {"payment_ids": payment_ids}
+
+
+async def setup_email(call, rng):
+    email_ids = []
+    for i in range(20):
+        email = await call("send_booking_confirmation", _confirmation_args(rng, {}))
+        email_ids.append(email["email_id"])
+    return {"email_ids": email_ids}
+
+
+def _payment_args(rng, context):
+    return {"reservation_id": f"R{rng.randrange(10**9)}", "amount": round(rng.uniform(20, 900), 2),
+            "currency": "USD", "cardholder_name": "Bench User", "email": "bench@example.com", **CARD}
+
+
+def _confirmation_args(rng, context):
+    booking = {"booking_reference": f"R{rng.randrange(10**9)}", "origin": "Paris", "destination": "Rome",
+               "departure": "2026-11-01 09:00", "company": "SkyWings", "ticket_class": "Economy"}
+    return {"recipient_email": "bench@example.com", "recipient_name": "Bench User", "booking_type": "flight",
+            "booking_details": json.dumps(booking)}
+
+
+SERVERS: Dict[str, ServerSpec] = {
+    "transport-hotels": ServerSpec("transport-hotels/transport_hotels.py", "transport_hotels", setup_transport, {
+        "search_flights": lambda rng, ctx: _route(rng),
+        "search_trains": lambda rng, ctx: _route(rng),
+        "search_buses": lambda rng, ctx: _route(rng),
+        "search_hotels": lambda rng, ctx: {"city": rng.choice(CITIES), "check_in": "2026-11-01",
+                                           "check_out": "2026-11-04", "guests": rng.randint(1, 3)},
+        "search_flexible_dates": lambda rng, ctx: {**_route(rng), "start_date": "2026-11-01", "end_date": "2026-11-30"},
+        "hotel_availability_calendar": lambda rng, ctx: {"city": rng.choice(CITIES), "month": "2026-11",
+                                                         "nights": rng.randint(1, 7), "guests": rng.randint(1, 3)},
+        "get_transport_details": lambda rng, ctx: {"transport_id": rng.choice(ctx["transport_ids"])},
+        "get_hotel_details": lambda rng, ctx: {"hotel_id": rng.choice(ctx["hotel_ids"])},
+        "reserve_hotel": lambda rng, ctx: {"hotel_id": rng.choice(ctx["hotel_ids"]), "guest_name": "Bench",
+                                           "email": "bench@example.com"},
+        "get_reservation_status": lambda rng, ctx: {"reservation_id": rng.choice(ctx["reservation_ids"])},
+    }),
+    "payment": ServerSpec("payment/payment_service.py", "payment_service", setup_payment, {
+        "validate_payment_details": lambda rng, ctx: dict(CARD),
+        "process_payment": _payment_args,
+        "process_payments_batch": lambda rng, ctx: {"payments": json.dumps([_payment_args(rng, ctx) for _ in range(10)])},
+        "get_payment_status": lambda rng, ctx: {"payment_id": rng.choice(ctx["payment_ids"])},
+        "payment_report": lambda rng, ctx: {"group_by": "day,currency,status"},
+    }),
+    "email-service": ServerSpec("email-service/email_service.py", "email_service", setup_email, {
+        "send_booking_confirmation": _confirmation_args,
+        "send_itinerary_email": lambda rng, ctx: {"recipient_email": "bench@example.com", "recipient_name": "Bench",
+                                                  "itinerary_text": "Day 1: Louvre\nDay 2: Orsay\n" * 20},
+        "check_email_status": lambda rng, ctx: {"email_id": rng.choice(ctx["email_ids"])},
+    }),
+}
+
+
+# Clients
+
+def _text(content) -> str:
+    return "".join(getattr(block, "text", "") for block in content)
+
+
+class InProcessClient:
+    def __init__(self, module):
+        self.server = module.mcp
+
+    async def call_raw(self, tool: str, args: Dict[str, Any]) -> str:
+        result = await self.server.call_tool(tool, args)
+        return _text(result[0] if isinstance(result, tuple) else result)
+
+
+class StdioClient:
+    def __init__(self, session):
+        self.session = session
+
+    async def call_raw(self, tool: str, args: Dict[str, Any]) -> str:
+        result = await self.session.call_tool(tool, args)
+        if result.isError:
+            raise RuntimeError(_text(result.content))
+        return _text(result.content)
+
+
+@contextlib.asynccontextmanager
+async def open_client(name: str, mode: str, env: Dict[str, str]):
+    spec = SERVERS[name]
+    if mode == "inprocess":
+        sys.path.insert(0, os.path.dirname(os.path.join(BASE, spec.script)))
+        yield InProcessClient(importlib.import_module(spec.module))
+        return
+
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(BASE, spec.script)],
+                                   env={**os.environ, **env})
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield StdioClient(session)
+
+
+# Measurement
+
+def _failed(text: str) -> bool:
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError:
+        return True
+    return isinstance(payload, dict) and payload.get("success") is False
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def measure_latency(client, tool: str, make_args: ArgFactory, context, iterations: int, concurrency: int,
+                          rng: random.Random) -> Dict[str, Any]:
+    calls = [make_args(rng, context) for _ in range(iterations)]
+    latencies: List[float] = []
+    sizes: List[int] = []
+    failures = 0
+    next_call = iter(calls)
+
+    async def worker():
+        nonlocal failures
+        for args in next_call:
+            start = time.perf_counter()
+            try:
+                text = await client.call_raw(tool, args)
+            except Exception:
+                text = ""
+            latencies.append(time.perf_counter() - start)
+            sizes.append(len(text.encode()))
+            failures += _failed(text)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "calls": iterations,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "calls_per_s": round(iterations / elapsed, 1),
+        "response_bytes": round(sum(sizes) / len(sizes)),
+        "failures": failures,
+    }
+
+
+async def measure_allocations(client, tool: str, make_args: ArgFactory, context, iterations: int,
+                              rng: random.Random) -> Dict[str, Any]:
+    """Sequential calls under tracemalloc: peak memory allocated during a call and memory it left behind."""
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            args = make_args(rng, context)
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await client.call_raw(tool, args)
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(after - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kib": round(sum(peaks) / len(peaks) / 1024, 1),
+        "retained_bytes": round(sum(retained) / len(retained)),
+    }
+
+
+async def profile_tool(client, tool: str, make_args: ArgFactory, context, iterations: int, rng: random.Random,
+                       profile_out: str) -> None:
+    calls = [make_args(rng, context) for _ in range(iterations)]
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for args in calls:
+        await client.call_raw(tool, args)
+    profiler.disable()
+    profiler.dump_stats(profile_out)
+    print(f"\ncProfile of {iterations} {tool} calls written to {profile_out}")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+
+class StackSampler:
+    """Samples the event loop thread's stack every `interval` seconds into folded-stack counts."""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        # The sampler needs the GIL to take a sample; hand it over more often than every 5 ms
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(self.interval / 2)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._sampler.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as out:
+            for stack, count in self.stacks.most_common():
+                out.write(f"{stack} {count}\n")
+
+
+async def flamegraph_tool(client, tool: str, make_args: ArgFactory, context, iterations: int, rng: random.Random,
+                          path: str) -> None:
+    calls = [make_args(rng, context) for _ in range(iterations)]
+    with StackSampler() as sampler:
+        for args in calls:
+            await client.call_raw(tool, args)
+    sampler.write(path)
+    print(f"{sum(sampler.stacks.values())} stack samples of {tool} written to {path} "
+          f"(render with flamegraph.pl or https://www.speedscope.app)")
+
+
+# Baselines
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a description of every metric that got worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for key, current in results["tools"].items():
+        previous = baseline["tools"].get(key)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p99_ms", "alloc_peak_kib", "response_bytes"):
+            if metric in current and previous.get(metric):
+                change = current[metric] / previous[metric] - 1
+                if change > tolerance:
+                    regressions.append(f"{key} {metric}: {previous[metric]} -> {current[metric]} (+{change:.0%})")
+        if current["calls_per_s"] < previous["calls_per_s"] * (1 - tolerance):
+            regressions.append(f"{key} calls_per_s: {previous['calls_per_s']} -> {current['calls_per_s']}")
+    return regressions
+
+
+def print_table(results: Dict[str, Any]) -> None:
+    print(f"\n{'tool':<44} {'p50 ms':>9} {'p99 ms':>9} {'calls/s':>9} {'bytes':>8} {'fail':>5} "
+          f"{'peak KiB':>9} {'kept B':>8}")
+    for key, row in results["tools"].items():
+        print(f"{key:<44} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['calls_per_s']:>9.0f} "
+              f"{row['response_bytes']:>8} {row['failures']:>5} {row.get('alloc_peak_kib', '-'):>9} "
+              f"{row.get('retained_bytes', '-'):>8}")
+
+
+async def run(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    results = {
+        "meta": {
+            "mode": args.mode,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        },
+        "tools": {},
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Keep the servers' SQLite stores out of mcp-servers/data
+        env = {
+            "PAYMENT_LEDGER_PATH": os.path.join(workdir, "payments.db"),
+            "EMAIL_STORE_PATH": os.path.join(workdir, "emails.db"),
+            "EVENT_BUS_PATH": os.path.join(workdir, "events.db"),
+        }
+        os.environ.update(env)
+
+        for name in args.servers:
+            spec = SERVERS[name]
+            tools = {tool: factory for tool, factory in spec.tools.items() if not args.tools or tool in args.tools}
+            if args.profile or args.flamegraph:
+                tools = {tool: factory for tool, factory in tools.items() if tool == args.profile}
+            if not tools:
+                continue
+
+            async with open_client(name, args.mode, env) as client:
+                async def call(tool, tool_args):
+                    return json.loads(await client.call_raw(tool, tool_args))
+                context = await spec.setup(call, rng)
+
+                for tool, make_args in tools.items():
+                    if args.profile:
+                        if args.profile_out:
+                            await profile_tool(client, tool, make_args, context, args.iterations, rng, args.profile_out)
+                        if args.flamegraph:
+                            await flamegraph_tool(client, tool, make_args, context, args.iterations, rng,
+                                                  args.flamegraph)
+                        continue
+
+                    # Warm up caches and lazily started workers before measuring
+                    await measure_latency(client, tool, make_args, context, min(20, args.iterations), 1, rng)
+                    row = await measure_latency(client, tool, make_args, context, args.iterations,
+                                                args.concurrency, rng)
+                    if args.mode == "inprocess" and args.alloc_iterations:
+                        row.update(await measure_allocations(client, tool, make_args, context,
+                                                             args.alloc_iterations, rng))
+                    results["tools"][f"{name}.{tool}"] = row
+                    print(f"  {name}.{tool}: p50 {row['p50_ms']:.2f} ms, p99 {row['p99_ms']:.2f} ms", flush=True)
+
+            if args.mode == "inprocess":
+                module = importlib.import_module(spec.module)
+                if hasattr(module, "outbound"):
+                    await module.outbound.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("inprocess", "stdio"), default="inprocess")
+    parser.add_argument("--servers", nargs="+", choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument("--tools", nargs="+", help="only run these tools")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per tool")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent callers per tool")
+    parser.add_argument("--alloc-iterations", type=int, default=50,
+                        help="sequential calls per tool under tracemalloc (in-process only, 0 to skip)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--profile", metavar="TOOL", help="profile a single tool instead of benchmarking")
+    parser.add_argument("--profile-out", metavar="PATH", help="cProfile output for --profile (default TOOL.prof)")
+    parser.add_argument("--flamegraph", metavar="PATH", help="with --profile: write sampled folded stacks to PATH")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare the results with a baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative slowdown before --compare reports a regression")
+    args = parser.parse_args()
+
+    if args.profile:
+        if args.mode != "inprocess":
+            parser.error("--profile requires --mode inprocess")
+        if not any(args.profile in spec.tools for spec in SERVERS.values()):
+            parser.error(f"unknown tool {args.profile}")
+        if not args.flamegraph and not args.profile_out:
+            args.profile_out = f"{args.profile}.prof"
+    elif args.flamegraph:
+        parser.error("--flamegraph requires --profile TOOL")
+
+    results = asyncio.run(run(args))
+    if args.profile:
+        return
+
+    print_table(results)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w") as out:
+            json.dump(results, out, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["mode"] != results["meta"]["mode"]:
+            print(f"\nWarning: baseline was recorded in {baseline['meta']['mode']} mode")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Shared helpers for the Travel Planner MCP servers
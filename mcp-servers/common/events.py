@@ -0,0 +1,277 @@
+"""Local event bus connecting the MCP servers.
+
+Events are appended to a SQLite log (`data/events.db`) shared by every
+server process on the machine. Each server subscribes under a consumer name
+and a background task polls the log for new events on its topics, handing
+them to the handler in order and recording the consumer's offset after each
+batch.
+
+Delivery is at-least-once: a process that stops between handling an event
+and committing its offset sees that event again on restart, and a producer
+may publish the same fact twice. Every event therefore carries a dedupe key
+(publishing a key that is already in the log is a no-op) and handlers must
+be idempotent, which together give exactly-once effects.
+
+With a retention period, events that every consumer has processed are
+deleted once they are older than it. A consumer's offset also moves past
+events on other topics, so a consumer whose topics are quiet does not hold
+back the rest of the log. Dedupe keys go with the deleted events, so
+retention must outlast any producer retry.
+"""
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_EVENTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "events.db")
+
+# Topics
+PAYMENT_COMPLETED = "payment.completed"
+RESERVATION_CONFIRMED = "reservation.confirmed"
+
+# How often consumers delete events past the retention period, and how many per transaction
+PRUNE_INTERVAL_SECONDS = 600
+PRUNE_BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_topic_seq ON events (topic, seq);
+CREATE TABLE IF NOT EXISTS consumer_offsets (
+    consumer TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    consumer TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    error TEXT NOT NULL,
+    failed_at REAL NOT NULL,
+    PRIMARY KEY (consumer, seq)
+);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class Event(NamedTuple):
+    seq: int
+    topic: str
+    dedupe_key: str
+    payload: Dict[str, Any]
+    created_at: float
+
+
+EventHandler = Callable[[Event], Awaitable[None]]
+
+
+class _Subscription(NamedTuple):
+    consumer: str
+    topics: Tuple[str, ...]
+    handler: EventHandler
+
+
+class EventBus:
+    """Durable publish/subscribe over a shared SQLite event log."""
+
+    def __init__(self, path: str = DEFAULT_EVENTS_PATH, poll_interval: float = 0.05, batch_size: int = 256,
+                 max_attempts: int = 5, retry_delay: float = 0.5, retention_hours: Optional[float] = None):
+        self.path = path
+        self.retention_hours = retention_hours
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Several server processes write to the same log
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._subscriptions: List[_Subscription] = []
+
+    # Publishing
+
+    def publish_many(self, events: Iterable[Tuple[str, Dict[str, Any], str]]) -> int:
+        """Append (topic, payload, dedupe_key) events in one transaction. Returns how many were new."""
+        now = time.time()
+        rows = [(topic, dedupe_key, json.dumps(payload), now) for topic, payload, dedupe_key in events]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO events (topic, dedupe_key, payload, created_at) VALUES (?, ?, ?, ?)", rows
+                )
+                appended = self._conn.total_changes - before
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return appended
+
+    async def publish(self, topic: str, payload: Dict[str, Any], dedupe_key: str) -> bool:
+        """Publish one event; returns False if an event with the same dedupe key was already published."""
+        return await asyncio.to_thread(self.publish_many, [(topic, payload, dedupe_key)]) == 1
+
+    async def publish_batch(self, events: Sequence[Tuple[str, Dict[str, Any], str]]) -> int:
+        if not events:
+            return 0
+        return await asyncio.to_thread(self.publish_many, events)
+
+    # Consuming
+
+    def subscribe(self, consumer: str, topics: Sequence[str], handler: EventHandler) -> None:
+        """Deliver events on `topics` to `handler` once `run_consumers` is running.
+
+        Each consumer name has its own offset, so it sees every event exactly
+        once in log order, barring redelivery after a crash.
+        """
+        self._subscriptions.append(_Subscription(consumer, tuple(topics), handler))
+
+    async def run_consumers(self) -> None:
+        """Poll the log for every subscription until cancelled (run as a background task).
+
+        With a retention period, also deletes expired events every PRUNE_INTERVAL_SECONDS.
+        """
+        tasks = [self._consume(subscription) for subscription in self._subscriptions]
+        if self.retention_hours is not None:
+            tasks.append(self._prune_periodically())
+        await asyncio.gather(*tasks)
+
+    def offset(self, consumer: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT seq FROM consumer_offsets WHERE consumer = ?", (consumer,)).fetchone()
+        return row[0] if row else 0
+
+    def lag(self, consumer: str, topics: Sequence[str]) -> int:
+        """Number of events on `topics` the consumer has not processed yet."""
+        offset = self.offset(consumer)
+        placeholders = ", ".join("?" * len(topics))
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM events WHERE seq > ? AND topic IN ({placeholders})", (offset, *topics)
+            ).fetchone()[0]
+
+    def fetch(self, topics: Sequence[str], after: int, limit: int) -> List[Event]:
+        return self.fetch_with_head(topics, after, limit)[0]
+
+    def fetch_with_head(self, topics: Sequence[str], after: int, limit: int) -> Tuple[List[Event], int]:
+        """Events on `topics` after `after`, and the last seq in the log as of the same read."""
+        placeholders = ", ".join("?" * len(topics))
+        with self._lock:
+            # One read transaction, so no event on `topics` can land at or below the head unseen
+            self._conn.execute("BEGIN")
+            try:
+                rows = self._conn.execute(
+                    f"SELECT seq, topic, dedupe_key, payload, created_at FROM events "
+                    f"WHERE seq > ? AND topic IN ({placeholders}) ORDER BY seq LIMIT ?",
+                    (after, *topics, limit),
+                ).fetchall()
+                head = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+            finally:
+                self._conn.execute("COMMIT")
+        events = [Event(seq, topic, key, json.loads(payload), created_at)
+                  for seq, topic, key, payload, created_at in rows]
+        return events, head
+
+    def prune(self, older_than: float) -> int:
+        """Delete events created before `older_than` (Unix seconds) that every consumer has processed.
+
+        Returns how many were deleted. Nothing is deleted before a consumer
+        has recorded an offset.
+        """
+        deleted = 0
+        while True:
+            with self._lock:
+                before = self._conn.total_changes
+                self._conn.execute(
+                    "DELETE FROM events WHERE seq IN (SELECT seq FROM events "
+                    "WHERE seq <= (SELECT COALESCE(MIN(seq), 0) FROM consumer_offsets) AND created_at < ? "
+                    "ORDER BY seq LIMIT ?)",
+                    (older_than, PRUNE_BATCH_SIZE),
+                )
+                count = self._conn.total_changes - before
+            deleted += count
+            if count < PRUNE_BATCH_SIZE:
+                return deleted
+
+    def commit_offset(self, consumer: str, seq: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO consumer_offsets (consumer, seq) VALUES (?, ?) "
+                "ON CONFLICT(consumer) DO UPDATE SET seq = excluded.seq WHERE excluded.seq > consumer_offsets.seq",
+                (consumer, seq),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def _consume(self, subscription: _Subscription) -> None:
+        offset = committed = await asyncio.to_thread(self.offset, subscription.consumer)
+        while True:
+            try:
+                events, head = await asyncio.to_thread(self.fetch_with_head, subscription.topics, offset,
+                                                       self.batch_size)
+            except sqlite3.Error:
+                logger.exception("Event consumer %s could not read the log", subscription.consumer)
+                await asyncio.sleep(self.retry_delay)
+                continue
+
+            for event in events:
+                await self._handle(subscription, event)
+                offset = event.seq
+            if len(events) < self.batch_size:
+                # Nothing else on our topics up to the head, so move past the other topics' events too
+                offset = max(offset, head)
+            if offset > committed:
+                try:
+                    await asyncio.to_thread(self.commit_offset, subscription.consumer, offset)
+                    committed = offset
+                except sqlite3.Error:
+                    # Not fatal: the batch is redelivered after a restart and handlers are idempotent
+                    logger.exception("Event consumer %s could not commit its offset", subscription.consumer)
+            if not events:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _prune_periodically(self) -> None:
+        while True:
+            try:
+                deleted = await asyncio.to_thread(self.prune, time.time() - self.retention_hours * 3600)
+                if deleted:
+                    logger.info("Deleted %d events older than %s hours", deleted, self.retention_hours)
+            except sqlite3.Error:
+                logger.exception("Could not delete expired events")
+            await asyncio.sleep(PRUNE_INTERVAL_SECONDS)
+
+    async def _handle(self, subscription: _Subscription, event: Event) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await subscription.handler(event)
+                return
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    logger.exception("Consumer %s gave up on event %d (%s)", subscription.consumer, event.seq, event.topic)
+                    await asyncio.to_thread(self._dead_letter, subscription.consumer, event.seq, repr(e))
+                    return
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    def _dead_letter(self, consumer: str, seq: int, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dead_letters (consumer, seq, error, failed_at) VALUES (?, ?, ?, ?)",
+                (consumer, seq, error, time.time()),
+            )
@@ -0,0 +1,80 @@
+"""Time-ordered unique identifiers shared by the MCP servers.
+
+Ids are 128-bit ULID-style values written as 26 Crockford base32 characters:
+
+    48 bits  milliseconds since the Unix epoch
+    40 bits  random node id, drawn per process (and again after fork)
+    40 bits  per-process sequence, starting at a random offset
+
+The timestamp comes first, so ids sort by creation time and a store keyed by
+id can range-scan a time window (see `min_id_for_time`). Within a process the
+sequence makes ids strictly unique without taking a lock (`next()` on an
+`itertools.count` is atomic); the random node id keeps separate processes
+apart.
+"""
+import itertools
+import os
+import secrets
+import time
+
+NODE_BITS = 40
+SEQUENCE_BITS = 40
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+ID_LENGTH = 26
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_PAIRS = [high + low for high in CROCKFORD_ALPHABET for low in CROCKFORD_ALPHABET]
+_DECODE = {char: value for value, char in enumerate(CROCKFORD_ALPHABET)}
+
+
+def _encode(value: int, chars: int) -> str:
+    """Crockford base32 for the low 5 * `chars` bits of value (`chars` must be even)."""
+    return "".join([_PAIRS[(value >> shift) & 0x3FF] for shift in range(5 * chars - 10, -10, -10)])
+
+
+# The three fields fall on character boundaries (10 + 8 + 8 characters), so
+# each is encoded separately: the node once per process, the timestamp once
+# per millisecond and only the sequence on every call.
+_node = ""
+_sequence = iter(())
+# (millisecond, encoded timestamp + node), replaced as a whole so threads never see a torn pair
+_last = (-1, "")
+
+
+def _reseed() -> None:
+    global _node, _sequence, _last
+    _node = _encode(secrets.randbits(NODE_BITS), 8)
+    _last = (-1, "")
+    # Leave headroom so the sequence does not wrap in practice
+    _sequence = itertools.count(secrets.randbits(SEQUENCE_BITS - 1))
+
+
+_reseed()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed)
+
+
+def new_id(prefix: str = "") -> str:
+    """Return a new unique, time-ordered id, e.g. new_id("PAY-") -> "PAY-01JAB3..."."""
+    global _last
+    millis = time.time_ns() // 1_000_000
+    last = _last
+    if last[0] != millis:
+        last = _last = (millis, _encode(millis, 10) + _node)
+    sequence = next(_sequence) & SEQUENCE_MASK
+    pairs = _PAIRS
+    return (prefix + last[1] + pairs[sequence >> 30] + pairs[(sequence >> 20) & 0x3FF]
+            + pairs[(sequence >> 10) & 0x3FF] + pairs[sequence & 0x3FF])
+
+
+def id_timestamp(identifier: str) -> float:
+    """Creation time (Unix seconds) of an id produced by new_id, with or without its prefix."""
+    millis = 0
+    for char in identifier[-ID_LENGTH:][:10]:
+        millis = millis * 32 + _DECODE[char]
+    return millis / 1000
+
+
+def min_id_for_time(timestamp: float, prefix: str = "") -> str:
+    """Smallest possible id created at `timestamp`, for range scans (`id >= min_id_for_time(start)`)."""
+    return prefix + _encode(int(timestamp * 1000), 10) + "0" * (ID_LENGTH - 10)
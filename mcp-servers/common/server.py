@@ -0,0 +1,128 @@
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Union
+from mcp.server.fastmcp import FastMCP
+import argparse
+import inspect
+import logging
+import os
+
+import anyio
+
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+logger = logging.getLogger(__name__)
+
+
+class ToolServer(FastMCP):
+    """FastMCP server with a tool concurrency limit and shutdown hooks.
+
+    Over stdio every client spawns its own process, so neither matters much.
+    Over SSE or streamable HTTP a single long-lived process serves every
+    connected agent session, sharing one copy of the server's state; the
+    concurrency limit keeps a burst of sessions from starving each other and
+    the shutdown hooks let stores flush before the process exits.
+    """
+
+    def __init__(self, name: str, default_port: int = 8000, **settings: Any):
+        super().__init__(name, port=default_port, **settings)
+        self._tool_slots: Optional[anyio.Semaphore] = None
+        self._shutdown_hooks: List[Callable[[], Union[None, Awaitable[None]]]] = []
+        self._background_tasks: List[Callable[[], Awaitable[None]]] = []
+
+    def limit_concurrency(self, max_concurrent_tools: int) -> None:
+        """Cap the number of tool calls executing at once; extra calls wait for a slot."""
+        self._tool_slots = anyio.Semaphore(max_concurrent_tools) if max_concurrent_tools > 0 else None
+
+    def on_shutdown(self, hook: Callable[[], Union[None, Awaitable[None]]]) -> Callable:
+        """Register a (sync or async) callable to run once the transport has stopped."""
+        self._shutdown_hooks.append(hook)
+        return hook
+
+    def add_background_task(self, task: Callable[[], Awaitable[None]]) -> Callable:
+        """Run an async callable for the lifetime of the process, alongside the transport.
+
+        Unlike FastMCP's lifespan, which runs once per client session over
+        HTTP, background tasks are started once per process and cancelled
+        when the transport stops, before the shutdown hooks run.
+        """
+        self._background_tasks.append(task)
+        return task
+
+    async def call_tool(self, name: str, arguments: dict) -> Any:
+        if self._tool_slots is None:
+            return await super().call_tool(name, arguments)
+        async with self._tool_slots:
+            return await super().call_tool(name, arguments)
+
+    async def run_shutdown_hooks(self) -> None:
+        for hook in reversed(self._shutdown_hooks):
+            try:
+                result = hook()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Shutdown hook %r failed", hook)
+
+
+def parse_args(server: ToolServer, argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parse transport options from the command line, falling back to MCP_* environment variables."""
+    parser = argparse.ArgumentParser(description=f"Run the {server.name} MCP server")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=os.getenv("MCP_TRANSPORT", "stdio"),
+                        help="stdio (one process per client) or a network transport shared by many clients")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", server.settings.host),
+                        help="interface to bind for sse/streamable-http")
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", server.settings.port)),
+                        help="port to bind for sse/streamable-http")
+    parser.add_argument("--max-concurrency", type=int, default=int(os.getenv("MCP_MAX_CONCURRENCY", "64")),
+                        help="maximum tool calls executing at once (0 = unlimited)")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("MCP_GRACEFUL_TIMEOUT", "10")),
+                        help="seconds to let in-flight requests finish on shutdown")
+    parser.add_argument("--stateless", action="store_true",
+                        default=os.getenv("MCP_STATELESS_HTTP", "").lower() in ("1", "true", "yes"),
+                        help="streamable-http only: do not keep per-client sessions")
+    return parser.parse_args(argv)
+
+
+async def serve(server: ToolServer, args: argparse.Namespace) -> None:
+    """Run the server on the chosen transport with its background tasks, then run its shutdown hooks."""
+    server.limit_concurrency(args.max_concurrency)
+    try:
+        async with anyio.create_task_group() as background:
+            for task in server._background_tasks:
+                background.start_soon(task)
+            try:
+                await _run_transport(server, args)
+            finally:
+                background.cancel_scope.cancel()
+    finally:
+        await server.run_shutdown_hooks()
+
+
+async def _run_transport(server: ToolServer, args: argparse.Namespace) -> None:
+    if args.transport == "stdio":
+        await server.run_stdio_async()
+        return
+
+    import uvicorn
+
+    server.settings.host = args.host
+    server.settings.port = args.port
+    server.settings.stateless_http = args.stateless
+    app = server.sse_app() if args.transport == "sse" else server.streamable_http_app()
+
+    # uvicorn stops accepting connections on SIGINT/SIGTERM and waits up
+    # to the graceful timeout for in-flight requests before closing them
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=server.settings.log_level.lower(),
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    logger.info("Serving %s over %s on %s:%s", server.name, args.transport, args.host, args.port)
+    await uvicorn.Server(config).serve()
+
+
+def run_server(server: ToolServer, argv: Optional[Sequence[str]] = None) -> None:
+    """Entry point shared by the MCP servers' `__main__` blocks."""
+    args = parse_args(server, argv)
+    anyio.run(serve, server, args)
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from common.events import EventBus
+
+
+@pytest.fixture
+def bus(tmp_path):
+    bus = EventBus(str(tmp_path / "events.db"), poll_interval=0.01)
+    yield bus
+    bus.close()
+
+
+def count(bus):
+    return bus._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+def test_prune_keeps_events_a_consumer_has_not_processed(bus):
+    bus.publish_many([("a", {"n": n}, f"a-{n}") for n in range(4)])
+    assert bus.prune(time.time() + 1) == 0
+    bus.commit_offset("first", 4)
+    bus.commit_offset("second", 2)
+    assert bus.prune(time.time() + 1) == 2
+    assert [event.payload["n"] for event in bus.fetch(["a"], 0, 10)] == [2, 3]
+
+
+def test_prune_keeps_recent_events(bus):
+    bus.publish_many([("a", {}, "old")])
+    bus._conn.execute("UPDATE events SET created_at = created_at - 7200")
+    bus.publish_many([("a", {}, "new")])
+    bus.commit_offset("consumer", 2)
+    assert bus.prune(time.time() - 3600) == 1
+    assert [event.dedupe_key for event in bus.fetch(["a"], 0, 10)] == ["new"]
+
+
+def test_consumer_offset_moves_past_other_topics(bus):
+    seen = []
+
+    async def handler(event):
+        seen.append(event.dedupe_key)
+
+    async def consume():
+        bus.subscribe("consumer", ["a"], handler)
+        task = asyncio.ensure_future(bus.run_consumers())
+        for _ in range(200):
+            if bus.offset("consumer") == 3:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    bus.publish_many([("a", {}, "a-1"), ("b", {}, "b-1"), ("b", {}, "b-2")])
+    asyncio.run(consume())
+    assert seen == ["a-1"]
+    assert bus.offset("consumer") == 3
+    assert bus.prune(time.time() + 1) == 3
+    assert count(bus) == 0
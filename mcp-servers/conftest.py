@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# The servers import each other's modules as top-level modules (see the
+# sys.path setup at the top of each server script); tests do the same
+BASE = os.path.dirname(os.path.abspath(__file__))
+for path in (BASE, os.path.join(BASE, "transport-hotels"), os.path.join(BASE, "payment"),
+             os.path.join(BASE, "email-service")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Servers imported by tests keep their event log, ledger and email store out of data/
+DATA = tempfile.mkdtemp(prefix="mcp-tests-")
+for variable, name in (("EVENT_BUS_PATH", "events.db"), ("PAYMENT_LEDGER_PATH", "payments.db"),
+                       ("EMAIL_STORE_PATH", "emails.db")):
+    os.environ.setdefault(variable, os.path.join(DATA, name))
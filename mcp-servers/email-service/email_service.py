@@ -1,110 +1,85 @@
 from typing import Any, Dict, List, Optional
-from mcp.server.fastmcp import FastMCP
+import asyncio
 import json
 import datetime
-import random
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.events import DEFAULT_EVENTS_PATH, RESERVATION_CONFIRMED, EventBus
+from common.ids import new_id
+from common.server import ToolServer, run_server
+from email_store import DEFAULT_STORE_PATH, EmailStore
+from outbound import QUEUED, OutboundMessage, OutboundQueue
+from templates import render_itinerary_email, render_booking_confirmation
 
 # Initialize FastMCP server
-mcp = FastMCP("email-service")
+mcp = ToolServer("email-service", default_port=8103)
+
+# Persistent, bounded store for sent emails (metadata indexed, bodies deduplicated)
+email_store = EmailStore(
+    os.getenv("EMAIL_STORE_PATH", DEFAULT_STORE_PATH),
+    max_records=int(os.getenv("EMAIL_MAX_RECORDS", "100000")),
+    retention_days=float(os.getenv("EMAIL_RETENTION_DAYS", "30")),
+    in_flight_timeout_hours=float(os.getenv("EMAIL_IN_FLIGHT_TIMEOUT_HOURS", "24")),
+)
+
+# Outbound delivery pipeline (simulated unless SMTP_HOST is set)
+outbound = OutboundQueue(
+    on_status=email_store.update_status,
+    workers=int(os.getenv("EMAIL_WORKERS", "4")),
+    batch_size=int(os.getenv("EMAIL_BATCH_SIZE", "20")),
+    max_attempts=int(os.getenv("EMAIL_MAX_ATTEMPTS", "5")),
+)
+mcp.on_shutdown(email_store.close)
+mcp.on_shutdown(outbound.stop)
+
+# Emails still queued or sending this long after they were stored were left by a process that stopped
+RESUME_AFTER_SECONDS = float(os.getenv("EMAIL_RESUME_AFTER_SECONDS", "600"))
 
-# In-memory store for sent emails (in a real app, this would be a database)
-sent_emails = {}
+# Event bus shared with the payment and transport/hotel servers
+events = EventBus(os.getenv("EVENT_BUS_PATH", DEFAULT_EVENTS_PATH),
+                  retention_hours=float(os.getenv("EVENT_RETENTION_HOURS", "168")))
+mcp.on_shutdown(events.close)
+
+logger = logging.getLogger(__name__)
 
 # Helper functions
 def generate_email_id():
     """Generate a unique email ID"""
-    return f"EMAIL-{random.randint(10000, 99999)}"
+    return new_id("EMAIL-")
 
 def format_itinerary_email(name, itinerary, bookings=None):
     """Format an itinerary email"""
-    current_date = datetime.datetime.now().strftime("%Y-%m-%d")
-    
-    email_subject = f"Your Travel Itinerary - {current_date}"
-    
-    # Start with basic HTML template
-    email_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background-color: #4a90e2; color: white; padding: 10px 20px; text-align: center; }}
-            .content {{ padding: 20px; background-color: #f9f9f9; }}
-            .footer {{ text-align: center; padding: 10px; font-size: 12px; color: #999; }}
-            .booking {{ margin-bottom: 20px; padding: 15px; border: 1px solid #ddd; background-color: white; }}
-            .booking h3 {{ color: #4a90e2; margin-top: 0; }}
-            .itinerary {{ white-space: pre-line; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>Your Travel Itinerary</h1>
-            </div>
-            <div class="content">
-                <p>Dear {name},</p>
-                <p>Thank you for using our Travel Planner. Below is your complete travel itinerary.</p>
-                
-                <h2>Your Itinerary</h2>
-                <div class="itinerary">
-                    {itinerary}
-                </div>
-    """
+    return render_itinerary_email(name, itinerary, bookings)
+
+async def queue_booking_confirmation(recipient_email, recipient_name, booking_type, booking, dedupe_key=None):
+    """Render, store and queue a booking confirmation; returns None if dedupe_key was already sent"""
+    email_id = generate_email_id()
     
-    # Add booking details if available
-    if bookings and len(bookings) > 0:
-        email_body += """
-                <h2>Your Bookings</h2>
-        """
-        
-        for booking in bookings:
-            booking_type = booking.get("type", "Unknown")
-            email_body += f"""
-                <div class="booking">
-                    <h3>{booking_type} Booking</h3>
-            """
-            
-            if booking_type.lower() in ["flight", "train", "bus"]:
-                email_body += f"""
-                    <p><strong>Booking Reference:</strong> {booking.get("booking_reference", "N/A")}</p>
-                    <p><strong>From:</strong> {booking.get("origin", "N/A")}</p>
-                    <p><strong>To:</strong> {booking.get("destination", "N/A")}</p>
-                    <p><strong>Date/Time:</strong> {booking.get("departure", "N/A")}</p>
-                    <p><strong>Company:</strong> {booking.get("company", "N/A")}</p>
-                """
-                if "seat" in booking:
-                    email_body += f"""<p><strong>Seat:</strong> {booking["seat"]}</p>"""
-            elif booking_type.lower() == "hotel":
-                email_body += f"""
-                    <p><strong>Booking Reference:</strong> {booking.get("booking_reference", "N/A")}</p>
-                    <p><strong>Hotel:</strong> {booking.get("name", "N/A")}</p>
-                    <p><strong>Check-in:</strong> {booking.get("check_in", "N/A")}</p>
-                    <p><strong>Check-out:</strong> {booking.get("check_out", "N/A")}</p>
-                    <p><strong>Room Type:</strong> {booking.get("room_type", "N/A")}</p>
-                """
-            
-            email_body += """
-                </div>
-            """
+    # Render the confirmation from the precompiled templates
+    email_content = render_booking_confirmation(recipient_name, booking_type, booking)
     
-    # Complete the email template
-    email_body += """
-                <p>We hope you have a wonderful trip!</p>
-                <p>Best regards,<br/>Travel Planner Team</p>
-            </div>
-            <div class="footer">
-                <p>This is an automated message. Please do not reply to this email.</p>
-                <p>&copy; 2023 Travel Planner. All rights reserved.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    return {
-        "subject": email_subject,
-        "body": email_body
+    email_record = {
+        "email_id": email_id,
+        "recipient": recipient_email,
+        "recipient_name": recipient_name,
+        "subject": email_content["subject"],
+        "status": QUEUED,
+        "booking_type": booking_type,
+        "booking_reference": booking.get("booking_reference", "N/A"),
+        "queued_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "sent_at": None,
+        "attempts": 0
     }
+    
+    # Store the email record (off the event loop) and hand it to the outbound queue
+    if not await asyncio.to_thread(email_store.add, email_record, email_content["parts"], dedupe_key):
+        return None
+    outbound.enqueue(OutboundMessage(email_id, recipient_email, email_content["subject"], email_content["body"]))
+    return email_record
 
 # MCP Tools
 @mcp.tool()
@@ -141,29 +116,30 @@ async def send_itinerary_email(recipient_email: str, recipient_name: str, itiner
         # Format the email
         email_content = format_itinerary_email(recipient_name, itinerary_text, bookings)
         
-        # In a real app, this would use an email sending service
-        # For the demo, we'll simulate successful email sending
         email_record = {
             "email_id": email_id,
             "recipient": recipient_email,
             "recipient_name": recipient_name,
             "subject": email_content["subject"],
-            "body": email_content["body"],
-            "sent_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "sent"
+            "status": QUEUED,
+            "queued_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "sent_at": None,
+            "attempts": 0
         }
         
-        # Store the email record
-        sent_emails[email_id] = email_record
+        # Store the email record (off the event loop) and hand it to the outbound queue
+        await asyncio.to_thread(email_store.add, email_record, email_content["parts"])
+        outbound.enqueue(OutboundMessage(email_id, recipient_email, email_content["subject"], email_content["body"]))
         
-        # Return success response
+        # Return as soon as the email is queued; delivery continues in the background
         return json.dumps({
             "success": True,
             "email_id": email_id,
             "recipient": recipient_email,
             "subject": email_content["subject"],
-            "sent_at": email_record["sent_at"],
-            "message": f"Itinerary email sent successfully to {recipient_email}"
+            "status": email_record["status"],
+            "queued_at": email_record["queued_at"],
+            "message": f"Itinerary email to {recipient_email} queued for delivery. Use check_email_status to follow it."
         }, indent=2)
         
     except Exception as e:
@@ -187,140 +163,28 @@ async def send_booking_confirmation(recipient_email: str, recipient_name: str, b
         JSON string containing email sending status
     """
     try:
-        # Generate email ID
-        email_id = generate_email_id()
-        
         # Parse booking details
         try:
             booking = json.loads(booking_details)
         except json.JSONDecodeError:
             return json.dumps({
                 "success": False,
-                "error": "Invalid booking details format. Must be valid JSON.",
-                "email_id": email_id
+                "error": "Invalid booking details format. Must be valid JSON."
             }, indent=2)
         
-        # Determine email subject based on booking type
-        if booking_type.lower() == "flight":
-            subject = f"Your Flight Booking Confirmation - {booking.get('booking_reference', 'N/A')}"
-        elif booking_type.lower() == "hotel":
-            subject = f"Your Hotel Booking Confirmation - {booking.get('booking_reference', 'N/A')}"
-        elif booking_type.lower() == "train":
-            subject = f"Your Train Booking Confirmation - {booking.get('booking_reference', 'N/A')}"
-        elif booking_type.lower() == "bus":
-            subject = f"Your Bus Booking Confirmation - {booking.get('booking_reference', 'N/A')}"
-        else:
-            subject = f"Your Travel Booking Confirmation - {booking.get('booking_reference', 'N/A')}"
+        email_record = await queue_booking_confirmation(recipient_email, recipient_name, booking_type, booking)
         
-        # Generate email body (simplified version)
-        email_body = f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background-color: #4a90e2; color: white; padding: 10px 20px; text-align: center; }}
-                .content {{ padding: 20px; background-color: #f9f9f9; }}
-                .footer {{ text-align: center; padding: 10px; font-size: 12px; color: #999; }}
-                .booking {{ margin-bottom: 20px; padding: 15px; border: 1px solid #ddd; background-color: white; }}
-                .booking h3 {{ color: #4a90e2; margin-top: 0; }}
-                .important {{ color: #e74c3c; font-weight: bold; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>{booking_type.capitalize()} Booking Confirmation</h1>
-                </div>
-                <div class="content">
-                    <p>Dear {recipient_name},</p>
-                    <p>Thank you for your booking. Your {booking_type.lower()} has been confirmed.</p>
-                    
-                    <div class="booking">
-                        <h3>Booking Details</h3>
-        """
-        
-        # Add booking specific details
-        if booking_type.lower() in ["flight", "train", "bus"]:
-            email_body += f"""
-                        <p><strong>Booking Reference:</strong> {booking.get('booking_reference', 'N/A')}</p>
-                        <p><strong>From:</strong> {booking.get('origin', 'N/A')}</p>
-                        <p><strong>To:</strong> {booking.get('destination', 'N/A')}</p>
-                        <p><strong>Date/Time:</strong> {booking.get('departure', 'N/A')}</p>
-                        <p><strong>Company:</strong> {booking.get('company', 'N/A')}</p>
-                        <p><strong>Class/Type:</strong> {booking.get('ticket_class', 'Standard')}</p>
-            """
-            
-            if booking_type.lower() == "flight":
-                email_body += f"""
-                        <p><strong>Check-in:</strong> {booking.get('check_in_time', 'Recommended 2 hours before departure')}</p>
-                        <p><strong>Baggage Allowance:</strong> {booking.get('baggage_allowance', 'Standard allowance')}</p>
-                """
-                
-                if booking.get('gate'):
-                    email_body += f"""<p><strong>Gate:</strong> {booking['gate']}</p>"""
-                
-                if booking.get('terminal'):
-                    email_body += f"""<p><strong>Terminal:</strong> {booking['terminal']}</p>"""
-        
-        elif booking_type.lower() == "hotel":
-            email_body += f"""
-                        <p><strong>Booking Reference:</strong> {booking.get('booking_reference', 'N/A')}</p>
-                        <p><strong>Hotel:</strong> {booking.get('name', 'N/A')}</p>
-                        <p><strong>Address:</strong> {booking.get('address', 'N/A')}</p>
-                        <p><strong>Check-in:</strong> {booking.get('check_in', 'N/A')} ({booking.get('check_in_time', 'After 3:00 PM')})</p>
-                        <p><strong>Check-out:</strong> {booking.get('check_out', 'N/A')} ({booking.get('check_out_time', 'Before 11:00 AM')})</p>
-                        <p><strong>Room Type:</strong> {booking.get('room_type', 'Standard')}</p>
-                        <p><strong>Guests:</strong> {booking.get('guests', '1')}</p>
-            """
-            
-            if booking.get('special_requests'):
-                email_body += f"""<p><strong>Special Requests:</strong> {booking['special_requests']}</p>"""
-        
-        # Complete the email template
-        email_body += """
-                    </div>
-                    
-                    <p class="important">Important: Please keep this confirmation for your records.</p>
-                    <p>We hope you have a wonderful trip!</p>
-                    <p>Best regards,<br/>Travel Planner Team</p>
-                </div>
-                <div class="footer">
-                    <p>This is an automated message. Please do not reply to this email.</p>
-                    <p>&copy; 2023 Travel Planner. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # In a real app, this would use an email sending service
-        # For the demo, we'll simulate successful email sending
-        email_record = {
-            "email_id": email_id,
-            "recipient": recipient_email,
-            "recipient_name": recipient_name,
-            "subject": subject,
-            "body": email_body,
-            "booking_type": booking_type,
-            "booking_reference": booking.get("booking_reference", "N/A"),
-            "sent_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "sent"
-        }
-        
-        # Store the email record
-        sent_emails[email_id] = email_record
-        
-        # Return success response
+        # Return as soon as the email is queued; delivery continues in the background
         return json.dumps({
             "success": True,
-            "email_id": email_id,
+            "email_id": email_record["email_id"],
             "recipient": recipient_email,
-            "subject": subject,
+            "subject": email_record["subject"],
             "booking_type": booking_type,
-            "booking_reference": booking.get("booking_reference", "N/A"),
-            "sent_at": email_record["sent_at"],
-            "message": f"{booking_type.capitalize()} booking confirmation email sent successfully to {recipient_email}"
+            "booking_reference": email_record["booking_reference"],
+            "status": email_record["status"],
+            "queued_at": email_record["queued_at"],
+            "message": f"{booking_type.capitalize()} booking confirmation email to {recipient_email} queued for delivery. Use check_email_status to follow it."
         }, indent=2)
         
     except Exception as e:
@@ -332,7 +196,7 @@ async def send_booking_confirmation(recipient_email: str, recipient_name: str, b
 
 @mcp.tool()
 async def check_email_status(email_id: str) -> str:
-    """Check the status of a sent email.
+    """Check the delivery status of an email (queued, sending, sent or failed).
     
     Args:
         email_id: The ID of the email to check
@@ -340,32 +204,69 @@ async def check_email_status(email_id: str) -> str:
     Returns:
         JSON string containing email status
     """
-    # Check if email exists
-    if email_id not in sent_emails:
+    # Look up the email metadata (the stored body is not loaded)
+    email = await asyncio.to_thread(email_store.get_status, email_id)
+    if email is None:
         return json.dumps({
             "success": False,
             "error": "Email not found",
             "email_id": email_id
         }, indent=2)
     
-    # Get email details
-    email = sent_emails[email_id]
-    
     # Return email status
     response = {
         "email_id": email_id,
         "recipient": email["recipient"],
         "subject": email["subject"],
+        "status": email["status"],
+        "queued_at": email["queued_at"],
         "sent_at": email["sent_at"],
-        "status": email["status"]
+        "attempts": email["attempts"]
     }
     
-    if "booking_type" in email:
+    if email.get("last_error"):
+        response["last_error"] = email["last_error"]
+    
+    if email["booking_type"]:
         response["booking_type"] = email["booking_type"]
         response["booking_reference"] = email["booking_reference"]
     
     return json.dumps(response, indent=2)
 
+# Event handlers
+async def on_reservation_confirmed(event):
+    """Send the booking confirmation for a reservation confirmed by a completed payment"""
+    confirmation = event.payload
+    email_record = await queue_booking_confirmation(
+        confirmation["recipient_email"],
+        confirmation["recipient_name"],
+        confirmation["booking_type"],
+        confirmation["booking"],
+        # One confirmation per reservation, however often the event is delivered
+        dedupe_key=event.dedupe_key,
+    )
+    if email_record is not None:
+        logger.info("Queued confirmation %s for reservation %s", email_record["email_id"], confirmation["reservation_id"])
+
+async def resume_undelivered():
+    """Re-queue emails left queued or sending by a server process that stopped before delivering them"""
+    while True:
+        # Every stdio client runs its own process on the same store: only emails older than any
+        # live process takes to deliver or fail a message are taken over
+        created_before = datetime.datetime.now().timestamp() - RESUME_AFTER_SECONDS
+        for email in await asyncio.to_thread(email_store.in_flight, created_before):
+            if outbound.holds(email["email_id"]):
+                continue
+            body = await asyncio.to_thread(email_store.get_body, email["email_id"])
+            outbound.enqueue(OutboundMessage(email["email_id"], email["recipient"], email["subject"], body,
+                                             attempts=email["attempts"]))
+            logger.info("Re-queued undelivered email %s", email["email_id"])
+        await asyncio.sleep(RESUME_AFTER_SECONDS / 2)
+
+events.subscribe("email-service", [RESERVATION_CONFIRMED], on_reservation_confirmed)
+mcp.add_background_task(events.run_consumers)
+mcp.add_background_task(resume_undelivered)
+
 if __name__ == "__main__":
-    # Initialize and run the server
-    mcp.run(transport='stdio') 
\ No newline at end of file
+    # Initialize and run the server (stdio by default, see --help for network transports)
+    run_server(mcp) 
\ No newline at end of file
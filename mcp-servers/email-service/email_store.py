@@ -0,0 +1,219 @@
+from typing import Any, Dict, List, Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "emails.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS emails (
+    email_id TEXT PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    recipient_name TEXT,
+    subject TEXT NOT NULL,
+    booking_type TEXT,
+    booking_reference TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    queued_at TEXT NOT NULL,
+    sent_at TEXT,
+    created REAL NOT NULL,
+    body_manifest TEXT NOT NULL,
+    dedupe_key TEXT
+);
+CREATE INDEX IF NOT EXISTS emails_created ON emails (created);
+CREATE INDEX IF NOT EXISTS emails_recipient ON emails (recipient);
+CREATE UNIQUE INDEX IF NOT EXISTS emails_dedupe_key ON emails (dedupe_key) WHERE dedupe_key IS NOT NULL;
+CREATE TABLE IF NOT EXISTS body_fragments (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    refs INTEGER NOT NULL
+);
+"""
+
+# Columns returned by check_email_status; the body is never read for it
+STATUS_COLUMNS = ("email_id", "recipient", "recipient_name", "subject", "booking_type", "booking_reference",
+                  "status", "attempts", "last_error", "queued_at", "sent_at")
+
+# Delivery details the outbound queue may report that have a column
+UPDATABLE_COLUMNS = ("status", "attempts", "last_error", "sent_at")
+
+# Messages still being delivered are not evicted until they pass the in-flight timeout
+IN_FLIGHT_STATUSES = ("queued", "sending")
+
+
+def fragment_hash(fragment: str) -> str:
+    return hashlib.blake2b(fragment.encode(), digest_size=16).hexdigest()
+
+
+class EmailStore:
+    """Bounded, persistent store for sent emails (SQLite).
+
+    Metadata lives in an indexed table so status lookups never touch message
+    bodies. Bodies are stored as a manifest of content-addressed, zlib-
+    compressed fragments: the template head and footer shared by every email
+    are stored once and reference-counted, only the per-message content is
+    new. Old records are evicted by age and by count. Records still queued or
+    sending are kept, unless they are older than `in_flight_timeout_hours`:
+    those are marked failed and evicted like any other.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, max_records: int = 100_000,
+                 retention_days: float = 30, retention_check_every: int = 1000,
+                 in_flight_timeout_hours: float = 24):
+        self.path = path
+        self.max_records = max_records
+        self.retention_seconds = retention_days * 86400
+        self.in_flight_timeout_seconds = in_flight_timeout_hours * 3600
+        self.retention_check_every = retention_check_every
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._inserts_since_check = 0
+        self.enforce_retention()
+
+    def add(self, record: Dict[str, Any], body_parts: List[str], dedupe_key: Optional[str] = None) -> bool:
+        """Store a new email. `body_parts` concatenated must give the full HTML body.
+
+        Returns False, storing nothing, if an email with the same `dedupe_key` was already stored.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if dedupe_key is not None and self._conn.execute(
+                    "SELECT 1 FROM emails WHERE dedupe_key = ?", (dedupe_key,)
+                ).fetchone():
+                    self._conn.execute("ROLLBACK")
+                    return False
+                manifest = ",".join(self._put_fragment_locked(part) for part in body_parts if part)
+                self._conn.execute(
+                    "INSERT INTO emails (email_id, recipient, recipient_name, subject, booking_type, booking_reference, "
+                    "status, attempts, queued_at, sent_at, created, body_manifest, dedupe_key) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (record["email_id"], record["recipient"], record.get("recipient_name"), record["subject"],
+                     record.get("booking_type"), record.get("booking_reference"), record["status"],
+                     record.get("attempts", 0), record["queued_at"], record.get("sent_at"), time.time(), manifest,
+                     dedupe_key),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._inserts_since_check += 1
+            run_retention = self._inserts_since_check >= self.retention_check_every
+        if run_retention:
+            self.enforce_retention()
+        return True
+
+    def update_status(self, email_id: str, status: str, details: Dict[str, Any]) -> None:
+        values = {"status": status}
+        values.update({key: value for key, value in details.items() if key in UPDATABLE_COLUMNS})
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with self._lock:
+            self._conn.execute(f"UPDATE emails SET {assignments} WHERE email_id = ?", (*values.values(), email_id))
+
+    def get_status(self, email_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(STATUS_COLUMNS)} FROM emails WHERE email_id = ?", (email_id,)
+            ).fetchone()
+        return dict(zip(STATUS_COLUMNS, row)) if row else None
+
+    def in_flight(self, created_before: float) -> List[Dict[str, Any]]:
+        """Emails created before `created_before` (a time.time() value) that are still queued or sending.
+
+        Emails past the in-flight timeout are left out; retention marks them failed.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT email_id, recipient, subject, attempts FROM emails WHERE status IN (?, ?) "
+                "AND created < ? AND created >= ? ORDER BY created",
+                (*IN_FLIGHT_STATUSES, created_before, time.time() - self.in_flight_timeout_seconds),
+            ).fetchall()
+        return [dict(zip(("email_id", "recipient", "subject", "attempts"), row)) for row in rows]
+
+    def get_body(self, email_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT body_manifest FROM emails WHERE email_id = ?", (email_id,)).fetchone()
+            if row is None:
+                return None
+            hashes = row[0].split(",") if row[0] else []
+            fragments = {}
+            for digest in set(hashes):
+                data = self._conn.execute("SELECT data FROM body_fragments WHERE hash = ?", (digest,)).fetchone()[0]
+                fragments[digest] = zlib.decompress(data).decode()
+        return "".join(fragments[digest] for digest in hashes)
+
+    def enforce_retention(self) -> int:
+        """Evict emails older than the retention period or beyond max_records. Returns the number evicted.
+
+        Emails still queued or sending after the in-flight timeout are marked failed first.
+        """
+        now = time.time()
+        cutoff = now - self.retention_seconds
+        with self._lock:
+            self._inserts_since_check = 0
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "UPDATE emails SET status = 'failed', last_error = ? WHERE status IN (?, ?) AND created < ?",
+                    (f"Not delivered within {self.in_flight_timeout_seconds / 3600:g} hours", *IN_FLIGHT_STATUSES,
+                     now - self.in_flight_timeout_seconds),
+                )
+                expired = self._conn.execute(
+                    "SELECT email_id, body_manifest FROM emails WHERE created < ? AND status NOT IN (?, ?)",
+                    (cutoff, *IN_FLIGHT_STATUSES),
+                ).fetchall()
+                total = self._conn.execute("SELECT COUNT(*) FROM emails").fetchone()[0] - len(expired)
+                if total > self.max_records:
+                    expired_ids = {email_id for email_id, _ in expired}
+                    oldest = self._conn.execute(
+                        "SELECT email_id, body_manifest FROM emails WHERE status NOT IN (?, ?) "
+                        "ORDER BY created LIMIT ?",
+                        (*IN_FLIGHT_STATUSES, total - self.max_records + len(expired)),
+                    ).fetchall()
+                    expired += [row for row in oldest if row[0] not in expired_ids][:total - self.max_records]
+
+                for email_id, manifest in expired:
+                    self._conn.execute("DELETE FROM emails WHERE email_id = ?", (email_id,))
+                    for digest in manifest.split(",") if manifest else []:
+                        self._conn.execute("UPDATE body_fragments SET refs = refs - 1 WHERE hash = ?", (digest,))
+                if expired:
+                    self._conn.execute("DELETE FROM body_fragments WHERE refs <= 0")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(expired)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            emails = self._conn.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+            fragments, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM body_fragments"
+            ).fetchone()
+        return {"emails": emails, "body_fragments": fragments, "body_bytes_stored": stored}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _put_fragment_locked(self, fragment: str) -> str:
+        digest = fragment_hash(fragment)
+        updated = self._conn.execute("UPDATE body_fragments SET refs = refs + 1 WHERE hash = ?", (digest,)).rowcount
+        if not updated:
+            self._conn.execute(
+                "INSERT INTO body_fragments (hash, data, refs) VALUES (?, ?, 1)",
+                (digest, zlib.compress(fragment.encode(), 6)),
+            )
+        return digest
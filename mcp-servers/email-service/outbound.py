@@ -0,0 +1,271 @@
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass
+from email.message import EmailMessage
+import asyncio
+import datetime
+import logging
+import os
+import random
+import smtplib
+
+logger = logging.getLogger(__name__)
+
+# Email statuses reported by check_email_status
+QUEUED = "queued"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+
+@dataclass
+class OutboundMessage:
+    email_id: str
+    recipient: str
+    subject: str
+    body: str
+    attempts: int = 0
+
+
+@dataclass
+class SMTPSettings:
+    """SMTP relay settings. Without a host, delivery is simulated (the demo default)."""
+    host: Optional[str] = None
+    port: int = 25
+    username: Optional[str] = None
+    password: Optional[str] = None
+    starttls: bool = False
+    sender: str = "Travel Planner <no-reply@travelplanner.local>"
+    timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "SMTPSettings":
+        return cls(
+            host=os.getenv("SMTP_HOST") or None,
+            port=int(os.getenv("SMTP_PORT", "25")),
+            username=os.getenv("SMTP_USERNAME") or None,
+            password=os.getenv("SMTP_PASSWORD") or None,
+            starttls=os.getenv("SMTP_STARTTLS", "").lower() in ("1", "true", "yes"),
+            sender=os.getenv("EMAIL_FROM", cls.sender),
+            timeout=float(os.getenv("SMTP_TIMEOUT", "10")),
+        )
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Rejected recipients and 5xx replies will not succeed on retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+# Called as on_status(email_id, status, details) on every status transition
+StatusCallback = Callable[[str, str, Dict], None]
+
+
+class OutboundQueue:
+    """Asynchronous outbound email pipeline.
+
+    Tools enqueue a message and return immediately. A pool of worker tasks
+    takes up to `batch_size` queued messages at a time and delivers them over
+    an SMTP connection that the worker keeps open between batches (the
+    blocking smtplib calls run in a thread). Failed deliveries go back on the
+    queue after an exponential backoff with jitter until `max_attempts` is
+    reached.
+
+    Status changes are passed to `on_status` in order by a single writer
+    task, in a thread, so a slow or failing status store neither blocks the
+    event loop nor stops delivery.
+    """
+
+    def __init__(self, on_status: StatusCallback, settings: Optional[SMTPSettings] = None,
+                 workers: int = 4, batch_size: int = 20, max_attempts: int = 5,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0):
+        self.on_status = on_status
+        self.settings = settings or SMTPSettings.from_env()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retry_handles: Dict[str, asyncio.TimerHandle] = {}
+        # (email_id, status, details) waiting for the status writer
+        self._statuses: Optional[asyncio.Queue] = None
+        self._status_writer: Optional[asyncio.Task] = None
+        # Ids of messages enqueued that have not reached sent/failed yet
+        self._outstanding: Set[str] = set()
+        # One SMTP connection per worker, reused across batches
+        self._connections: Dict[int, smtplib.SMTP] = {}
+
+    def enqueue(self, message: OutboundMessage) -> None:
+        """Queue a message for delivery; must be called from the event loop."""
+        self._ensure_started()
+        self._outstanding.add(message.email_id)
+        self._report(message.email_id, QUEUED, {"attempts": message.attempts})
+        self._queue.put_nowait(message)
+
+    def pending(self) -> int:
+        """Number of messages queued, being sent or waiting for a retry."""
+        return len(self._outstanding)
+
+    def holds(self, email_id: str) -> bool:
+        """Whether the message is queued, being sent or waiting for a retry in this process."""
+        return email_id in self._outstanding
+
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._statuses = asyncio.Queue()
+        self._status_writer = asyncio.create_task(self._write_statuses())
+        self._tasks = [asyncio.create_task(self._worker(slot)) for slot in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """Wait up to `drain_timeout` for queued messages to go out, then stop the workers."""
+        if not self._tasks:
+            return
+        deadline = asyncio.get_running_loop().time() + drain_timeout
+        while self._outstanding and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+        if self._outstanding:
+            logger.warning("Stopping email workers with %d message(s) undelivered; they are re-queued on the next start", len(self._outstanding))
+        for handle in self._retry_handles.values():
+            handle.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Let the writer record the last status changes before it stops
+        self._statuses.put_nowait(None)
+        await asyncio.gather(self._status_writer, return_exceptions=True)
+        self._status_writer = None
+        for connection in self._connections.values():
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        self._connections.clear()
+
+    async def _worker(self, slot: int) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            for message in batch:
+                message.attempts += 1
+                self._report(message.email_id, SENDING, {"attempts": message.attempts})
+
+            try:
+                results = await asyncio.to_thread(self._deliver_batch, slot, batch)
+            except Exception as e:
+                results = [(message, e) for message in batch]
+
+            for message, error in results:
+                if error is None:
+                    self._outstanding.discard(message.email_id)
+                    self._report(message.email_id, SENT, {
+                        "attempts": message.attempts,
+                        "sent_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    })
+                else:
+                    self._retry_or_fail(message, error)
+
+    def _retry_or_fail(self, message: OutboundMessage, error: Exception) -> None:
+        if message.attempts >= self.max_attempts or _is_permanent(error):
+            self._outstanding.discard(message.email_id)
+            self._report(message.email_id, FAILED, {"attempts": message.attempts, "last_error": str(error)})
+            return
+
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (message.attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        self._report(message.email_id, QUEUED, {
+            "attempts": message.attempts,
+            "last_error": str(error),
+            "next_attempt_in": round(delay, 2),
+        })
+
+        def requeue():
+            self._retry_handles.pop(message.email_id, None)
+            self._queue.put_nowait(message)
+
+        self._retry_handles[message.email_id] = asyncio.get_running_loop().call_later(delay, requeue)
+
+    def _report(self, email_id: str, status: str, details: Dict) -> None:
+        self._statuses.put_nowait((email_id, status, details))
+
+    async def _write_statuses(self) -> None:
+        while True:
+            updates = [await self._statuses.get()]
+            while not self._statuses.empty():
+                updates.append(self._statuses.get_nowait())
+            stop = None in updates
+            updates = [update for update in updates if update is not None]
+            if updates:
+                await asyncio.to_thread(self._apply_statuses, updates)
+            if stop:
+                return
+
+    # Runs in a worker thread
+
+    def _apply_statuses(self, updates: List[Tuple[str, str, Dict]]) -> None:
+        for email_id, status, details in updates:
+            try:
+                self.on_status(email_id, status, details)
+            except Exception:
+                logger.exception("Could not record status %s for email %s", status, email_id)
+
+    def _deliver_batch(self, slot: int, batch: List[OutboundMessage]) -> List[Tuple[OutboundMessage, Optional[Exception]]]:
+        if not self.settings.host:
+            # Demo mode: no relay configured, treat every message as delivered
+            return [(message, None) for message in batch]
+
+        results = []
+        for message in batch:
+            try:
+                self._send(slot, message)
+                results.append((message, None))
+            except (smtplib.SMTPException, OSError) as e:
+                if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                    # Connection-level failure: reconnect for the next message
+                    self._discard_connection(slot)
+                results.append((message, e))
+        return results
+
+    def _send(self, slot: int, message: OutboundMessage) -> None:
+        email = EmailMessage()
+        email["From"] = self.settings.sender
+        email["To"] = message.recipient
+        email["Subject"] = message.subject
+        email["Message-ID"] = f"<{message.email_id}@travelplanner.local>"
+        email.set_content("This message contains HTML content. Please use an HTML-capable email client.")
+        email.add_alternative(message.body, subtype="html")
+
+        connection = self._connection(slot)
+        try:
+            connection.send_message(email)
+        except smtplib.SMTPServerDisconnected:
+            # Pooled connection was closed by the server while idle; retry once on a fresh one
+            self._discard_connection(slot)
+            self._connection(slot).send_message(email)
+
+    def _connection(self, slot: int) -> smtplib.SMTP:
+        connection = self._connections.get(slot)
+        if connection is None:
+            settings = self.settings
+            connection = smtplib.SMTP(settings.host, settings.port, timeout=settings.timeout)
+            if settings.starttls:
+                connection.starttls()
+            if settings.username:
+                connection.login(settings.username, settings.password or "")
+            self._connections[slot] = connection
+        return connection
+
+    def _discard_connection(self, slot: int) -> None:
+        connection = self._connections.pop(slot, None)
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
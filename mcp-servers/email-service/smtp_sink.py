@@ -0,0 +1,46 @@
+"""Local SMTP sink for exercising the outbound email queue.
+
+Accepts every message and prints one line per delivery; nothing is relayed.
+Requires aiosmtpd (`pip install aiosmtpd`). Point the email server at it with:
+
+    SMTP_HOST=127.0.0.1 SMTP_PORT=8025 python email-service/email_service.py
+
+Usage:
+    python email-service/smtp_sink.py --port 8025
+"""
+import argparse
+import time
+
+from aiosmtpd.controller import Controller
+
+
+class SinkHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        print(f"[{self.received}] {envelope.mail_from} -> {', '.join(envelope.rcpt_tos)} ({len(envelope.content)} bytes)")
+        return "250 Message accepted for delivery"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    controller = Controller(SinkHandler(), hostname=args.host, port=args.port)
+    controller.start()
+    print(f"SMTP sink listening on {args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
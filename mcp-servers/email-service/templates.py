@@ -0,0 +1,272 @@
+from typing import Any, Dict, List, Optional
+import datetime
+import html
+import string
+
+
+class Template:
+    """A `str.format`-style template split into static text and fields once, at import.
+
+    Rendering appends the pre-split static fragments and the HTML-escaped
+    field values to a list, so nested templates can share one output list
+    that is joined a single time at the end.
+    """
+
+    def __init__(self, source: str):
+        self.parts: List[tuple] = []
+        for literal, field, _, _ in string.Formatter().parse(source):
+            if literal:
+                self.parts.append((literal, None))
+            if field is not None:
+                self.parts.append((None, field))
+
+    def render_into(self, out: List[str], values: Dict[str, Any]) -> None:
+        append = out.append
+        for literal, field in self.parts:
+            if field is None:
+                append(literal)
+            else:
+                append(html.escape(str(values[field])))
+
+    def render(self, **values: Any) -> str:
+        out: List[str] = []
+        self.render_into(out, values)
+        return "".join(out)
+
+
+BASE_STYLE = """
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .header { background-color: #4a90e2; color: white; padding: 10px 20px; text-align: center; }
+            .content { padding: 20px; background-color: #f9f9f9; }
+            .footer { text-align: center; padding: 10px; font-size: 12px; color: #999; }
+            .booking { margin-bottom: 20px; padding: 15px; border: 1px solid #ddd; background-color: white; }
+            .booking h3 { color: #4a90e2; margin-top: 0; }"""
+
+# Static sections shared by every email, rendered once
+ITINERARY_HEAD = """
+    <html>
+    <head>
+        <style>""" + BASE_STYLE + """
+            .itinerary { white-space: pre-line; }
+        </style>
+    </head>
+    <body>
+        <div class="container">"""
+
+CONFIRMATION_HEAD = """
+    <html>
+    <head>
+        <style>""" + BASE_STYLE + """
+            .important { color: #e74c3c; font-weight: bold; }
+        </style>
+    </head>
+    <body>
+        <div class="container">"""
+
+FOOTER = """
+            <div class="footer">
+                <p>This is an automated message. Please do not reply to this email.</p>
+                <p>&copy; 2023 Travel Planner. All rights reserved.</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+ITINERARY_CONTENT = Template("""
+            <div class="header">
+                <h1>Your Travel Itinerary</h1>
+            </div>
+            <div class="content">
+                <p>Dear {name},</p>
+                <p>Thank you for using our Travel Planner. Below is your complete travel itinerary.</p>
+
+                <h2>Your Itinerary</h2>
+                <div class="itinerary">
+                    {itinerary}
+                </div>
+""")
+
+ITINERARY_BOOKINGS_HEADING = """
+                <h2>Your Bookings</h2>
+"""
+
+ITINERARY_TRANSPORT_BOOKING = Template("""
+                <div class="booking">
+                    <h3>{booking_type} Booking</h3>
+                    <p><strong>Booking Reference:</strong> {booking_reference}</p>
+                    <p><strong>From:</strong> {origin}</p>
+                    <p><strong>To:</strong> {destination}</p>
+                    <p><strong>Date/Time:</strong> {departure}</p>
+                    <p><strong>Company:</strong> {company}</p>
+""")
+
+ITINERARY_HOTEL_BOOKING = Template("""
+                <div class="booking">
+                    <h3>{booking_type} Booking</h3>
+                    <p><strong>Booking Reference:</strong> {booking_reference}</p>
+                    <p><strong>Hotel:</strong> {name}</p>
+                    <p><strong>Check-in:</strong> {check_in}</p>
+                    <p><strong>Check-out:</strong> {check_out}</p>
+                    <p><strong>Room Type:</strong> {room_type}</p>
+""")
+
+ITINERARY_OTHER_BOOKING = Template("""
+                <div class="booking">
+                    <h3>{booking_type} Booking</h3>
+""")
+
+DETAIL_LINE = Template("""
+                    <p><strong>{label}:</strong> {value}</p>""")
+
+BOOKING_END = """
+                </div>
+"""
+
+ITINERARY_CLOSING = """
+                <p>We hope you have a wonderful trip!</p>
+                <p>Best regards,<br/>Travel Planner Team</p>
+            </div>"""
+
+CONFIRMATION_CONTENT = Template("""
+            <div class="header">
+                <h1>{title} Booking Confirmation</h1>
+            </div>
+            <div class="content">
+                <p>Dear {name},</p>
+                <p>Thank you for your booking. Your {booking_kind} has been confirmed.</p>
+
+                <div class="booking">
+                    <h3>Booking Details</h3>
+""")
+
+CONFIRMATION_TRANSPORT = Template("""
+                    <p><strong>Booking Reference:</strong> {booking_reference}</p>
+                    <p><strong>From:</strong> {origin}</p>
+                    <p><strong>To:</strong> {destination}</p>
+                    <p><strong>Date/Time:</strong> {departure}</p>
+                    <p><strong>Company:</strong> {company}</p>
+                    <p><strong>Class/Type:</strong> {ticket_class}</p>
+""")
+
+CONFIRMATION_FLIGHT = Template("""
+                    <p><strong>Check-in:</strong> {check_in_time}</p>
+                    <p><strong>Baggage Allowance:</strong> {baggage_allowance}</p>
+""")
+
+CONFIRMATION_HOTEL = Template("""
+                    <p><strong>Booking Reference:</strong> {booking_reference}</p>
+                    <p><strong>Hotel:</strong> {name}</p>
+                    <p><strong>Address:</strong> {address}</p>
+                    <p><strong>Check-in:</strong> {check_in} ({check_in_time})</p>
+                    <p><strong>Check-out:</strong> {check_out} ({check_out_time})</p>
+                    <p><strong>Room Type:</strong> {room_type}</p>
+                    <p><strong>Guests:</strong> {guests}</p>
+""")
+
+CONFIRMATION_CLOSING = """
+                </div>
+
+                <p class="important">Important: Please keep this confirmation for your records.</p>
+                <p>We hope you have a wonderful trip!</p>
+                <p>Best regards,<br/>Travel Planner Team</p>
+            </div>"""
+
+CONFIRMATION_SUBJECTS = {
+    "flight": "Your Flight Booking Confirmation - {}",
+    "hotel": "Your Hotel Booking Confirmation - {}",
+    "train": "Your Train Booking Confirmation - {}",
+    "bus": "Your Bus Booking Confirmation - {}",
+}
+
+TRANSPORT_TYPES = ("flight", "train", "bus")
+
+
+def _fields(booking: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: booking.get(key, default) for key, default in defaults.items()}
+
+
+def render_itinerary_email(name: str, itinerary: str, bookings: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Render the itinerary email.
+
+    Returns the subject, the HTML body and `parts`: the body split into the
+    shared static head/footer and the per-message content.
+    """
+    current_date = datetime.datetime.now().strftime("%Y-%m-%d")
+
+    content: List[str] = []
+    ITINERARY_CONTENT.render_into(content, {"name": name, "itinerary": itinerary})
+
+    if bookings:
+        content.append(ITINERARY_BOOKINGS_HEADING)
+        for booking in bookings:
+            booking_type = booking.get("type", "Unknown")
+            kind = str(booking_type).lower()
+            if kind in TRANSPORT_TYPES:
+                values = _fields(booking, {"booking_reference": "N/A", "origin": "N/A", "destination": "N/A",
+                                           "departure": "N/A", "company": "N/A"})
+                values["booking_type"] = booking_type
+                ITINERARY_TRANSPORT_BOOKING.render_into(content, values)
+                if "seat" in booking:
+                    DETAIL_LINE.render_into(content, {"label": "Seat", "value": booking["seat"]})
+            elif kind == "hotel":
+                values = _fields(booking, {"booking_reference": "N/A", "name": "N/A", "check_in": "N/A",
+                                           "check_out": "N/A", "room_type": "N/A"})
+                values["booking_type"] = booking_type
+                ITINERARY_HOTEL_BOOKING.render_into(content, values)
+            else:
+                ITINERARY_OTHER_BOOKING.render_into(content, {"booking_type": booking_type})
+            content.append(BOOKING_END)
+
+    content.append(ITINERARY_CLOSING)
+    parts = [ITINERARY_HEAD, "".join(content), FOOTER]
+    return {
+        "subject": f"Your Travel Itinerary - {current_date}",
+        "body": "".join(parts),
+        "parts": parts,
+    }
+
+
+def render_booking_confirmation(name: str, booking_type: str, booking: Dict[str, Any]) -> Dict[str, Any]:
+    """Render a booking confirmation email; returns subject, body and parts like render_itinerary_email."""
+    kind = booking_type.lower()
+    reference = booking.get("booking_reference", "N/A")
+    subject = CONFIRMATION_SUBJECTS.get(kind, "Your Travel Booking Confirmation - {}").format(reference)
+
+    content: List[str] = []
+    CONFIRMATION_CONTENT.render_into(content, {"title": booking_type.capitalize(), "name": name, "booking_kind": kind})
+
+    if kind in TRANSPORT_TYPES:
+        values = _fields(booking, {"origin": "N/A", "destination": "N/A", "departure": "N/A",
+                                   "company": "N/A", "ticket_class": "Standard"})
+        values["booking_reference"] = reference
+        CONFIRMATION_TRANSPORT.render_into(content, values)
+
+        if kind == "flight":
+            CONFIRMATION_FLIGHT.render_into(content, _fields(booking, {
+                "check_in_time": "Recommended 2 hours before departure",
+                "baggage_allowance": "Standard allowance",
+            }))
+            if booking.get("gate"):
+                DETAIL_LINE.render_into(content, {"label": "Gate", "value": booking["gate"]})
+            if booking.get("terminal"):
+                DETAIL_LINE.render_into(content, {"label": "Terminal", "value": booking["terminal"]})
+
+    elif kind == "hotel":
+        values = _fields(booking, {"name": "N/A", "address": "N/A", "check_in": "N/A", "check_out": "N/A",
+                                   "check_in_time": "After 3:00 PM", "check_out_time": "Before 11:00 AM",
+                                   "room_type": "Standard", "guests": "1"})
+        values["booking_reference"] = reference
+        CONFIRMATION_HOTEL.render_into(content, values)
+
+        if booking.get("special_requests"):
+            DETAIL_LINE.render_into(content, {"label": "Special Requests", "value": booking["special_requests"]})
+
+    content.append(CONFIRMATION_CLOSING)
+    parts = [CONFIRMATION_HEAD, "".join(content), FOOTER]
+    return {
+        "subject": subject,
+        "body": "".join(parts),
+        "parts": parts,
+    }
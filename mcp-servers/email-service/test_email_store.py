@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from email_store import EmailStore
+
+
+def record(email_id, status="queued"):
+    return {"email_id": email_id, "recipient": "ada@example.com", "recipient_name": "Ada", "subject": "Your trip",
+            "status": status, "queued_at": "2026-10-19 09:00:00"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EmailStore(str(tmp_path / "emails.db"))
+    yield store
+    store.close()
+
+
+def age(store, email_id, seconds):
+    store._conn.execute("UPDATE emails SET created = created - ? WHERE email_id = ?", (seconds, email_id))
+
+
+def test_body_round_trips_and_shared_fragments_are_stored_once(store):
+    store.add(record("E1"), ["<head>", "Hello Ada", "<footer>"])
+    store.add(record("E2"), ["<head>", "Hello Bob", "<footer>"])
+    assert store.get_body("E1") == "<head>Hello Ada<footer>"
+    assert store.get_body("E2") == "<head>Hello Bob<footer>"
+    assert store.stats()["body_fragments"] == 4
+    assert store.get_body("missing") is None
+
+
+def test_dedupe_key_stores_one_email(store):
+    assert store.add(record("E1"), ["body"], dedupe_key="reservation-1")
+    assert not store.add(record("E2"), ["body"], dedupe_key="reservation-1")
+    assert store.get_status("E2") is None
+    assert store.stats()["emails"] == 1
+
+
+def test_status_updates_keep_only_known_columns(store):
+    store.add(record("E1"), ["body"])
+    store.update_status("E1", "sent", {"attempts": 2, "sent_at": "2026-10-19 09:01:00", "server": "ignored"})
+    status = store.get_status("E1")
+    assert (status["status"], status["attempts"], status["sent_at"]) == ("sent", 2, "2026-10-19 09:01:00")
+    assert "body_manifest" not in status
+
+
+def test_retention_evicts_old_and_excess_emails_but_keeps_in_flight_ones(tmp_path):
+    store = EmailStore(str(tmp_path / "emails.db"), max_records=2, retention_days=1, in_flight_timeout_hours=48)
+    store.add(record("old", "sent"), ["old body"])
+    store.add(record("queued"), ["queued body"])
+    for email_id in ("old", "queued"):
+        age(store, email_id, 36 * 3600)
+    for email_id in ("E1", "E2", "E3"):
+        store.add(record(email_id, "sent"), [f"{email_id} body"])
+    assert store.enforce_retention() == 3
+    assert [email_id for email_id in ("old", "queued", "E1", "E2", "E3") if store.get_status(email_id)] == \
+        ["queued", "E3"]
+    assert store.stats()["body_fragments"] == 2
+    store.close()
+
+
+def test_stuck_emails_fail_after_the_in_flight_timeout(store):
+    store.add(record("stuck"), ["body"])
+    store.add(record("recent"), ["body"])
+    age(store, "stuck", 25 * 3600)
+    assert [email["email_id"] for email in store.in_flight(time.time() + 1)] == ["recent"]
+    store.enforce_retention()
+    assert store.get_status("stuck")["status"] == "failed"
+    assert store.get_status("recent")["status"] == "queued"
@@ -0,0 +1,122 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import datetime
+import time
+
+# Card brands by inclusive number-prefix range. Shorter prefixes are applied
+# first, so a longer (more specific) prefix overrides a shorter one.
+BIN_RANGES = [
+    ("Visa", "4", "4"),
+    ("Discover", "6", "6"),
+    ("MasterCard", "51", "55"),
+    ("American Express", "34", "34"),
+    ("American Express", "37", "37"),
+    ("Diners Club", "36", "36"),
+    ("Diners Club", "38", "38"),
+    ("Diners Club", "300", "305"),
+    ("MasterCard", "2221", "2720"),
+]
+
+# Every range expanded into a table indexed by the first four digits, so
+# classifying a card is one slice, one int() and one list index
+BIN_PREFIX_DIGITS = 4
+
+
+def _compile_bin_table() -> List[Optional[str]]:
+    table: List[Optional[str]] = [None] * 10 ** BIN_PREFIX_DIGITS
+    for brand, low, high in sorted(BIN_RANGES, key=lambda entry: len(entry[1])):
+        pad = BIN_PREFIX_DIGITS - len(low)
+        start = int(low) * 10 ** pad
+        end = (int(high) + 1) * 10 ** pad
+        table[start:end] = [brand] * (end - start)
+    return table
+
+
+_BIN_TABLE = _compile_bin_table()
+
+# Luhn: digits in even positions from the right are doubled, and a doubled
+# digit above 9 contributes its digit sum. Mapping each digit character to the
+# character of its contribution lets str.translate do the work in C.
+_LUHN_DOUBLED = str.maketrans("0123456789", "0246813579")
+
+
+class CardValidationResult(NamedTuple):
+    valid: bool
+    card_type: Optional[str]
+    errors: List[Dict[str, str]]
+
+
+def card_type(card_number: str) -> str:
+    """Return the card brand for a card number, or "Unknown"."""
+    if not (card_number and card_number.isascii() and card_number.isdigit()):
+        return "Unknown"
+    return _BIN_TABLE[int(card_number[:BIN_PREFIX_DIGITS].ljust(BIN_PREFIX_DIGITS, "0"))] or "Unknown"
+
+
+def luhn_valid(card_number: str) -> bool:
+    """Check the Luhn checksum of an all-digit card number."""
+    undoubled = card_number[-1::-2]
+    doubled = card_number[-2::-2].translate(_LUHN_DOUBLED)
+    # Sum of the ASCII codes minus 48 ('0') per digit is the sum of the digits
+    total = sum(undoubled.encode()) + sum(doubled.encode()) - 48 * len(card_number)
+    return total % 10 == 0
+
+
+def parse_expiry(card_expiry: str) -> Optional[Tuple[int, int]]:
+    """Parse an MM/YY expiry into (two-digit year, month), or None if malformed."""
+    if len(card_expiry) != 5 or card_expiry[2] != "/":
+        return None
+    month, year = card_expiry[:2], card_expiry[3:]
+    # isdigit alone also accepts digits int() rejects, such as "²"
+    if not (card_expiry.isascii() and month.isdigit() and year.isdigit()):
+        return None
+    month = int(month)
+    if not 1 <= month <= 12:
+        return None
+    return int(year), month
+
+
+# (two-digit year, month) of "now", recomputed only once the month rolls over
+_current_month: Tuple[int, int] = (0, 0)
+_current_month_until = 0.0
+
+
+def current_month() -> Tuple[int, int]:
+    global _current_month, _current_month_until
+    if time.time() >= _current_month_until:
+        now = datetime.datetime.now()
+        _current_month = (now.year % 100, now.month)
+        next_month = (now.replace(day=28) + datetime.timedelta(days=4)).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        _current_month_until = next_month.timestamp()
+    return _current_month
+
+
+def _error(field: str, code: str, message: str) -> Dict[str, str]:
+    return {"field": field, "code": code, "message": message}
+
+
+def validate_card_details(card_number: str, card_expiry: str, card_cvv: str) -> CardValidationResult:
+    """Validate card number, expiry and CVV, collecting every problem found."""
+    errors = []
+    card_number = card_number or ""
+    card_expiry = card_expiry or ""
+    card_cvv = card_cvv or ""
+
+    if not (card_number.isascii() and card_number.isdigit() and 13 <= len(card_number) <= 19):
+        errors.append(_error("card_number", "invalid_format", "Invalid card number"))
+    elif not luhn_valid(card_number):
+        errors.append(_error("card_number", "checksum_failed", "Invalid card number (checksum failed)"))
+
+    expiry = parse_expiry(card_expiry)
+    if expiry is None:
+        errors.append(_error("card_expiry", "invalid_format", "Invalid expiry date format (should be MM/YY)"))
+    elif expiry < current_month():
+        errors.append(_error("card_expiry", "expired", "Card has expired"))
+
+    if not (card_cvv.isascii() and card_cvv.isdigit() and 3 <= len(card_cvv) <= 4):
+        errors.append(_error("card_cvv", "invalid_format", "Invalid CVV code"))
+
+    if errors:
+        return CardValidationResult(False, None, errors)
+    return CardValidationResult(True, card_type(card_number), errors)
@@ -0,0 +1,384 @@
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import Future
+import asyncio
+import datetime
+import json
+import os
+import queue
+import sqlite3
+import threading
+
+DEFAULT_LEDGER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "payments.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    payment_id TEXT NOT NULL,
+    reservation_id TEXT,
+    event TEXT NOT NULL,
+    status TEXT NOT NULL,
+    idempotency_key TEXT,
+    record TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ledger_payment_id ON ledger (payment_id, seq);
+CREATE INDEX IF NOT EXISTS ledger_reservation_id ON ledger (reservation_id);
+CREATE UNIQUE INDEX IF NOT EXISTS ledger_idempotency_key ON ledger (idempotency_key)
+    WHERE idempotency_key IS NOT NULL;
+CREATE TRIGGER IF NOT EXISTS ledger_no_update BEFORE UPDATE ON ledger
+    BEGIN SELECT RAISE(ABORT, 'ledger is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS ledger_no_delete BEFORE DELETE ON ledger
+    BEGIN SELECT RAISE(ABORT, 'ledger is append-only'); END;
+"""
+
+# Payment counts and amounts per (day, currency, status, card type), for
+# reports that would otherwise read every payment. A trigger keeps them up to
+# date inside the transaction of each ledger insert: a payment is counted
+# under the status of its latest row, so a refund moves it from "completed"
+# to "refunded" (on the day it was paid). Amounts are summed in cents so the
+# totals stay exact.
+ROLLUP_SCHEMA = [
+    """
+    CREATE VIEW IF NOT EXISTS ledger_rollup_keys AS
+    SELECT seq, payment_id,
+           substr(json_extract(record, '$.timestamp'), 1, 10) AS day,
+           upper(json_extract(record, '$.currency')) AS currency,
+           status,
+           coalesce(json_extract(record, '$.card_details.card_type'), 'Unknown') AS card_type,
+           CAST(round(json_extract(record, '$.amount') * 100) AS INTEGER) AS amount_cents
+    FROM ledger
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS payment_rollup (
+        day TEXT NOT NULL,
+        currency TEXT NOT NULL,
+        status TEXT NOT NULL,
+        card_type TEXT NOT NULL,
+        payments INTEGER NOT NULL,
+        amount_cents INTEGER NOT NULL,
+        PRIMARY KEY (day, currency, status, card_type)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ledger_rollup AFTER INSERT ON ledger BEGIN
+        INSERT INTO payment_rollup (day, currency, status, card_type, payments, amount_cents)
+            SELECT day, currency, status, card_type, -1, -amount_cents FROM ledger_rollup_keys
+            WHERE seq = (SELECT MAX(seq) FROM ledger WHERE payment_id = NEW.payment_id AND seq < NEW.seq)
+            ON CONFLICT (day, currency, status, card_type) DO UPDATE SET
+                payments = payments + excluded.payments, amount_cents = amount_cents + excluded.amount_cents;
+        INSERT INTO payment_rollup (day, currency, status, card_type, payments, amount_cents)
+            SELECT day, currency, status, card_type, 1, amount_cents FROM ledger_rollup_keys WHERE seq = NEW.seq
+            ON CONFLICT (day, currency, status, card_type) DO UPDATE SET
+                payments = payments + excluded.payments, amount_cents = amount_cents + excluded.amount_cents;
+    END
+    """,
+]
+
+# Columns a report can group by, and the SQL for each
+REPORT_GROUPS = {
+    "day": "day",
+    "month": "substr(day, 1, 7)",
+    "currency": "currency",
+    "status": "status",
+    "card_type": "card_type",
+}
+
+# The rollup columns of every payment's latest row, computed from the ledger itself
+LATEST_ROLLUP_KEYS = ("(SELECT day, currency, status, card_type, 1 AS payments, amount_cents FROM ledger_rollup_keys "
+                      "WHERE seq IN (SELECT MAX(seq) FROM ledger GROUP BY payment_id))")
+
+
+class LedgerError(Exception):
+    pass
+
+
+class DuplicateIdempotencyKey(LedgerError):
+    """Raised inside a write when another payment already used the idempotency key."""
+
+    def __init__(self, record: Dict[str, Any]):
+        super().__init__("Idempotency key already used")
+        self.record = record
+
+
+class PaymentLedger:
+    """Append-only payment ledger stored in SQLite (WAL mode).
+
+    Every state change of a payment appends a row holding the full payment
+    record, so the current state of a payment is its latest row. Writes are
+    funnelled through a single writer thread that drains whatever is queued
+    and commits it as one transaction: callers that arrive while a commit is
+    being fsynced share the next one (group commit). Reads use a separate
+    connection and never wait for the writer.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH, max_batch: int = 256, synchronous: str = "FULL"):
+        self.path = path
+        self.max_batch = max_batch
+        self.synchronous = synchronous
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._write_conn = self._connect()
+        self._write_conn.executescript(SCHEMA)
+        self._create_rollups()
+        self._read_conn = self._connect()
+        self._read_lock = threading.Lock()
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: transactions are managed explicitly by the writer
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _create_rollups(self) -> None:
+        conn = self._write_conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'payment_rollup'").fetchone()
+            for statement in ROLLUP_SCHEMA:
+                conn.execute(statement)
+            if not existed:
+                # A ledger written before the rollups existed: count its payments once
+                self.rebuild_rollups(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # Writes
+
+    def submit(self, op: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Queue `op(conn)` to run inside the next group commit.
+
+        The returned future resolves with the op's result once the
+        transaction containing it is durable, or with the op's exception if
+        it raised (in which case only that op's writes are rolled back).
+        """
+        if self._closed:
+            raise LedgerError("Ledger is closed")
+        self._ensure_writer()
+        future: Future = Future()
+        self._queue.put((op, future))
+        return future
+
+    async def write(self, op: Callable[[sqlite3.Connection], Any]) -> Any:
+        return await asyncio.wrap_future(self.submit(op))
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="payment-ledger-writer", daemon=True)
+                self._writer.start()
+
+    def _writer_loop(self) -> None:
+        conn = self._write_conn
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            results = []
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for op, future in batch:
+                    conn.execute("SAVEPOINT op")
+                    try:
+                        results.append((future, op(conn), None))
+                        conn.execute("RELEASE op")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO op")
+                        conn.execute("RELEASE op")
+                        results.append((future, None, e))
+                conn.execute("COMMIT")
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                results = [(future, None, e) for _, future in batch]
+
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            if stop:
+                return
+
+    def close(self) -> None:
+        """Flush queued writes and close the connections."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+        self._write_conn.close()
+        self._read_conn.close()
+
+    # Write ops, run on the writer connection inside a transaction
+
+    @staticmethod
+    def append(conn: sqlite3.Connection, record: Dict[str, Any], event: str,
+               idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        if idempotency_key is not None:
+            row = conn.execute(
+                "SELECT payment_id FROM ledger WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+            if row is not None:
+                raise DuplicateIdempotencyKey(PaymentLedger.latest(conn, row[0]))
+        conn.execute(
+            "INSERT INTO ledger (payment_id, reservation_id, event, status, idempotency_key, record, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (record["payment_id"], record.get("reservation_id"), event, record["status"],
+             idempotency_key, json.dumps(record), datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+        return record
+
+    @staticmethod
+    def latest(conn: sqlite3.Connection, payment_id: str) -> Optional[Dict[str, Any]]:
+        row = conn.execute(
+            "SELECT record FROM ledger WHERE payment_id = ? ORDER BY seq DESC LIMIT 1", (payment_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def rebuild_rollups(conn: sqlite3.Connection) -> int:
+        """Recompute the rollups from every payment's latest row; returns the number of rollup rows."""
+        conn.execute("DELETE FROM payment_rollup")
+        return conn.execute(
+            "INSERT INTO payment_rollup (day, currency, status, card_type, payments, amount_cents) "
+            f"SELECT day, currency, status, card_type, SUM(payments), SUM(amount_cents) FROM {LATEST_ROLLUP_KEYS} "
+            "GROUP BY day, currency, status, card_type"
+        ).rowcount
+
+    # Reads
+
+    def get(self, payment_id: str) -> Optional[Dict[str, Any]]:
+        """Return the current state of a payment, or None if it does not exist."""
+        with self._read_lock:
+            return self.latest(self._read_conn, payment_id)
+
+    def get_by_idempotency_key(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT payment_id FROM ledger WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+            return self.latest(self._read_conn, row[0]) if row else None
+
+    def get_by_reservation(self, reservation_id: str) -> List[Dict[str, Any]]:
+        """Return the current state of every payment made for a reservation."""
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT DISTINCT payment_id FROM ledger WHERE reservation_id = ?", (reservation_id,)
+            ).fetchall()
+            return [self.latest(self._read_conn, row[0]) for row in rows]
+
+    def get_many(self, payment_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the current state of several payments, keyed by payment_id."""
+        if not payment_ids:
+            return {}
+        placeholders = ",".join("?" * len(payment_ids))
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                f"SELECT payment_id, record FROM ledger WHERE seq IN ("
+                f"SELECT MAX(seq) FROM ledger WHERE payment_id IN ({placeholders}) GROUP BY payment_id)",
+                payment_ids,
+            ).fetchall()
+        return {payment_id: json.loads(record) for payment_id, record in rows}
+
+    def get_many_by_idempotency_keys(self, idempotency_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the current state of the payments recorded under any of the keys, keyed by idempotency key."""
+        if not idempotency_keys:
+            return {}
+        placeholders = ",".join("?" * len(idempotency_keys))
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                f"SELECT idempotency_key, payment_id FROM ledger WHERE idempotency_key IN ({placeholders})",
+                idempotency_keys,
+            ).fetchall()
+        payments = self.get_many([payment_id for _, payment_id in rows])
+        return {key: payments[payment_id] for key, payment_id in rows}
+
+    @staticmethod
+    def _totals(conn: sqlite3.Connection, source: str, group_by: List[str],
+                filters: Dict[str, Optional[str]]) -> List[Dict[str, Any]]:
+        conditions, params = [], []
+        for column, operator in (("start_day", ">="), ("end_day", "<=")):
+            if filters.get(column):
+                conditions.append(f"day {operator} ?")
+                params.append(filters[column])
+        for column in ("currency", "status", "card_type"):
+            if filters.get(column):
+                conditions.append(f"{column} = ?")
+                params.append(filters[column])
+        columns = [f"{REPORT_GROUPS[name]} AS {name}" for name in group_by]
+        query = f"SELECT {', '.join(columns + ['SUM(payments)', 'SUM(amount_cents)'])} FROM {source}"
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        if group_by:
+            query += f" GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}"
+        rows = []
+        for row in conn.execute(query, params):
+            # Buckets emptied by refunds are left in the rollup with zero payments
+            if row[-2]:
+                rows.append(dict(zip(group_by, row), payments=row[-2], amount_cents=row[-1]))
+        return rows
+
+    def report(self, group_by: List[str], **filters: Optional[str]) -> List[Dict[str, Any]]:
+        """Payment counts and amounts in cents from the rollups, grouped by `group_by` (keys of REPORT_GROUPS).
+
+        Filters: start_day and end_day (inclusive, YYYY-MM-DD), currency, status and card_type.
+        """
+        with self._read_lock:
+            return self._totals(self._read_conn, "payment_rollup", group_by, filters)
+
+    def reconcile(self, **filters: Optional[str]) -> Dict[str, Any]:
+        """Compare the rollups with totals recomputed from every payment in the ledger.
+
+        Reads every payment, so it takes seconds on a large ledger; it uses a
+        connection of its own and can run on another thread without holding
+        up other reads. Both sides are read from one snapshot.
+        """
+        group_by = ["day", "currency", "status", "card_type"]
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            rollup = self._totals(conn, "payment_rollup", group_by, filters)
+            ledger = self._totals(conn, LATEST_ROLLUP_KEYS, group_by, filters)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        def keyed(rows):
+            return {tuple(row[name] for name in group_by): row for row in rows}
+
+        rollup, ledger = keyed(rollup), keyed(ledger)
+        mismatches = []
+        for key in sorted(set(rollup) | set(ledger)):
+            expected, found = ledger.get(key), rollup.get(key)
+            expected_totals = (expected["payments"], expected["amount_cents"]) if expected else (0, 0)
+            found_totals = (found["payments"], found["amount_cents"]) if found else (0, 0)
+            if expected_totals != found_totals:
+                mismatches.append(dict(zip(group_by, key), ledger_payments=expected_totals[0],
+                                       ledger_amount_cents=expected_totals[1], rollup_payments=found_totals[0],
+                                       rollup_amount_cents=found_totals[1]))
+        return {"payments": sum(row["payments"] for row in ledger.values()), "mismatches": mismatches}
@@ -1,89 +1,81 @@
 from typing import Any, Dict, Optional
-from mcp.server.fastmcp import FastMCP
+import asyncio
+import contextlib
 import json
 import datetime
+import logging
+import math
 import random
-import uuid
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.events import DEFAULT_EVENTS_PATH, PAYMENT_COMPLETED, EventBus
+from common.ids import new_id
+from common.server import ToolServer, run_server
+from card_validation import validate_card_details, card_type as get_card_type
+from ledger import PaymentLedger, DuplicateIdempotencyKey, LedgerError, DEFAULT_LEDGER_PATH, REPORT_GROUPS
 
 # Initialize FastMCP server
-mcp = FastMCP("payment")
+mcp = ToolServer("payment", default_port=8102)
+
+# Durable, append-only store for payments
+ledger = PaymentLedger(os.getenv("PAYMENT_LEDGER_PATH", DEFAULT_LEDGER_PATH))
+mcp.on_shutdown(ledger.close)
+
+# Event bus: completed payments confirm reservations and trigger confirmation emails
+events = EventBus(os.getenv("EVENT_BUS_PATH", DEFAULT_EVENTS_PATH))
+mcp.on_shutdown(events.close)
+
+logger = logging.getLogger(__name__)
 
-# In-memory store for payments (in a real app, this would be a database)
-payment_records = {}
+# Largest number of items accepted by the batch tools in one call
+MAX_BATCH_SIZE = 500
+
+# Fields every payment in process_payments_batch must provide
+PAYMENT_FIELDS = ("reservation_id", "amount", "currency", "card_number", "card_expiry",
+                  "card_cvv", "cardholder_name", "email")
+
+# Idempotency keys with a payment currently in flight: key -> [lock, users]
+idempotency_locks: Dict[str, list] = {}
 
 # Helper function to generate a payment ID
 def generate_payment_id():
-    return f"PAY-{uuid.uuid4().hex[:10].upper()}"
+    return new_id("PAY-")
 
-# Helper function to validate credit card (simple validation)
-def validate_card(card_number, expiry, cvv):
-    # Very basic validation
-    if not (card_number and expiry and cvv):
-        return False
-    
-    # Check if card number has valid length and is numeric
-    if not (card_number.isdigit() and 13 <= len(card_number) <= 19):
-        return False
-    
-    # Check if expiry is in MM/YY format
-    if not (len(expiry) == 5 and expiry[2] == '/' and expiry[:2].isdigit() and expiry[3:].isdigit()):
-        return False
-    
-    # Check if expiry date is in the future
-    current_month = datetime.datetime.now().month
-    current_year = datetime.datetime.now().year % 100  # Get last 2 digits
-    expiry_month = int(expiry[:2])
-    expiry_year = int(expiry[3:])
-    
-    if expiry_year < current_year or (expiry_year == current_year and expiry_month < current_month):
-        return False
-    
-    # Check if CVV is 3 or 4 digits
-    if not (cvv.isdigit() and 3 <= len(cvv) <= 4):
-        return False
-    
-    return True
+@contextlib.asynccontextmanager
+async def idempotency_guard(idempotency_key: Optional[str]):
+    """Serialize concurrent calls that share an idempotency key."""
+    if not idempotency_key:
+        yield
+        return
+    entry = idempotency_locks.setdefault(idempotency_key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del idempotency_locks[idempotency_key]
 
-# MCP Tools
-@mcp.tool()
-async def process_payment(reservation_id: str, amount: float, currency: str, 
-                          card_number: str, card_expiry: str, card_cvv: str,
-                          cardholder_name: str, email: str) -> str:
-    """Process a payment for a reservation.
-    
-    Args:
-        reservation_id: The ID of the reservation to pay for
-        amount: The payment amount
-        currency: The currency code (e.g., USD, EUR)
-        card_number: The credit card number
-        card_expiry: The card expiry date in MM/YY format
-        card_cvv: The card security code (CVV)
-        cardholder_name: The name on the card
-        email: Email address for payment receipt
-    
-    Returns:
-        JSON string containing payment details
-    """
-    # Validate card details
-    if not validate_card(card_number, card_expiry, card_cvv):
-        return json.dumps({
-            "success": False,
-            "error": "Invalid card details. Please check and try again.",
-            "reservation_id": reservation_id
-        }, indent=2)
-    
-    # Generate payment ID
-    payment_id = generate_payment_id()
-    
+# Simulated payment gateway calls (95% success rate)
+async def charge_card(card_number, amount, currency):
+    return random.random() < 0.95
+
+async def refund_charge(payment):
+    return random.random() < 0.95
+
+# Helper function to build the ledger record for a charge attempt
+def build_payment_record(reservation_id, amount, currency, card_number, card_expiry,
+                         cardholder_name, email, success):
     # Mask card number for security
     masked_card = f"{'*' * (len(card_number) - 4)}{card_number[-4:]}"
     
-    # In a real app, this would connect to a payment gateway
-    # For demo purposes, we'll simulate success/failure with 95% success rate
-    success = random.random() < 0.95
-    
-    payment_record = {
-        "payment_id": payment_id,
+    return {
+        "payment_id": generate_payment_id(),
         "reservation_id": reservation_id,
         "amount": amount,
         "currency": currency,
@@ -97,31 +89,174 @@ async def process_payment(reservation_id: str, amount: float, currency: str,
             "cardholder": cardholder_name
         },
         "email": email,
-        "transaction_reference": f"TX{random.randint(100000, 999999)}",
+        "transaction_reference": new_id("TX"),
         "success": success
     }
-    
-    # Store payment record
-    payment_records[payment_id] = payment_record
-    
-    # Build response
+
+# Ledger write op appending a refund, re-checking the status inside the write
+# so two concurrent refunds of the same payment cannot both succeed
+def append_refund(conn, payment_id, reason, refund_timestamp, refund_reference):
+    current = PaymentLedger.latest(conn, payment_id)
+    if current is None:
+        raise LedgerError("Payment not found")
+    if current["status"] != "completed":
+        raise LedgerError(f"Payment cannot be refunded (current status: {current['status']})")
+    current["status"] = "refunded"
+    current["refund_reason"] = reason
+    current["refund_timestamp"] = refund_timestamp
+    current["refund_reference"] = refund_reference
+    return PaymentLedger.append(conn, current, "refund")
+
+# Helper function to announce completed payments on the event bus. Replays
+# publish again, which is a no-op for payments already announced and
+# recovers the event if the first publish failed.
+async def publish_completed_payments(payment_records):
+    completed = [
+        (PAYMENT_COMPLETED, {
+            "payment_id": record["payment_id"],
+            "reservation_id": record["reservation_id"],
+            "amount": record["amount"],
+            "currency": record["currency"],
+            "email": record["email"],
+            "transaction_reference": record["transaction_reference"],
+        }, f"{PAYMENT_COMPLETED}:{record['payment_id']}")
+        for record in payment_records if record["status"] == "completed"
+    ]
+    try:
+        await events.publish_batch(completed)
+    except sqlite3.Error:
+        # The payment itself is recorded; retrying the call with its idempotency key re-publishes
+        logger.exception("Could not publish %d completed payment(s)", len(completed))
+
+# Helper function to build the tool response for a payment record
+def build_payment_response(payment_record, replayed=False):
     response = {
-        "success": success,
-        "payment_id": payment_id,
-        "reservation_id": reservation_id,
-        "amount": amount,
-        "currency": currency,
+        "success": payment_record["success"],
+        "payment_id": payment_record["payment_id"],
+        "reservation_id": payment_record["reservation_id"],
+        "amount": payment_record["amount"],
+        "currency": payment_record["currency"],
         "timestamp": payment_record["timestamp"],
         "card_details": {
             "type": payment_record["card_details"]["card_type"],
-            "masked_number": masked_card
+            "masked_number": payment_record["card_details"]["masked_number"]
         }
     }
     
-    if not success:
+    if replayed:
+        response["idempotent_replay"] = True
+    
+    if not payment_record["success"]:
         response["error"] = "Payment processing failed. Please try again or use a different payment method."
     
-    return json.dumps(response, indent=2)
+    return response
+
+# Helper function to build the tool response for a refund attempt
+def build_refund_response(payment, success, reason, refund_timestamp, refund_reference):
+    response = {
+        "success": success,
+        "payment_id": payment["payment_id"],
+        "reservation_id": payment["reservation_id"],
+        "amount": payment["amount"],
+        "currency": payment["currency"],
+        "refund_timestamp": refund_timestamp,
+        "reason": reason,
+        "status": payment["status"],
+        "refund_reference": refund_reference
+    }
+    
+    if not success:
+        response["error"] = "Refund processing failed. Please try again later."
+    
+    return response
+
+# Helper function to check a payment amount; returns an error message or None
+def amount_error(amount):
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)) or not math.isfinite(amount):
+        return "Amount must be a number."
+    if amount <= 0:
+        return "Amount must be greater than 0."
+    return None
+
+# Helper function to check a currency code; returns an error message or None
+def currency_error(currency):
+    if not isinstance(currency, str) or len(currency) != 3 or not currency.isascii() or not currency.isalpha():
+        return "Currency must be a 3-letter code (e.g., USD)."
+    return None
+
+# Helper function to parse the JSON array argument of a batch tool
+def parse_batch(raw, name):
+    try:
+        items = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return None, f"Invalid {name} format. Must be a JSON array."
+    if not isinstance(items, list) or not items:
+        return None, f"{name} must be a non-empty JSON array."
+    if len(items) > MAX_BATCH_SIZE:
+        return None, f"Too many items in {name} ({len(items)}); the limit is {MAX_BATCH_SIZE} per call."
+    if name == "payments" and not all(isinstance(item, dict) for item in items):
+        return None, "Each payment must be a JSON object."
+    return items, None
+
+# MCP Tools
+@mcp.tool()
+async def process_payment(reservation_id: str, amount: float, currency: str, 
+                          card_number: str, card_expiry: str, card_cvv: str,
+                          cardholder_name: str, email: str,
+                          idempotency_key: Optional[str] = None) -> str:
+    """Process a payment for a reservation.
+    
+    Args:
+        reservation_id: The ID of the reservation to pay for
+        amount: The payment amount
+        currency: The currency code (e.g., USD, EUR)
+        card_number: The credit card number
+        card_expiry: The card expiry date in MM/YY format
+        card_cvv: The card security code (CVV)
+        cardholder_name: The name on the card
+        email: Email address for payment receipt
+        idempotency_key: Optional client-chosen key; retrying with the same key
+            returns the original result instead of charging again
+    
+    Returns:
+        JSON string containing payment details
+    """
+    error = amount_error(amount) or currency_error(currency)
+    if error:
+        return json.dumps({"success": False, "error": error, "reservation_id": reservation_id}, indent=2)
+    
+    # Validate card details
+    validation = validate_card_details(card_number, card_expiry, card_cvv)
+    if not validation.valid:
+        return json.dumps({
+            "success": False,
+            "error": "Invalid card details. Please check and try again.",
+            "errors": validation.errors,
+            "reservation_id": reservation_id
+        }, indent=2)
+    
+    async with idempotency_guard(idempotency_key):
+        # A retry of a payment that already went through returns the stored result
+        existing = ledger.get_by_idempotency_key(idempotency_key) if idempotency_key else None
+        if existing is not None:
+            payment_record, replayed = existing, True
+        else:
+            # In a real app, this would connect to a payment gateway
+            success = await charge_card(card_number, amount, currency)
+            payment_record = build_payment_record(reservation_id, amount, currency, card_number,
+                                                  card_expiry, cardholder_name, email, success)
+            replayed = False
+            
+            # Store payment record; the call returns once the ledger entry is durable
+            try:
+                await ledger.write(lambda conn: PaymentLedger.append(conn, payment_record, "payment", idempotency_key))
+            except DuplicateIdempotencyKey as e:
+                # Another process recorded a payment with this key first
+                payment_record, replayed = e.record, True
+    
+    # The reservation is confirmed and the confirmation email sent via the event bus
+    await publish_completed_payments([payment_record])
+    return json.dumps(build_payment_response(payment_record, replayed=replayed), indent=2)
 
 @mcp.tool()
 async def get_payment_status(payment_id: str) -> str:
@@ -133,17 +268,15 @@ async def get_payment_status(payment_id: str) -> str:
     Returns:
         JSON string containing payment status
     """
-    # Check if payment exists
-    if payment_id not in payment_records:
+    # Get payment details
+    payment = ledger.get(payment_id)
+    if payment is None:
         return json.dumps({
             "success": False,
             "error": "Payment not found",
             "payment_id": payment_id
         }, indent=2)
     
-    # Get payment details
-    payment = payment_records[payment_id]
-    
     response = {
         "payment_id": payment_id,
         "reservation_id": payment["reservation_id"],
@@ -172,17 +305,15 @@ async def refund_payment(payment_id: str, reason: str = "Customer request") -> s
     Returns:
         JSON string containing refund details
     """
-    # Check if payment exists
-    if payment_id not in payment_records:
+    # Get payment details
+    payment = ledger.get(payment_id)
+    if payment is None:
         return json.dumps({
             "success": False,
             "error": "Payment not found",
             "payment_id": payment_id
         }, indent=2)
     
-    # Get payment details
-    payment = payment_records[payment_id]
-    
     # Check if payment can be refunded (only completed payments can be refunded)
     if payment["status"] != "completed":
         return json.dumps({
@@ -192,29 +323,265 @@ async def refund_payment(payment_id: str, reason: str = "Customer request") -> s
         }, indent=2)
     
     # Process refund - in a real app, this would connect to payment gateway
-    # For demo, we'll simulate success with 95% success rate
-    success = random.random() < 0.95
+    success = await refund_charge(payment)
+    refund_timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    refund_reference = new_id("RF")
     
     if success:
-        # Update payment status
-        payment["status"] = "refunded"
-        payment_records[payment_id] = payment
+        # Append the refund to the ledger
+        try:
+            payment = await ledger.write(
+                lambda conn: append_refund(conn, payment_id, reason, refund_timestamp, refund_reference)
+            )
+        except LedgerError as e:
+            return json.dumps({
+                "success": False,
+                "error": str(e),
+                "payment_id": payment_id
+            }, indent=2)
+    
+    response = build_refund_response(payment, success, reason, refund_timestamp, refund_reference)
+    return json.dumps(response, indent=2)
+
+@mcp.tool()
+async def process_payments_batch(payments: str) -> str:
+    """Process payments for several reservations in a single call (e.g. a group booking).
+    
+    Args:
+        payments: JSON array of payment objects, each with the same fields as
+            process_payment: reservation_id, amount, currency, card_number,
+            card_expiry, card_cvv, cardholder_name, email and an optional
+            idempotency_key
+    
+    Returns:
+        JSON string containing one result per payment, in input order
+    """
+    items, error = parse_batch(payments, "payments")
+    if error:
+        return json.dumps({"success": False, "error": error}, indent=2)
+    
+    results: list = [None] * len(items)
+    
+    # Validate every item in one pass before charging anything
+    to_charge = []
+    for index, item in enumerate(items):
+        missing = [field for field in PAYMENT_FIELDS if item.get(field) in (None, "")]
+        if missing:
+            results[index] = {"success": False, "error": f"Missing fields: {', '.join(missing)}"}
+            continue
+        error = amount_error(item["amount"]) or currency_error(item["currency"])
+        key = item.get("idempotency_key")
+        if error is None and key is not None and (not isinstance(key, str) or not key):
+            error = "idempotency_key must be a non-empty string."
+        if error:
+            results[index] = {"success": False, "error": error}
+            continue
+        validation = validate_card_details(str(item["card_number"]), str(item["card_expiry"]), str(item["card_cvv"]))
+        if validation.valid:
+            to_charge.append(index)
+        else:
+            results[index] = {"success": False, "error": "Invalid card details. Please check and try again.",
+                              "errors": validation.errors}
+    
+    # Replay payments whose idempotency key was already recorded, and charge
+    # only the first occurrence of a key repeated within the batch
+    keys = [items[index].get("idempotency_key") for index in to_charge]
+    existing = ledger.get_many_by_idempotency_keys([key for key in keys if key])
+    first_with_key: Dict[str, int] = {}
+    duplicates = []
+    charge_now = []
+    recorded = []
+    for index, key in zip(to_charge, keys):
+        if key and key in existing:
+            results[index] = build_payment_response(existing[key], replayed=True)
+            recorded.append(existing[key])
+        elif key and key in first_with_key:
+            duplicates.append((index, first_with_key[key]))
+        else:
+            if key:
+                first_with_key[key] = index
+            charge_now.append(index)
+    
+    # Charge the remaining cards concurrently
+    outcomes = await asyncio.gather(*(
+        charge_card(items[index]["card_number"], items[index]["amount"], items[index]["currency"])
+        for index in charge_now
+    ))
+    records = {
+        index: build_payment_record(items[index]["reservation_id"], items[index]["amount"],
+                                    items[index]["currency"], str(items[index]["card_number"]),
+                                    items[index]["card_expiry"], items[index]["cardholder_name"],
+                                    items[index]["email"], success)
+        for index, success in zip(charge_now, outcomes)
+    }
+    
+    # Write every payment in one ledger transaction
+    def append_all(conn):
+        written = {}
+        for index, record in records.items():
+            try:
+                written[index] = (PaymentLedger.append(conn, record, "payment", items[index].get("idempotency_key")), False)
+            except DuplicateIdempotencyKey as e:
+                written[index] = (e.record, True)
+        return written
+    
+    if records:
+        for index, (record, replayed) in (await ledger.write(append_all)).items():
+            results[index] = build_payment_response(record, replayed=replayed)
+            recorded.append(record)
+    for index, first in duplicates:
+        results[index] = dict(results[first], idempotent_replay=True)
+    
+    await publish_completed_payments(recorded)
+    
+    for index, result in enumerate(results):
+        result["index"] = index
+        result.setdefault("reservation_id", items[index].get("reservation_id"))
+    
+    succeeded = sum(1 for result in results if result["success"])
+    return json.dumps({
+        "success": succeeded == len(results),
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }, indent=2)
+
+@mcp.tool()
+async def refund_payments_batch(payment_ids: str, reason: str = "Customer request") -> str:
+    """Refund several payments in a single call.
+    
+    Args:
+        payment_ids: JSON array of payment IDs to refund
+        reason: The reason for the refunds
+    
+    Returns:
+        JSON string containing one result per payment ID, in input order
+    """
+    ids, error = parse_batch(payment_ids, "payment_ids")
+    if error:
+        return json.dumps({"success": False, "error": error}, indent=2)
+    
+    ids = [str(payment_id) for payment_id in ids]
+    results: list = [None] * len(ids)
+    payments = ledger.get_many(ids)
+    
+    # Check every payment first; a payment listed twice is refunded once
+    to_refund: Dict[str, int] = {}
+    duplicates = []
+    for index, payment_id in enumerate(ids):
+        payment = payments.get(payment_id)
+        if payment is None:
+            results[index] = {"success": False, "error": "Payment not found", "payment_id": payment_id}
+        elif payment["status"] != "completed":
+            results[index] = {"success": False, "payment_id": payment_id,
+                              "error": f"Payment cannot be refunded (current status: {payment['status']})"}
+        elif payment_id in to_refund:
+            duplicates.append((index, payment_id))
+        else:
+            to_refund[payment_id] = index
+    
+    # Call the gateway for every refund concurrently
+    outcomes = await asyncio.gather(*(refund_charge(payments[payment_id]) for payment_id in to_refund))
+    refund_timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    references = {payment_id: new_id("RF") for payment_id in to_refund}
+    approved = [payment_id for payment_id, success in zip(to_refund, outcomes) if success]
+    
+    # Record the approved refunds in one ledger transaction
+    def append_all(conn):
+        written = {}
+        for payment_id in approved:
+            try:
+                written[payment_id] = append_refund(conn, payment_id, reason, refund_timestamp, references[payment_id])
+            except LedgerError as e:
+                written[payment_id] = e
+        return written
+    
+    written = await ledger.write(append_all) if approved else {}
+    for payment_id, index in to_refund.items():
+        outcome = written.get(payment_id)
+        if isinstance(outcome, LedgerError):
+            results[index] = {"success": False, "error": str(outcome), "payment_id": payment_id}
+        else:
+            results[index] = build_refund_response(outcome or payments[payment_id], outcome is not None,
+                                                   reason, refund_timestamp, references[payment_id])
+    for index, payment_id in duplicates:
+        results[index] = {"success": False, "payment_id": payment_id,
+                          "error": "Duplicate payment ID in batch; refunded once"}
+    
+    for index, result in enumerate(results):
+        result["index"] = index
+    
+    succeeded = sum(1 for result in results if result["success"])
+    return json.dumps({
+        "success": succeeded == len(results),
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }, indent=2)
+
+@mcp.tool()
+async def payment_report(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                         currency: Optional[str] = None, status: Optional[str] = None,
+                         card_type: Optional[str] = None, group_by: str = "day,currency,status",
+                         reconcile: bool = False) -> str:
+    """Report payment counts and amounts, e.g. for reconciliation with the payment gateway.
+    
+    Payments are counted under their current status (a refunded payment
+    counts as refunded, on the day it was paid) and under the day they were
+    made. Totals are kept per day, currency, status and card type as
+    payments are recorded, so reports do not read every payment.
+    
+    Args:
+        start_date: Optional first day to include (YYYY-MM-DD)
+        end_date: Optional last day to include (YYYY-MM-DD)
+        currency: Optional currency code to include (e.g., USD)
+        status: Optional status to include: completed, failed or refunded
+        card_type: Optional card type to include (e.g., Visa)
+        group_by: Comma-separated columns to group by: day, month, currency,
+            status, card_type (empty for overall totals)
+        reconcile: Also recompute the totals from every payment in the ledger
+            and list any difference (slow on a large ledger)
+    
+    Returns:
+        JSON string containing one row per group and the totals per currency
+    """
+    groups = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = [name for name in groups if name not in REPORT_GROUPS]
+    if unknown:
+        return json.dumps({
+            "success": False,
+            "error": f"Cannot group by {', '.join(unknown)}; choose from {', '.join(REPORT_GROUPS)}"
+        }, indent=2)
+    for name, value in (("start_date", start_date), ("end_date", end_date)):
+        try:
+            if value:
+                datetime.datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            return json.dumps({"success": False, "error": f"Invalid {name}. Use YYYY-MM-DD format."}, indent=2)
+    
+    filters = {"start_day": start_date, "end_day": end_date, "currency": currency.upper() if currency else None,
+               "status": status, "card_type": card_type}
+    
+    def with_amount(row):
+        row["amount"] = round(row.pop("amount_cents") / 100, 2)
+        return row
     
-    # Build response
     response = {
-        "success": success,
-        "payment_id": payment_id,
-        "reservation_id": payment["reservation_id"],
-        "amount": payment["amount"],
-        "currency": payment["currency"],
-        "refund_timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "reason": reason,
-        "status": payment["status"],
-        "refund_reference": f"RF{random.randint(100000, 999999)}"
+        "success": True,
+        "group_by": groups,
+        "rows": [with_amount(row) for row in ledger.report(groups, **filters)],
+        # Amounts in different currencies do not add up, so the totals are per currency
+        "totals": [with_amount(row) for row in ledger.report(["currency"], **filters)],
     }
     
-    if not success:
-        response["error"] = "Refund processing failed. Please try again later."
+    if reconcile:
+        # Reads the whole ledger, so keep it off the event loop
+        reconciliation = await asyncio.to_thread(ledger.reconcile, **filters)
+        if reconciliation["mismatches"]:
+            logger.error("Payment rollups differ from the ledger in %d group(s)", len(reconciliation["mismatches"]))
+        response["reconciliation"] = {"consistent": not reconciliation["mismatches"], **reconciliation}
     
     return json.dumps(response, indent=2)
 
@@ -230,59 +597,16 @@ async def validate_payment_details(card_number: str, card_expiry: str, card_cvv:
     Returns:
         JSON string containing validation results
     """
-    result = validate_card(card_number, card_expiry, card_cvv)
-    
-    # Get card type if valid
-    card_type = get_card_type(card_number) if result else "Unknown"
+    validation = validate_card_details(card_number, card_expiry, card_cvv)
     
     response = {
-        "valid": result,
-        "card_type": card_type if result else None,
-        "errors": []
+        "valid": validation.valid,
+        "card_type": validation.card_type,
+        "errors": validation.errors
     }
     
-    # Add specific error messages if validation failed
-    if not result:
-        if not (card_number.isdigit() and 13 <= len(card_number) <= 19):
-            response["errors"].append("Invalid card number")
-        
-        if not (len(card_expiry) == 5 and expiry[2] == '/' and expiry[:2].isdigit() and expiry[3:].isdigit()):
-            response["errors"].append("Invalid expiry date format (should be MM/YY)")
-        else:
-            current_month = datetime.datetime.now().month
-            current_year = datetime.datetime.now().year % 100
-            expiry_month = int(card_expiry[:2])
-            expiry_year = int(card_expiry[3:])
-            
-            if expiry_year < current_year or (expiry_year == current_year and expiry_month < current_month):
-                response["errors"].append("Card has expired")
-        
-        if not (card_cvv.isdigit() and 3 <= len(card_cvv) <= 4):
-            response["errors"].append("Invalid CVV code")
-    
     return json.dumps(response, indent=2)
 
-# Helper function to determine card type based on number
-def get_card_type(card_number):
-    if not card_number or not card_number.isdigit():
-        return "Unknown"
-    
-    # Simple detection based on card number prefix and length
-    if card_number.startswith('4'):
-        return "Visa"
-    elif card_number.startswith(('51', '52', '53', '54', '55')):
-        return "MasterCard"
-    elif card_number.startswith(('34', '37')):
-        return "American Express"
-    elif card_number.startswith(('300', '301', '302', '303', '304', '305', '36', '38')):
-        return "Diners Club"
-    elif card_number.startswith('6'):
-        return "Discover"
-    elif card_number.startswith(('2221', '2222', '2223', '2224', '2225', '2226', '2227', '2228', '2229', '223', '224', '225', '226', '227', '228', '229', '23', '24', '25', '26', '270', '271', '2720')):
-        return "MasterCard"
-    else:
-        return "Unknown"
-
 if __name__ == "__main__":
-    # Initialize and run the server
-    mcp.run(transport='stdio') 
\ No newline at end of file
+    # Initialize and run the server (stdio by default, see --help for network transports)
+    run_server(mcp) 
\ No newline at end of file
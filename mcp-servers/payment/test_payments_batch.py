@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from common.events import EventBus
+from ledger import PaymentLedger
+
+CARD = {"card_number": "4111111111111111", "card_expiry": "12/30", "card_cvv": "123"}
+
+
+def payment(reservation_id, **fields):
+    return {"reservation_id": reservation_id, "amount": 120.0, "currency": "USD", "cardholder_name": "Ada Lovelace",
+            "email": "ada@example.com", **CARD, **fields}
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    import payment_service
+
+    ledger = PaymentLedger(str(tmp_path / "payments.db"))
+    events = EventBus(str(tmp_path / "events.db"))
+    monkeypatch.setattr(payment_service, "ledger", ledger)
+    monkeypatch.setattr(payment_service, "events", events)
+    monkeypatch.setattr(payment_service, "charge_card", lambda *args: asyncio.sleep(0, True))
+    yield payment_service
+    ledger.close()
+    events.close()
+
+
+def pay(service, payments):
+    return json.loads(asyncio.run(service.process_payments_batch(json.dumps(payments))))
+
+
+def test_invalid_items_fail_on_their_own(service):
+    result = pay(service, [
+        payment("HR1"),
+        payment("HR2", amount=-5),
+        payment("HR3", currency="US"),
+        payment("HR4", currency=840),
+        payment("HR5", card_number="1234"),
+        {"reservation_id": "HR6"},
+    ])
+    assert (result["total"], result["succeeded"], result["failed"]) == (6, 1, 5)
+    errors = [item.get("error") for item in result["results"]]
+    assert errors[0] is None
+    assert errors[1] == "Amount must be greater than 0."
+    assert errors[2] == errors[3] == "Currency must be a 3-letter code (e.g., USD)."
+    assert errors[4] == "Invalid card details. Please check and try again."
+    assert errors[5].startswith("Missing fields: amount, currency")
+    assert [item["index"] for item in result["results"]] == list(range(6))
+    assert [item["reservation_id"] for item in result["results"]] == [f"HR{n}" for n in range(1, 7)]
+
+
+def test_idempotency_key_charges_once_within_and_across_batches(service):
+    first = pay(service, [payment("HR1", idempotency_key="k1"), payment("HR1", idempotency_key="k1")])
+    again = pay(service, [payment("HR1", idempotency_key="k1")])
+    payment_ids = {item["payment_id"] for item in first["results"] + again["results"]}
+    assert len(payment_ids) == 1
+    assert [bool(item.get("idempotent_replay")) for item in first["results"]] == [False, True]
+    assert again["results"][0]["idempotent_replay"] is True
+
+
+@pytest.mark.parametrize("payments, error", [
+    ("not json", "Invalid payments format. Must be a JSON array."),
+    ("[]", "payments must be a non-empty JSON array."),
+    ("[1]", "Each payment must be a JSON object."),
+])
+def test_malformed_batches_are_rejected(service, payments, error):
+    result = json.loads(asyncio.run(service.process_payments_batch(payments)))
+    assert result == {"success": False, "error": error}
+
+
+def test_batch_size_is_limited(service):
+    result = pay(service, [payment(f"HR{n}") for n in range(service.MAX_BATCH_SIZE + 1)])
+    assert result["success"] is False and "limit is" in result["error"]
@@ -0,0 +1,263 @@
+"""Vectorized generation of synthetic transport and hotel options.
+
+The generators draw every random attribute for N options at once into NumPy
+columns (prices, stars, times as int64 minutes since the epoch, amenities
+as a bitmask over AMENITIES, and indexes into the sample-data lists). The
+columns stay as arrays until `to_dicts`/`to_json` materialize rows at the
+edge, which is where search tools, load tests and fixtures finally need
+them.
+"""
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, fields, replace
+import datetime
+import json
+
+import numpy as np
+
+from common.ids import new_id
+from sample_data import (AIRLINES, AMENITIES, BUS_COMPANIES, FLIGHT_CLASSES, GROUND_CLASSES, HOTEL_CHAINS,
+                         HOTEL_DESCRIPTORS, STREET_NAMES, STREET_TYPES, TRAIN_COMPANIES)
+
+# Per transport type: companies, ticket classes, and the ranges the
+# route-level base duration and price are drawn from
+TRANSPORT_PROFILES = {
+    "flight": (AIRLINES, FLIGHT_CLASSES, 60, (30, 240), 150, (50, 500)),
+    "train": (TRAIN_COMPANIES, GROUND_CLASSES, 90, (30, 180), 50, (20, 150)),
+    "bus": (BUS_COMPANIES, GROUND_CLASSES, 120, (60, 240), 20, (10, 80)),
+}
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+# Amenity names for every possible bitmask, decoded once
+AMENITY_BITS = 1 << np.arange(len(AMENITIES), dtype=np.uint16)
+_AMENITY_LISTS = [[name for bit, name in enumerate(AMENITIES) if mask >> bit & 1] for mask in range(1 << len(AMENITIES))]
+
+_default_rng = np.random.default_rng()
+
+
+def amenity_mask(names: List[str]) -> int:
+    """Bitmask for a list of amenity names (unknown names are ignored)."""
+    return sum(1 << AMENITIES.index(name) for name in names if name in AMENITIES)
+
+
+def amenity_names(mask: int) -> List[str]:
+    return list(_AMENITY_LISTS[mask])
+
+
+def guest_factor(guests: int) -> float:
+    """Price multiplier for a stay: each additional guest adds 30%."""
+    return 1.0 + (guests - 1) * 0.3
+
+
+def format_minutes(minutes: np.ndarray) -> List[str]:
+    """Format int64 minutes since the epoch as "YYYY-MM-DD HH:MM" strings, vectorized."""
+    return np.char.replace(minutes.astype("datetime64[m]").astype(str), "T", " ").tolist()
+
+
+def _days_since_epoch(date: str) -> int:
+    return (datetime.datetime.strptime(date, "%Y-%m-%d") - EPOCH).days
+
+
+def _sample_amenities(rng: np.random.Generator, n: int) -> np.ndarray:
+    # random.sample(AMENITIES, k) with k in [3, len] for every row: rank random
+    # keys per row and keep the k lowest ranks
+    count = len(AMENITIES)
+    keep = rng.integers(3, count, size=n, endpoint=True)
+    ranks = rng.random((n, count)).argsort(axis=1).argsort(axis=1)
+    return ((ranks < keep[:, None]) * AMENITY_BITS).sum(axis=1, dtype=np.uint16)
+
+
+@dataclass
+class TransportBatch:
+    """N transport options for one route and date, stored column-wise."""
+    transport_type: str
+    origin: str
+    destination: str
+    company: np.ndarray      # int8 index into the type's companies
+    departure: np.ndarray    # int64 minutes since the epoch
+    duration: np.ndarray     # int32 minutes
+    price: np.ndarray        # int32 USD
+    seats: np.ndarray        # int16 seat capacity
+    ticket_class: np.ndarray # int8 index into the type's classes
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    @property
+    def arrival(self) -> np.ndarray:
+        return self.departure + self.duration
+
+    def to_dicts(self, order: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Materialize rows (in `order`, default cheapest first) in the search tool format, with new ids."""
+        if order is None:
+            order = np.argsort(self.price, kind="stable")
+        companies, classes = TRANSPORT_PROFILES[self.transport_type][:2]
+        prefix = self.transport_type[0].upper()
+        departures = format_minutes(self.departure[order])
+        arrivals = format_minutes(self.arrival[order])
+        durations = self.duration[order].tolist()
+        rows = []
+        for i, company, price, seats, ticket_class in zip(range(len(order)), self.company[order].tolist(),
+                                                          self.price[order].tolist(), self.seats[order].tolist(),
+                                                          self.ticket_class[order].tolist()):
+            rows.append({
+                "id": new_id(prefix),
+                "type": self.transport_type,
+                "company": companies[company],
+                "origin": self.origin,
+                "destination": self.destination,
+                "departure": departures[i],
+                "arrival": arrivals[i],
+                "duration": f"{durations[i] // 60}h {durations[i] % 60}m",
+                "price": price,
+                "currency": "USD",
+                "seats_available": seats,
+                "class": classes[ticket_class],
+            })
+        return rows
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.to_dicts(), **kwargs)
+
+
+@dataclass
+class HotelBatch:
+    """N hotel options for one city and stay, stored column-wise."""
+    city: str
+    check_in: str
+    check_out: str
+    nights: int
+    guests: int
+    chain: np.ndarray            # int8 index into HOTEL_CHAINS
+    descriptor: np.ndarray       # int8 index into HOTEL_DESCRIPTORS
+    stars: np.ndarray            # int8
+    price_per_night: np.ndarray  # int32 USD
+    amenities: np.ndarray        # uint16 bitmask over AMENITIES
+    rooms: np.ndarray            # int16 room capacity
+    rating: np.ndarray           # float32, one decimal
+    reviews: np.ndarray          # int16
+    street_number: np.ndarray    # int16
+    street: np.ndarray           # int8 index into STREET_NAMES
+    street_type: np.ndarray      # int8 index into STREET_TYPES
+
+    def __len__(self) -> int:
+        return len(self.stars)
+
+    @property
+    def total_price(self) -> np.ndarray:
+        return self.price_per_night * self.nights
+
+    def take(self, rows: np.ndarray) -> "HotelBatch":
+        """A batch holding only `rows`, in that order."""
+        return replace(self, **{name: getattr(self, name)[rows] for name in HOTEL_COLUMNS})
+
+    def to_dicts(self, order: Optional[np.ndarray] = None,
+                 ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Materialize rows (in `order`, default cheapest first) in the search tool format.
+
+        `ids` gives the id of each materialized row; by default every row gets a new id.
+        """
+        if order is None:
+            order = np.argsort(self.price_per_night, kind="stable")
+        ids = ids if ids is not None else [new_id("H") for _ in range(len(order))]
+        columns = zip(ids, self.chain[order].tolist(), self.descriptor[order].tolist(), self.stars[order].tolist(),
+                      self.price_per_night[order].tolist(), self.total_price[order].tolist(),
+                      self.amenities[order].tolist(), self.rooms[order].tolist(),
+                      np.round(self.rating[order].astype(np.float64), 1).tolist(), self.reviews[order].tolist(),
+                      self.street_number[order].tolist(), self.street[order].tolist(),
+                      self.street_type[order].tolist())
+        rows = []
+        for hotel_id, chain, descriptor, stars, price, total, amenities, rooms, rating, reviews, number, street, kind in columns:
+            rows.append({
+                "id": hotel_id,
+                "name": f"{HOTEL_CHAINS[chain]} {self.city} {HOTEL_DESCRIPTORS[descriptor]}",
+                "chain": HOTEL_CHAINS[chain],
+                "city": self.city,
+                "address": f"{number} {STREET_NAMES[street]} {STREET_TYPES[kind]}",
+                "stars": stars,
+                "price_per_night": price,
+                "total_price": total,
+                "currency": "USD",
+                "check_in": self.check_in,
+                "check_out": self.check_out,
+                "nights": self.nights,
+                "guests": self.guests,
+                "amenities": amenity_names(amenities),
+                "rooms_available": rooms,
+                "rating": rating,
+                "reviews": reviews,
+            })
+        return rows
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.to_dicts(), **kwargs)
+
+
+# The per-hotel array columns of a HotelBatch
+HOTEL_COLUMNS = tuple(field.name for field in fields(HotelBatch) if field.type is np.ndarray)
+
+
+def generate_transport_batch(n: int, origin: str, destination: str, date: str, transport_type: str,
+                             rng: Optional[np.random.Generator] = None) -> TransportBatch:
+    """Generate `n` options for a route with the same distributions as the search tools.
+
+    Raises ValueError for an unknown transport type or a malformed date.
+    """
+    transport_type = transport_type.lower()
+    if transport_type not in TRANSPORT_PROFILES:
+        raise ValueError(f"Unknown transport type: {transport_type}")
+    rng = rng or _default_rng
+    companies, classes, duration_offset, duration_range, price_offset, price_range = TRANSPORT_PROFILES[transport_type]
+    day_start = _days_since_epoch(date) * 1440
+
+    # Route-level base duration and price, varied per option
+    duration_base = duration_offset + int(rng.integers(*duration_range, endpoint=True))
+    price_base = price_offset + int(rng.integers(*price_range, endpoint=True))
+
+    # Departures between 6:00 and 22:45 on a quarter hour
+    departure = (day_start + rng.integers(6, 22, size=n, endpoint=True) * 60
+                 + rng.integers(0, 4, size=n) * 15).astype(np.int64)
+    return TransportBatch(
+        transport_type=transport_type,
+        origin=origin,
+        destination=destination,
+        company=rng.integers(0, len(companies), size=n).astype(np.int8),
+        departure=departure,
+        duration=(duration_base + rng.integers(-30, 30, size=n, endpoint=True)).astype(np.int32),
+        price=(price_base + rng.integers(-20, 100, size=n, endpoint=True)).astype(np.int32),
+        seats=rng.integers(1, 30, size=n, endpoint=True).astype(np.int16),
+        ticket_class=rng.integers(0, len(classes), size=n).astype(np.int8),
+    )
+
+
+def generate_hotel_batch(n: int, city: str, check_in: str, check_out: str, guests: int = 1,
+                         rng: Optional[np.random.Generator] = None) -> HotelBatch:
+    """Generate `n` hotel options for a stay with the same distributions as the search tools.
+
+    Raises ValueError for malformed dates or a stay of no nights.
+    """
+    nights = _days_since_epoch(check_out) - _days_since_epoch(check_in)
+    if nights <= 0:
+        raise ValueError("check_out must be after check_in")
+    rng = rng or _default_rng
+
+    stars = rng.integers(3, 5, size=n, endpoint=True).astype(np.int8)
+    base_price = 50 + stars.astype(np.int32) * 30 + rng.integers(0, 100, size=n, endpoint=True)
+    return HotelBatch(
+        city=city,
+        check_in=check_in,
+        check_out=check_out,
+        nights=nights,
+        guests=guests,
+        chain=rng.integers(0, len(HOTEL_CHAINS), size=n).astype(np.int8),
+        descriptor=rng.integers(0, len(HOTEL_DESCRIPTORS), size=n).astype(np.int8),
+        stars=stars,
+        price_per_night=(base_price * guest_factor(guests)).astype(np.int32),
+        amenities=_sample_amenities(rng, n),
+        rooms=rng.integers(1, 10, size=n, endpoint=True).astype(np.int16),
+        rating=(3.0 + rng.random(n) * 2.0).round(1).astype(np.float32),
+        reviews=rng.integers(50, 500, size=n, endpoint=True).astype(np.int16),
+        street_number=rng.integers(1, 999, size=n, endpoint=True).astype(np.int16),
+        street=rng.integers(0, len(STREET_NAMES), size=n).astype(np.int8),
+        street_type=rng.integers(0, len(STREET_TYPES), size=n).astype(np.int8),
+    )
@@ -0,0 +1,102 @@
+"""Nightly hotel rates and room availability as (hotel, night) arrays.
+
+A city's demand sets every hotel's rate for a night: the one-guest base rate
+times a multiplier with a summer peak, a Friday/Saturday surcharge and some
+day-to-day noise. A stay is charged at the base rate times the stay's mean
+multiplier, for every night, so the hotels' ranking by price is the same for
+any stay and the hotel index keeps its price orders. Rooms left per night
+follow demand, so busy nights sell out.
+
+Everything is derived from the city seed, the hotel row and the day by a
+counter-based hash, so any range of nights is computed directly, without
+stepping a random generator through the days before it.
+"""
+from typing import Tuple
+import datetime
+
+import numpy as np
+
+EPOCH = datetime.date(1970, 1, 1)
+
+# Friday and Saturday nights cost more; weekday 0 is Monday
+WEEKEND_NIGHTS = (4, 5)
+WEEKEND_SURCHARGE = 1.25
+
+# Seasonal swing around mid-July (day of year 196)
+SEASON_AMPLITUDE = 0.15
+SEASON_PEAK_DAY = 196
+
+
+def day_number(date: str) -> int:
+    """Days since the epoch for a YYYY-MM-DD date (raises ValueError if malformed)."""
+    return (datetime.datetime.strptime(date, "%Y-%m-%d").date() - EPOCH).days
+
+
+def day_string(day: int) -> str:
+    return (EPOCH + datetime.timedelta(days=int(day))).isoformat()
+
+
+def hash_uniform(*keys: np.ndarray) -> np.ndarray:
+    """Uniform floats in [0, 1) from integer keys (broadcast together), via the splitmix64 finalizer."""
+    shape = np.broadcast(*keys).shape
+    # x only grows to the shape of the keys mixed in so far: a scalar seed is
+    # mixed once, not once per element, and (hotels, 1) rows once per hotel
+    x = np.zeros((), dtype=np.uint64)
+    # The multiplications wrap around on purpose
+    with np.errstate(over="ignore"):
+        for key in keys:
+            x = (x ^ np.asarray(key).astype(np.uint64)) * np.uint64(0x9E3779B97F4A7C15)
+            x ^= x >> np.uint64(30)
+            x *= np.uint64(0xBF58476D1CE4E5B9)
+            x ^= x >> np.uint64(27)
+            x *= np.uint64(0x94D049BB133111EB)
+            x ^= x >> np.uint64(31)
+    return (np.broadcast_to(x, shape) >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def demand(seed: int, first_day: int, days: int) -> np.ndarray:
+    """Rate multiplier for each of `days` nights from `first_day` (days since the epoch)."""
+    day = np.arange(first_day, first_day + days, dtype=np.int64)
+    dates = day.astype("datetime64[D]")
+    day_of_year = (dates - dates.astype("datetime64[Y]")).astype(np.int64)
+    season = 1.0 + SEASON_AMPLITUDE * np.cos(2 * np.pi * (day_of_year - SEASON_PEAK_DAY) / 365.25)
+    weekend = np.isin((day + 3) % 7, WEEKEND_NIGHTS)
+    noise = 0.95 + 0.1 * hash_uniform(np.int64(seed), day)
+    return season * noise * np.where(weekend, WEEKEND_SURCHARGE, 1.0)
+
+
+def rooms_left(seed: int, rows: np.ndarray, rooms: np.ndarray, first_day: int, days: int,
+               multipliers: np.ndarray) -> np.ndarray:
+    """Rooms left per hotel (`rows`, with capacities `rooms`) and night, shape (hotels, days)."""
+    day = np.arange(first_day, first_day + days, dtype=np.int64)
+    occupancy = hash_uniform(np.int64(seed) + 1, rows[:, None], day[None, :]) * 0.7 + (multipliers[None, :] - 0.9)
+    booked = np.rint(rooms[:, None] * np.clip(occupancy, 0.0, 1.0)).astype(np.int16)
+    return rooms[:, None].astype(np.int16) - booked
+
+
+def stay_rate(base: np.ndarray, factor: float, multipliers: np.ndarray) -> np.ndarray:
+    """Nightly rate for a stay: the base rate times `factor` (guests) and the stay's mean multiplier."""
+    return (base * (factor * float(multipliers.mean()))).astype(np.int32)
+
+
+def cheapest_windows(base: np.ndarray, factor: float, multipliers: np.ndarray, rooms: np.ndarray, nights: int,
+                     rooms_needed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """The cheapest `nights`-night window per hotel, over check-in nights 0..len(multipliers) - nights.
+
+    `rooms` is the (hotels, nights) availability grid. Returns the check-in
+    offset and the total price per hotel; the total is -1 for a hotel with no
+    window that has `rooms_needed` rooms every night. Short nights are counted
+    with prefix sums, so all windows of all hotels are checked at once.
+    """
+    windows = len(multipliers) - nights + 1
+    # Means over sliding windows, computed exactly as stay_rate computes a stay's mean
+    window_demand = np.lib.stride_tricks.sliding_window_view(multipliers, nights).mean(axis=1)
+    short = np.concatenate((np.zeros((len(base), 1), dtype=np.int32),
+                            np.cumsum(rooms < rooms_needed, axis=1, dtype=np.int32)), axis=1)
+    open_window = short[:, nights:] == short[:, :windows]
+
+    totals = (base[:, None] * (factor * window_demand[None, :])).astype(np.int64) * nights
+    totals = np.where(open_window, totals, np.iinfo(np.int64).max)
+    start = totals.argmin(axis=1)
+    best = totals[np.arange(len(base)), start]
+    return start, np.where(best == np.iinfo(np.int64).max, -1, best)
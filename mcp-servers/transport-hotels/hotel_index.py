@@ -0,0 +1,331 @@
+"""Indexed hotel inventory for filtered hotel searches.
+
+Each city has a fixed set of hotels, generated once from a seed derived from
+the city name and kept as NumPy columns. Amenities are a bitmask per hotel,
+so "has all of these amenities" is one AND and compare. The hotels are
+partitioned by star rating, and each partition keeps three orders built at
+index time, cheapest first, best rated first and most stars first, together
+with its prices and ratings laid out in those orders.
+
+Within each partition the minimum star rating allows, a query picks the
+narrowest bound it can resolve with a binary search over the sorted prices
+or ratings. When that bound is on the sort key, or there is none, it walks
+the sort order in growing chunks and stops as soon as `limit` hotels pass
+the remaining filters, so a query typically touches a few hundred rows even
+over millions of hotels. Otherwise only the rows inside the bound are
+filtered. The partitions' results are merged by sort key, and rows are
+materialized for the matching hotels only.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import math
+import threading
+import zlib
+
+import numpy as np
+
+from bulk_generators import HotelBatch, generate_hotel_batch, guest_factor
+from hotel_calendar import cheapest_windows, day_string, demand, rooms_left, stay_rate
+from sample_data import AMENITIES
+
+SORT_KEYS = ("price", "rating", "stars")
+
+# The chunk walked first when scanning a sort order; each later chunk is 4x larger
+SCAN_CHUNK = 256
+
+_AMENITY_BY_NAME = {name.lower(): name for name in AMENITIES}
+
+
+def night_id(hotel_id: str, day: int) -> str:
+    """Inventory item id of a hotel's rooms on one night (days since the epoch)."""
+    return f"{hotel_id}@{day}"
+
+
+def parse_amenities(amenities: Optional[str]) -> List[str]:
+    """Parse a comma-separated list or JSON array of amenity names (case-insensitive).
+
+    Raises ValueError for names that are not in AMENITIES.
+    """
+    if not amenities or not amenities.strip():
+        return []
+    text = amenities.strip()
+    names = json.loads(text) if text.startswith("[") else text.split(",")
+    names = [str(name).strip() for name in names if str(name).strip()]
+    unknown = [name for name in names if name.lower() not in _AMENITY_BY_NAME]
+    if unknown:
+        raise ValueError(f"Unknown amenities: {', '.join(unknown)}. Valid amenities: {', '.join(AMENITIES)}")
+    return [_AMENITY_BY_NAME[name.lower()] for name in names]
+
+
+class _Partition:
+    """The hotels with one star rating, in each sort order, with their sorted prices and ratings."""
+
+    def __init__(self, stars: int, orders: Dict[str, np.ndarray], price: np.ndarray, rating: np.ndarray):
+        self.stars = stars
+        self.orders = orders
+        # Prices ascending and ratings descending (negated, so both ascend) for binary search
+        self.sorted_price = price[orders["price"]]
+        self.sorted_neg_rating = -rating[orders["rating"]]
+
+
+class HotelIndex:
+    """The hotels of one city, with one-guest nightly prices, indexed for filtered search."""
+
+    def __init__(self, batch: HotelBatch, ids: Optional[List[str]] = None, seed: int = 0,
+                 held: Optional[Callable[[str], Dict[str, int]]] = None):
+        if batch.guests != 1:
+            raise ValueError("HotelIndex needs one-guest prices")
+        self.batch = batch
+        self.seed = seed
+        self._rows_by_id: Optional[Dict[str, int]] = None
+        # Ids come from the city seed and row, so a hotel keeps its id when the
+        # city is evicted and rebuilt, or in another process
+        self.prefix = f"H{seed:08X}"
+        self.ids = ids if ids is not None else [f"{self.prefix}{row:06X}" for row in range(len(batch))]
+        # Rooms held or booked per night_id() of this city's hotels, keyed by prefix
+        self.held = held
+        price = batch.price_per_night
+        rating = batch.rating
+        stars = batch.stars
+
+        # Sort orders; ties fall back to the other keys so results are stable
+        orders = {
+            "price": np.lexsort((-stars, -rating, price)),
+            "rating": np.lexsort((-stars, price, -rating)),
+            "stars": np.lexsort((-rating, price, -stars)),
+        }
+        # Position of every hotel in each order, used to merge and rank filtered rows
+        self._ranks = {}
+        for key, order in orders.items():
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            self._ranks[key] = rank
+        # Price rises with stars, so each star rating gets its own orders: a
+        # "5 stars, cheapest first" query then starts at the cheapest 5-star
+        # hotel instead of walking past every cheaper 3- and 4-star one
+        self._partitions = [
+            _Partition(int(value), {key: order[stars[order] == value] for key, order in orders.items()}, price, rating)
+            for value in sorted(np.unique(stars).tolist(), reverse=True)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.batch)
+
+    def search(self, max_price: Optional[int] = None, min_stars: Optional[int] = None,
+               min_rating: Optional[float] = None, amenities: int = 0, sort_by: str = "price",
+               limit: int = 10, guests: int = 1, stay: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Return the row numbers of up to `limit` matching hotels, best first by `sort_by`.
+
+        `max_price` bounds the nightly price for `guests`; `amenities` is a
+        bitmask of amenities every result must have. With `stay` (first night
+        in days since the epoch, nights), prices are the stay's nightly rate
+        and only hotels with a room left every night match. Raises ValueError
+        for an unknown sort key.
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort_by}. Valid keys: {', '.join(SORT_KEYS)}")
+        if limit <= 0:
+            return np.empty(0, dtype=np.int64)
+        batch = self.batch
+        factor = guest_factor(guests)
+        if stay is not None:
+            multipliers = demand(self.seed, *stay)
+            factor *= float(multipliers.mean())
+        min_rating = None if min_rating is None else np.float32(min_rating)
+        # int(base * factor) <= max_price needs base * factor < max_price + 1. The
+        # bound keeps one extra price for float rounding; keep() applies the exact test
+        price_ceiling = None
+        if max_price is not None:
+            price_ceiling = np.int32(min(math.ceil((max_price + 1) / factor) + 1, np.iinfo(np.int32).max))
+
+        def keep(rows: np.ndarray) -> np.ndarray:
+            mask = np.ones(len(rows), dtype=bool)
+            if max_price is not None:
+                mask &= (batch.price_per_night[rows] * factor).astype(np.int32) <= max_price
+            if min_rating is not None:
+                mask &= batch.rating[rows] >= min_rating
+            if amenities:
+                mask &= (batch.amenities[rows] & amenities) == amenities
+            if stay is not None:
+                rows = rows[mask]
+                return rows[self.rooms_left(rows, *stay, multipliers).min(axis=1) > 0]
+            return rows[mask]
+
+        found = []
+        count = 0
+        for partition in self._partitions:
+            if min_stars is not None and partition.stars < min_stars:
+                break
+            if sort_by == "stars" and count >= limit:
+                # Partitions go from most stars down, so the rest would rank below
+                break
+            rows = self._search_partition(partition, price_ceiling, min_rating, keep, sort_by, limit)
+            found.append(rows)
+            count += len(rows)
+        rows = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+        return rows[np.argsort(self._ranks[sort_by][rows])][:limit]
+
+    def _search_partition(self, partition: _Partition, price_ceiling: Optional[np.int32],
+                          min_rating: Optional[np.float32], keep: Callable[[np.ndarray], np.ndarray],
+                          sort_by: str, limit: int) -> np.ndarray:
+        # Rows of each bounded key's order that can satisfy the bound
+        bounds = {}
+        if price_ceiling is not None:
+            bounds["price"] = int(np.searchsorted(partition.sorted_price, price_ceiling, side="left"))
+        if min_rating is not None:
+            bounds["rating"] = int(np.searchsorted(partition.sorted_neg_rating, -min_rating, side="right"))
+
+        order = partition.orders[sort_by][:bounds.get(sort_by, len(partition.orders[sort_by]))]
+        narrowest = min(bounds, key=bounds.get) if bounds else None
+        if narrowest is None or len(order) == bounds[narrowest]:
+            # The sort order, cut at its own bound, is the narrowest candidate set
+            return self._scan(order, keep, limit, len(order))
+
+        # Walk the sort order while that is cheaper than filtering every row in
+        # the narrowest bound; fall back to the bound when too few rows match
+        found = self._scan(order, keep, limit, bounds[narrowest])
+        if found is not None:
+            return found
+        rows = keep(partition.orders[narrowest][:bounds[narrowest]])
+        if len(rows) > limit:
+            rows = rows[np.argpartition(self._ranks[sort_by][rows], limit - 1)[:limit]]
+        return rows
+
+    @staticmethod
+    def _scan(order: np.ndarray, keep: Callable[[np.ndarray], np.ndarray], limit: int,
+              budget: int) -> Optional[np.ndarray]:
+        """The first `limit` rows of `order` that pass `keep`, visiting at most
+        `budget` rows; None if the budget ran out first."""
+        found = []
+        count = 0
+        start = 0
+        chunk = max(SCAN_CHUNK, limit)
+        while count < limit:
+            if start >= len(order):
+                break
+            if start >= budget:
+                return None
+            end = min(start + chunk, budget)
+            rows = keep(order[start:end])
+            found.append(rows)
+            count += len(rows)
+            start = end
+            chunk *= 4
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found)[:limit]
+
+    def rooms_left(self, rows: np.ndarray, first_day: int, days: int,
+                   multipliers: Optional[np.ndarray] = None, held: bool = True) -> np.ndarray:
+        """Rooms left per hotel in `rows` and night, shape (hotels, days).
+
+        Rooms held or booked through the `held` callback are taken off unless
+        `held` is False, which gives the rooms the nights are registered with.
+        """
+        if multipliers is None:
+            multipliers = demand(self.seed, first_day, days)
+        rooms = rooms_left(self.seed, rows, self.batch.rooms[rows], first_day, days, multipliers)
+        return self.subtract_held(rows, first_day, rooms) if held else rooms
+
+    def subtract_held(self, rows: np.ndarray, first_day: int, rooms: np.ndarray) -> np.ndarray:
+        """Take the rooms held or booked off `rooms` (from rooms_left with held=False) in place."""
+        days = rooms.shape[1]
+        taken = self.held(self.prefix) if self.held is not None else None
+        if taken:
+            positions = {row: position for position, row in enumerate(rows.tolist())}
+            for item_id, units in taken.items():
+                hotel_id, _, day = item_id.partition("@")
+                position = positions.get(self.find(hotel_id))
+                offset = int(day) - first_day
+                if position is not None and 0 <= offset < days:
+                    rooms[position, offset] = max(int(rooms[position, offset]) - units, 0)
+        return rooms
+
+    def find(self, hotel_id: str) -> Optional[int]:
+        """Row number of a hotel id, or None."""
+        if self._rows_by_id is None:
+            self._rows_by_id = {hotel_id: row for row, hotel_id in enumerate(self.ids)}
+        return self._rows_by_id.get(hotel_id)
+
+    def cheapest_stays(self, rows: np.ndarray, first_day: int, days: int, nights: int, guests: int = 1,
+                       rooms_needed: int = 1, limit: int = 5) -> List[Dict[str, Any]]:
+        """The hotels in `rows` with the cheapest `nights`-night stay checking in on one of `days` nights.
+
+        Returns up to `limit` hotels, cheapest stay first, each with its row,
+        check-in night, total price, the nightly rates and rooms left for
+        the `days` nights from `first_day`, and the rooms on the stay's
+        nights before holds (`night_rooms`, for rows()). Hotels that never
+        have `rooms_needed` rooms free for the whole stay are left out.
+        """
+        # The arrays run past the last check-in night by the length of its stay
+        multipliers = demand(self.seed, first_day, days + nights - 1)
+        factor = guest_factor(guests)
+        base = self.batch.price_per_night[rows]
+        night_rooms = self.rooms_left(rows, first_day, days + nights - 1, multipliers, held=False)
+        rooms = self.subtract_held(rows, first_day, night_rooms.copy())
+        starts, totals = cheapest_windows(base, factor, multipliers, rooms, nights, rooms_needed)
+
+        open_hotels = np.flatnonzero(totals >= 0)
+        best = open_hotels[np.lexsort((self._ranks["price"][rows[open_hotels]], totals[open_hotels]))][:limit]
+        rates = (base[best, None] * (factor * multipliers[None, :days])).astype(np.int32)
+        return [{
+            "row": int(rows[position]),
+            "check_in": first_day + int(starts[position]),
+            "total_price": int(totals[position]),
+            "nightly_rates": rates[i].tolist(),
+            "rooms_left": rooms[position, :days].tolist(),
+            "night_rooms": night_rooms[position:position + 1, starts[position]:starts[position] + nights],
+        } for i, position in enumerate(best.tolist())]
+
+    def rows(self, rows: np.ndarray, first_day: int, nights: int, guests: int,
+             night_rooms: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Materialize hotels as search results for a stay, in the given order.
+
+        Prices are the stay's nightly rate, and rooms_available the fewest
+        rooms left on any night of the stay. `night_rooms`, if given, are the
+        rooms per hotel and night before holds (rooms_left with held=False).
+        """
+        multipliers = demand(self.seed, first_day, nights)
+        selected = self.batch.take(rows)
+        selected.check_in, selected.check_out = day_string(first_day), day_string(first_day + nights)
+        selected.nights, selected.guests = nights, guests
+        selected.price_per_night = stay_rate(selected.price_per_night, guest_factor(guests), multipliers)
+        if night_rooms is None:
+            rooms = self.rooms_left(rows, first_day, nights, multipliers)
+        else:
+            rooms = self.subtract_held(rows, first_day, night_rooms.copy())
+        selected.rooms = rooms.min(axis=1)
+        return selected.to_dicts(np.arange(len(rows)), ids=[self.ids[row] for row in rows.tolist()])
+
+
+class HotelInventory:
+    """Hotel indexes per city, built on first use and kept for the most recently searched cities."""
+
+    def __init__(self, hotels_per_city: int = 200, max_cities: int = 256,
+                 held: Optional[Callable[[str], Dict[str, int]]] = None):
+        self.hotels_per_city = hotels_per_city
+        self.max_cities = max_cities
+        self.held = held
+        self._indexes: "OrderedDict[str, HotelIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def city(self, city: str) -> HotelIndex:
+        key = city.strip().lower()
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        # Same city name, same hotels and nightly rates: the seed comes from the
+        # name. The batch holds one-guest base rates; rows() applies each stay
+        seed = zlib.crc32(key.encode("utf-8"))
+        batch = generate_hotel_batch(self.hotels_per_city, city.strip(), "1970-01-01", "1970-01-02", 1,
+                                     np.random.default_rng(seed))
+        index = HotelIndex(batch, seed=seed, held=self.held)
+        with self._lock:
+            index = self._indexes.setdefault(key, index)
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_cities:
+                self._indexes.popitem(last=False)
+        return index
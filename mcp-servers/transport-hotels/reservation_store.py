@@ -0,0 +1,357 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+import datetime
+import heapq
+import itertools
+import threading
+import time
+
+from common.ids import new_id
+
+# How long a reservation is held before it expires and releases its capacity
+HOLD_TTL_SECONDS = 30 * 60
+
+# Reservation statuses
+RESERVED = "Reserved"
+CONFIRMED = "Confirmed"
+CANCELLED = "Cancelled"
+EXPIRED = "Expired"
+
+
+class ReservationError(Exception):
+    """Base class for reservation failures that should be reported to the caller."""
+
+
+class InventoryNotFoundError(ReservationError):
+    pass
+
+
+class InsufficientInventoryError(ReservationError):
+    pass
+
+
+class ReservationNotFoundError(ReservationError):
+    pass
+
+
+class InvalidReservationStateError(ReservationError):
+    pass
+
+
+@dataclass
+class Hold:
+    """A reservation holding `quantity` units of an inventory item."""
+    reservation_id: str
+    item_id: str
+    quantity: int
+    status: str
+    created_at: float
+    expires_at: float
+    details: Dict[str, Any] = field(default_factory=dict)
+    # (item id, generation) of every inventory the units were taken from
+    items: Tuple[Tuple[str, int], ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "reservation_id": self.reservation_id,
+            "item_id": self.item_id,
+            "quantity": self.quantity,
+            "status": self.status,
+            "reservation_time": _format_time(self.created_at),
+            "expiry_time": _format_time(self.expires_at),
+            **self.details,
+        }
+
+
+class _Inventory:
+    __slots__ = ("capacity", "available", "holds", "info", "generation", "parts", "group")
+
+    def __init__(self, capacity: int, info: Optional[Dict[str, Any]] = None, generation: int = 0,
+                 parts: Optional[Tuple[str, ...]] = None, group: Optional[str] = None):
+        self.capacity = capacity
+        self.available = capacity
+        # Number of pending (reserved) holds referencing this item; confirmed
+        # bookings keep their units taken but do not stop the item's eviction
+        self.holds = 0
+        # Booking details of the item (route, hotel, dates), copied into its holds
+        self.info = info or {}
+        # Differs for every registration of an item id, so a booking made
+        # before the item was evicted never returns units to its successor
+        self.generation = generation
+        # Items a bundle takes its units from (see register_bundle); None for an item with its own units
+        self.parts = parts
+        # Items of a group report their taken units through ReservationStore.taken()
+        self.group = group
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class ReservationStore:
+    """Seat/room inventory with time-limited holds.
+
+    Every operation runs under a single lock and never awaits, so tool calls
+    running concurrently on the event loop (or on worker threads) see atomic
+    check-and-decrement of inventory. Hold expirations are kept in a min-heap
+    keyed by expiry time; due entries are popped lazily at the start of each
+    operation, so releasing an expired hold costs O(log n). Confirmed and
+    cancelled holds leave stale heap entries behind, which are skipped when
+    popped.
+
+    Confirmed, cancelled and expired holds are kept for status lookups, up to
+    `max_finished_holds` of them, oldest dropped first. An item idle long
+    enough to be evicted forgets its confirmed bookings; registering it again
+    starts from full capacity, and cancelling one of those bookings later
+    leaves the new registration alone.
+
+    A bundle (see register_bundle) has no units of its own: a hold on it
+    takes units from each of its parts at once, such as a hotel stay taking
+    a room on every night, so bundles sharing a part draw from one pool.
+    """
+
+    def __init__(self, hold_ttl: float = HOLD_TTL_SECONDS, max_items: int = 100_000,
+                 max_finished_holds: int = 100_000, clock: Callable[[], float] = time.time):
+        self.hold_ttl = hold_ttl
+        self.max_items = max_items
+        self.max_finished_holds = max_finished_holds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._inventory: "OrderedDict[str, _Inventory]" = OrderedDict()
+        self._holds: Dict[str, Hold] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # Confirmed/cancelled/expired holds kept around for status lookups, oldest first
+        self._finished: deque = deque()
+        self._generations = itertools.count(1)
+        # Units taken per item of each group, for items with any taken
+        self._taken: Dict[str, Dict[str, int]] = {}
+
+    def register(self, item_id: str, capacity: int, info: Optional[Dict[str, Any]] = None,
+                 group: Optional[str] = None) -> int:
+        """Register inventory for an item if it is not known yet.
+
+        `info` holds the item's booking details; holds on the item start with
+        a copy of it. Returns the number of units currently available, which
+        for an item that was already registered reflects the holds placed
+        against it.
+        """
+        with self._lock:
+            self._expire_due_locked(self._clock())
+            inventory = self._register_locked(item_id, capacity, info, group=group)
+            self._evict_idle_items_locked()
+            return inventory.available
+
+    def register_bundle(self, item_id: str, parts: Dict[str, int], info: Optional[Dict[str, Any]] = None,
+                        group: Optional[str] = None) -> int:
+        """Register an item whose holds take units from every one of `parts` at once.
+
+        `parts` maps each part's item id to its capacity, used for parts that
+        are not known yet; parts are registered in `group`. Returns the units
+        available on the bundle: the fewest available on any part.
+        """
+        with self._lock:
+            self._expire_due_locked(self._clock())
+            for part_id, capacity in parts.items():
+                self._register_locked(part_id, capacity, group=group)
+            self._register_locked(item_id, 0, info, parts=tuple(parts))
+            self._evict_idle_items_locked()
+            return min((self._inventory[part_id].available for part_id in parts), default=0)
+
+    def available(self, item_id: str) -> Optional[int]:
+        """Return the available units for an item, or None if it (or one of a bundle's parts) is unknown."""
+        with self._lock:
+            self._expire_due_locked(self._clock())
+            inventory = self._inventory.get(item_id)
+            if inventory is None:
+                return None
+            try:
+                return min(part.available for _, part in self._units_locked(item_id, inventory))
+            except InventoryNotFoundError:
+                return None
+
+    def taken(self, group: str) -> Dict[str, int]:
+        """Units held or booked per item of `group`, for the items with any taken."""
+        with self._lock:
+            self._expire_due_locked(self._clock())
+            return dict(self._taken.get(group, {}))
+
+    def hold(self, item_id: str, quantity: int = 1, details: Optional[Dict[str, Any]] = None,
+             id_prefix: str = "R") -> Hold:
+        """Atomically take `quantity` units of an item and hold them until expiry.
+
+        The hold's details are the item's registered info updated with `details`.
+        """
+        if quantity <= 0:
+            raise InsufficientInventoryError("Quantity must be at least 1")
+
+        with self._lock:
+            now = self._clock()
+            self._expire_due_locked(now)
+
+            inventory = self._inventory.get(item_id)
+            if inventory is None:
+                raise InventoryNotFoundError(f"Unknown option {item_id}. Please search again before reserving.")
+            units = self._units_locked(item_id, inventory)
+            available = min(part.available for _, part in units)
+            if available < quantity:
+                raise InsufficientInventoryError(
+                    f"Only {available} unit(s) left for {item_id}, {quantity} requested"
+                )
+
+            for part_id, part in units:
+                self._set_available_locked(part_id, part, part.available - quantity)
+                part.holds += 1
+                self._inventory.move_to_end(part_id)
+            self._inventory.move_to_end(item_id)
+
+            hold = Hold(
+                reservation_id=new_id(id_prefix),
+                item_id=item_id,
+                quantity=quantity,
+                status=RESERVED,
+                created_at=now,
+                expires_at=now + self.hold_ttl,
+                details={**inventory.info, **(details or {})},
+                items=tuple((part_id, part.generation) for part_id, part in units),
+            )
+            self._holds[hold.reservation_id] = hold
+            heapq.heappush(self._expiry_heap, (hold.expires_at, hold.reservation_id))
+            return hold
+
+    def confirm(self, reservation_id: str) -> Hold:
+        """Turn a pending hold into a confirmed booking. Confirming twice is a no-op."""
+        with self._lock:
+            self._expire_due_locked(self._clock())
+            hold = self._get_locked(reservation_id)
+            if hold.status == CONFIRMED:
+                return hold
+            if hold.status != RESERVED:
+                raise InvalidReservationStateError(
+                    f"Reservation cannot be confirmed (current status: {hold.status})"
+                )
+            hold.status = CONFIRMED
+            # A pending hold pins its items, so they are still the ones it took units from
+            for item_id, _ in hold.items:
+                self._inventory[item_id].holds -= 1
+            self._retire_locked(hold)
+            return hold
+
+    def cancel(self, reservation_id: str) -> Hold:
+        """Cancel a reservation and return its units to the inventory."""
+        with self._lock:
+            self._expire_due_locked(self._clock())
+            hold = self._get_locked(reservation_id)
+            if hold.status not in (RESERVED, CONFIRMED):
+                raise InvalidReservationStateError(
+                    f"Reservation cannot be cancelled (current status: {hold.status})"
+                )
+            self._release_locked(hold, CANCELLED)
+            return hold
+
+    def get(self, reservation_id: str) -> Hold:
+        with self._lock:
+            self._expire_due_locked(self._clock())
+            return self._get_locked(reservation_id)
+
+    def expire_due(self) -> int:
+        """Release every hold whose expiry time has passed. Returns the number released."""
+        with self._lock:
+            return self._expire_due_locked(self._clock())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "items": len(self._inventory),
+                "holds": len(self._holds),
+                "pending_expirations": len(self._expiry_heap),
+            }
+
+    # Internal helpers, callers must hold self._lock
+
+    def _register_locked(self, item_id: str, capacity: int, info: Optional[Dict[str, Any]] = None,
+                         parts: Optional[Tuple[str, ...]] = None, group: Optional[str] = None) -> _Inventory:
+        inventory = self._inventory.get(item_id)
+        if inventory is None:
+            inventory = _Inventory(capacity, info, next(self._generations), parts, group)
+            self._inventory[item_id] = inventory
+        else:
+            self._inventory.move_to_end(item_id)
+        return inventory
+
+    def _units_locked(self, item_id: str, inventory: _Inventory) -> List[Tuple[str, _Inventory]]:
+        """The items a hold on `item_id` takes units from: the item itself, or a bundle's parts."""
+        if inventory.parts is None:
+            return [(item_id, inventory)]
+        units = []
+        for part_id in inventory.parts:
+            part = self._inventory.get(part_id)
+            if part is None:
+                raise InventoryNotFoundError(f"Unknown option {item_id}. Please search again before reserving.")
+            units.append((part_id, part))
+        return units
+
+    def _set_available_locked(self, item_id: str, inventory: _Inventory, available: int) -> None:
+        inventory.available = available
+        if inventory.group is None:
+            return
+        taken = self._taken.setdefault(inventory.group, {})
+        if available < inventory.capacity:
+            taken[item_id] = inventory.capacity - available
+        else:
+            taken.pop(item_id, None)
+            if not taken:
+                del self._taken[inventory.group]
+
+    def _get_locked(self, reservation_id: str) -> Hold:
+        hold = self._holds.get(reservation_id)
+        if hold is None:
+            raise ReservationNotFoundError("Reservation not found")
+        return hold
+
+    def _expire_due_locked(self, now: float) -> int:
+        released = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            _, reservation_id = heapq.heappop(heap)
+            hold = self._holds.get(reservation_id)
+            # Confirmed/cancelled holds leave stale heap entries behind
+            if hold is not None and hold.status == RESERVED:
+                self._release_locked(hold, EXPIRED)
+                released += 1
+        return released
+
+    def _release_locked(self, hold: Hold, status: str) -> None:
+        # A confirmed hold was already retired when it was confirmed
+        pending = hold.status == RESERVED
+        hold.status = status
+        for item_id, generation in hold.items:
+            inventory = self._inventory.get(item_id)
+            # A pending hold pins its items, so only a confirmed booking can outlive their registration
+            if inventory is not None and inventory.generation == generation:
+                self._set_available_locked(item_id, inventory,
+                                           min(inventory.capacity, inventory.available + hold.quantity))
+                if pending:
+                    inventory.holds -= 1
+        if pending:
+            self._retire_locked(hold)
+
+    def _retire_locked(self, hold: Hold) -> None:
+        # A hold that no longer pins its item is kept only for status lookups, in bounded numbers
+        self._finished.append(hold.reservation_id)
+        while len(self._finished) > self.max_finished_holds:
+            self._holds.pop(self._finished.popleft(), None)
+
+    def _evict_idle_items_locked(self) -> None:
+        # Drop the least recently used items that nobody holds; items with
+        # holds stay so their capacity accounting is never lost
+        if len(self._inventory) <= self.max_items:
+            return
+        for item_id in list(self._inventory):
+            if len(self._inventory) <= self.max_items:
+                break
+            inventory = self._inventory[item_id]
+            if inventory.holds == 0:
+                del self._inventory[item_id]
+                if inventory.group is not None:
+                    self._set_available_locked(item_id, inventory, inventory.capacity)
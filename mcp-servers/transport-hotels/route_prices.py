@@ -0,0 +1,99 @@
+"""Daily cheapest fares per route and transport type.
+
+Every route, transport type and year has an array with the cheapest fare of
+each day, computed in one vectorized pass on first use: the route's base
+fare (drawn from the same ranges as the search tools) times a day-of-week
+pattern, a seasonal swing and day-to-day noise, all derived by hashing the
+route and the day. `generate_transport_options` prices a day's options from
+this index, so a flexible-date search over weeks of days is a few array
+slices instead of generating options for every day.
+"""
+from collections import OrderedDict
+from typing import Dict, Tuple
+import datetime
+import threading
+import zlib
+
+import numpy as np
+
+from bulk_generators import TRANSPORT_PROFILES
+from hotel_calendar import day_number, hash_uniform
+
+# Fare multiplier per departure weekday, Monday first
+WEEKDAY_FARES = {
+    "flight": np.array([1.0, 0.92, 0.92, 1.0, 1.15, 0.95, 1.12]),
+    "train": np.array([1.05, 1.0, 1.0, 1.0, 1.1, 0.95, 1.1]),
+    "bus": np.array([1.0, 1.0, 1.0, 1.0, 1.1, 1.0, 1.1]),
+}
+
+# Fares peak in mid-July (day of year 196)
+SEASON_AMPLITUDE = 0.2
+SEASON_PEAK_DAY = 196
+
+
+def route_seed(origin: str, destination: str, transport_type: str) -> int:
+    key = f"{origin.strip().lower()}|{destination.strip().lower()}|{transport_type}"
+    return zlib.crc32(key.encode("utf-8"))
+
+
+def yearly_fares(origin: str, destination: str, transport_type: str, year: int) -> np.ndarray:
+    """The cheapest fare of every day of `year` on a route, as an int32 array."""
+    seed = route_seed(origin, destination, transport_type)
+    price_offset, (low, high) = TRANSPORT_PROFILES[transport_type][4:]
+    base = price_offset + low + int(hash_uniform(np.int64(seed)) * (high - low + 1))
+
+    first_day = day_number(f"{year}-01-01")
+    day = np.arange(first_day, day_number(f"{year + 1}-01-01"), dtype=np.int64)
+    season = 1.0 + SEASON_AMPLITUDE * np.cos(2 * np.pi * (day - first_day - SEASON_PEAK_DAY) / 365.25)
+    weekday = WEEKDAY_FARES[transport_type][(day + 3) % 7]
+    noise = 0.9 + 0.2 * hash_uniform(np.int64(seed), day)
+    # The cheapest option undercuts the day's base fare by 20, as the search tools' spread allows
+    return np.maximum(base * season * weekday * noise - 20, 1).astype(np.int32)
+
+
+class RoutePriceIndex:
+    """Daily cheapest fares per route, transport type and year, kept for the most recently used routes."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._fares: "OrderedDict[Tuple[int, str, int], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _year(self, origin: str, destination: str, transport_type: str, year: int) -> np.ndarray:
+        key = (route_seed(origin, destination, transport_type), transport_type, year)
+        with self._lock:
+            fares = self._fares.get(key)
+            if fares is not None:
+                self._fares.move_to_end(key)
+                return fares
+        fares = yearly_fares(origin, destination, transport_type, year)
+        with self._lock:
+            self._fares[key] = fares
+            while len(self._fares) > self.max_entries:
+                self._fares.popitem(last=False)
+        return fares
+
+    def fares(self, origin: str, destination: str, transport_type: str, start_date: str, days: int) -> np.ndarray:
+        """The cheapest fare of each of `days` days from `start_date` (YYYY-MM-DD).
+
+        Raises ValueError for an unknown transport type or a malformed date.
+        """
+        transport_type = transport_type.lower()
+        if transport_type not in TRANSPORT_PROFILES:
+            raise ValueError(f"Unknown transport type: {transport_type}")
+        start = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
+        parts = []
+        year, offset = start.year, start.timetuple().tm_yday - 1
+        while days > 0:
+            fares = self._year(origin, destination, transport_type, year)[offset:offset + days]
+            parts.append(fares)
+            days -= len(fares)
+            year, offset = year + 1, 0
+        return np.concatenate(parts)
+
+    def cheapest(self, origin: str, destination: str, transport_type: str, date: str) -> int:
+        return int(self.fares(origin, destination, transport_type, date, 1)[0])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._fares)}
@@ -0,0 +1,19 @@
+# Sample data shared by the search tools and the bulk generators
+CITIES = [
+    "Paris", "London", "New York", "Tokyo", "Rome", "Amsterdam", "Berlin",
+    "Madrid", "Barcelona", "Vienna", "Prague", "Athens", "Bangkok", "Singapore",
+    "Sydney", "Cairo", "Istanbul", "Dubai", "Las Vegas", "San Francisco"
+]
+
+AIRLINES = ["SkyWings", "GlobalAir", "TransAtlantic", "PacificFlyers", "Continental Express"]
+TRAIN_COMPANIES = ["EuroRail", "SpeedTrain", "ExpressConnect", "RailLink", "TrackMaster"]
+BUS_COMPANIES = ["RoadTripper", "BusExplorer", "CityConnect", "CountryTours", "ExpressBus"]
+HOTEL_CHAINS = ["LuxStay", "ComfortInn", "TravelLodge", "CityHotels", "VacationResort"]
+
+FLIGHT_CLASSES = ["Economy", "Business", "First Class"]
+GROUND_CLASSES = ["Standard", "Premium", "Deluxe"]
+
+HOTEL_DESCRIPTORS = ["Plaza", "Grand", "Royal", "Central", "Resort", "Suites", "Inn"]
+AMENITIES = ["WiFi", "Pool", "Gym", "Restaurant", "Bar", "Room Service", "Spa", "Parking", "Airport Shuttle", "Breakfast Included"]
+STREET_NAMES = ["Main", "First", "Park", "Oak", "Maple", "Pine"]
+STREET_TYPES = ["Street", "Avenue", "Boulevard", "Road"]
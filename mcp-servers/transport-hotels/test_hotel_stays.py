@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from hotel_calendar import day_number
+from hotel_index import HotelInventory
+from reservation_store import InsufficientInventoryError, ReservationStore
+
+
+@pytest.fixture
+def server(monkeypatch):
+    import transport_hotels
+
+    store = ReservationStore()
+    monkeypatch.setattr(transport_hotels, "reservations", store)
+    monkeypatch.setattr(transport_hotels, "hotel_inventory", HotelInventory(hotels_per_city=50, held=store.taken))
+    return transport_hotels
+
+
+def call(tool, **kwargs):
+    return json.loads(asyncio.run(tool(**kwargs)))
+
+
+def test_overlapping_stays_share_the_rooms_of_common_nights(server):
+    index = server.hotel_inventory.city("Paris")
+    first_day = day_number("2026-11-02")
+    rooms = index.rooms_left(np.arange(len(index)), first_day, 3)
+    row = int(np.flatnonzero(rooms.min(axis=1) > 0)[0])
+    hotel_id, shared = index.ids[row], int(rooms[row, 1])
+
+    stays = {}
+    for check_in, check_out in (("2026-11-02", "2026-11-04"), ("2026-11-03", "2026-11-05")):
+        hotels = call(server.search_hotels, city="Paris", check_in=check_in, check_out=check_out, limit=50)
+        stays[check_in] = next(hotel for hotel in hotels if hotel["id"].startswith(hotel_id))
+
+    server.reservations.hold(stays["2026-11-02"]["id"], shared)
+    with pytest.raises(InsufficientInventoryError):
+        server.reservations.hold(stays["2026-11-03"]["id"])
+    assert index.rooms_left(np.array([row]), first_day, 3)[0, 1] == 0
+
+    calendar = call(server.hotel_availability_calendar, city="Paris", month="2026-11", hotel_id=hotel_id)
+    assert calendar["hotels"][0]["rooms_left"][2] == 0
+
+
+@pytest.mark.parametrize("arguments", [{"rooms": 0}, {"limit": 0}, {"limit": 51}, {"nights": 31}, {"month": "2026-13"}])
+def test_calendar_rejects_invalid_arguments(server, arguments):
+    result = call(server.hotel_availability_calendar, **{"city": "Paris", "month": "2026-11", **arguments})
+    assert result["success"] is False
+
+
+def test_calendar_rejects_a_hotel_from_another_city(server):
+    rome_hotel = server.hotel_inventory.city("Rome").ids[0]
+    result = call(server.hotel_availability_calendar, city="Paris", month="2026-11", hotel_id=rome_hotel)
+    assert result == {"success": False, "error": f"Hotel {rome_hotel} is not in Paris", "city": "Paris"}
@@ -0,0 +1,152 @@
+import pytest
+
+from reservation_store import (
+    CANCELLED,
+    CONFIRMED,
+    EXPIRED,
+    InsufficientInventoryError,
+    InvalidReservationStateError,
+    InventoryNotFoundError,
+    ReservationStore,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_hold_takes_units_and_refuses_overbooking(clock):
+    store = ReservationStore(clock=clock)
+    assert store.register("F1", 3, {"route": "Paris-Rome"}) == 3
+    hold = store.hold("F1", 2, details={"passenger": "Ada"})
+    assert hold.details == {"route": "Paris-Rome", "passenger": "Ada"}
+    assert store.available("F1") == 1
+    with pytest.raises(InsufficientInventoryError):
+        store.hold("F1", 2)
+    with pytest.raises(InventoryNotFoundError):
+        store.hold("unknown")
+
+
+def test_registering_again_keeps_the_held_count(clock):
+    store = ReservationStore(clock=clock)
+    store.register("F1", 3)
+    store.hold("F1")
+    assert store.register("F1", 3) == 2
+
+
+def test_expired_hold_releases_its_units(clock):
+    store = ReservationStore(hold_ttl=60, clock=clock)
+    store.register("F1", 1)
+    hold = store.hold("F1")
+    clock.now += 59
+    assert store.available("F1") == 0
+    clock.now += 1
+    assert store.available("F1") == 1
+    assert store.get(hold.reservation_id).status == EXPIRED
+    with pytest.raises(InvalidReservationStateError):
+        store.confirm(hold.reservation_id)
+
+
+def test_confirmed_hold_does_not_expire(clock):
+    store = ReservationStore(hold_ttl=60, clock=clock)
+    store.register("F1", 1)
+    hold = store.hold("F1")
+    store.confirm(hold.reservation_id)
+    assert store.confirm(hold.reservation_id).status == CONFIRMED
+    clock.now += 3600
+    assert store.expire_due() == 0
+    assert store.available("F1") == 0
+
+
+def test_cancel_returns_units_once(clock):
+    store = ReservationStore(clock=clock)
+    store.register("F1", 2)
+    hold = store.hold("F1", 2)
+    store.confirm(hold.reservation_id)
+    assert store.cancel(hold.reservation_id).status == CANCELLED
+    assert store.available("F1") == 2
+    with pytest.raises(InvalidReservationStateError):
+        store.cancel(hold.reservation_id)
+    assert store.available("F1") == 2
+
+
+def test_items_with_pending_holds_are_not_evicted(clock):
+    store = ReservationStore(max_items=2, clock=clock)
+    store.register("A", 1)
+    store.hold("A")
+    store.register("B", 1)
+    store.register("C", 1)
+    assert store.available("A") == 0
+    assert store.available("B") is None
+    assert store.available("C") == 1
+
+
+def test_confirmed_booking_lets_its_item_be_evicted(clock):
+    store = ReservationStore(max_items=1, clock=clock)
+    store.register("A", 1)
+    store.confirm(store.hold("A").reservation_id)
+    store.register("B", 1)
+    assert store.available("A") is None
+
+
+def test_cancel_after_confirm_and_eviction_leaves_new_registration_alone(clock):
+    store = ReservationStore(max_items=1, clock=clock)
+    store.register("A", 5)
+    hold = store.hold("A", 3)
+    store.confirm(hold.reservation_id)
+    store.register("B", 1)
+    assert store.register("A", 5) == 5
+    store.cancel(hold.reservation_id)
+    assert store.available("A") == 5
+
+
+def test_finished_holds_are_bounded(clock):
+    store = ReservationStore(max_finished_holds=2, clock=clock)
+    store.register("F1", 10)
+    holds = [store.hold("F1") for _ in range(3)]
+    for hold in holds:
+        store.confirm(hold.reservation_id)
+    assert store.stats()["holds"] == 2
+
+
+def test_bundle_holds_every_part_at_once(clock):
+    store = ReservationStore(clock=clock)
+    assert store.register_bundle("stay-1-2", {"n1": 1, "n2": 2}, group="city") == 1
+    assert store.register_bundle("stay-2-3", {"n2": 2, "n3": 2}, group="city") == 2
+    store.hold("stay-1-2")
+    assert store.available("stay-2-3") == 1
+    assert store.taken("city") == {"n1": 1, "n2": 1}
+    with pytest.raises(InsufficientInventoryError):
+        store.hold("stay-1-2")
+    hold = store.hold("stay-2-3")
+    assert store.available("stay-2-3") == 0
+    store.cancel(hold.reservation_id)
+    assert store.taken("city") == {"n1": 1, "n2": 1}
+
+
+def test_expired_bundle_hold_releases_every_part(clock):
+    store = ReservationStore(hold_ttl=60, clock=clock)
+    store.register_bundle("stay", {"n1": 1, "n2": 1}, group="city")
+    store.hold("stay")
+    clock.now += 60
+    assert store.available("stay") == 1
+    assert store.taken("city") == {}
+
+
+def test_bundle_with_an_evicted_part_must_be_searched_again(clock):
+    store = ReservationStore(max_items=3, clock=clock)
+    store.register_bundle("stay", {"n1": 1, "n2": 1})
+    store.register("other", 1)
+    store.register("another", 1)
+    assert store.available("stay") is None
+    with pytest.raises(InventoryNotFoundError):
+        store.hold("stay")
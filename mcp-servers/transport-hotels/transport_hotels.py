@@ -1,23 +1,54 @@
 from typing import Any, List, Dict, Optional
-from mcp.server.fastmcp import FastMCP
 import json
+import calendar
 import datetime
+import logging
 import random
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.events import DEFAULT_EVENTS_PATH, PAYMENT_COMPLETED, RESERVATION_CONFIRMED, EventBus
+from common.ids import new_id
+from common.server import ToolServer, run_server
+from bulk_generators import amenity_mask
+from hotel_calendar import day_number, day_string
+from hotel_index import HotelIndex, HotelInventory, night_id, parse_amenities
+from reservation_store import ReservationStore, ReservationError
+from route_prices import RoutePriceIndex
+from sample_data import CITIES, AIRLINES, TRAIN_COMPANIES, BUS_COMPANIES, HOTEL_CHAINS
 
 # Initialize FastMCP server
-mcp = FastMCP("transport-hotels")
+mcp = ToolServer("transport-hotels", default_port=8101)
+
+logger = logging.getLogger(__name__)
+
+# Seat and room inventory plus the holds placed against it
+reservations = ReservationStore()
+
+# Fixed hotel set per city, indexed for filtered searches; rooms left per
+# night take off the rooms held or booked in the reservation store
+hotel_inventory = HotelInventory(hotels_per_city=int(os.getenv("HOTELS_PER_CITY", "200")), held=reservations.taken)
+
+# Longest stay the availability calendar prices
+MAX_CALENDAR_NIGHTS = 30
 
-# Sample data
-CITIES = [
-    "Paris", "London", "New York", "Tokyo", "Rome", "Amsterdam", "Berlin",
-    "Madrid", "Barcelona", "Vienna", "Prague", "Athens", "Bangkok", "Singapore",
-    "Sydney", "Cairo", "Istanbul", "Dubai", "Las Vegas", "San Francisco"
-]
+# Most hotels the availability calendar returns
+MAX_CALENDAR_HOTELS = 50
 
-AIRLINES = ["SkyWings", "GlobalAir", "TransAtlantic", "PacificFlyers", "Continental Express"]
-TRAIN_COMPANIES = ["EuroRail", "SpeedTrain", "ExpressConnect", "RailLink", "TrackMaster"]
-BUS_COMPANIES = ["RoadTripper", "BusExplorer", "CityConnect", "CountryTours", "ExpressBus"]
-HOTEL_CHAINS = ["LuxStay", "ComfortInn", "TravelLodge", "CityHotels", "VacationResort"]
+# Cheapest fare per route and day
+route_prices = RoutePriceIndex()
+
+# Longest date range a flexible-date search covers
+MAX_FLEXIBLE_DAYS = 62
+
+# Event bus shared with the payment and email servers
+events = EventBus(os.getenv("EVENT_BUS_PATH", DEFAULT_EVENTS_PATH),
+                  retention_hours=float(os.getenv("EVENT_RETENTION_HOURS", "168")))
+mcp.on_shutdown(events.close)
 
 # Sample data generator functions
 def generate_transport_options(origin: str, destination: str, date: str, transport_type: str) -> List[Dict]:
@@ -34,18 +65,18 @@ def generate_transport_options(origin: str, destination: str, date: str, transpo
         if transport_type.lower() == "flight":
             companies = AIRLINES
             duration_base = 60 + random.randint(30, 240)  # 1.5-5 hours
-            price_base = 150 + random.randint(50, 500)
         elif transport_type.lower() == "train":
             companies = TRAIN_COMPANIES
             duration_base = 90 + random.randint(30, 180)  # 2-4.5 hours
-            price_base = 50 + random.randint(20, 150)
         elif transport_type.lower() == "bus":
             companies = BUS_COMPANIES
             duration_base = 120 + random.randint(60, 240)  # 3-6 hours
-            price_base = 20 + random.randint(10, 80)
         else:
             return []
         
+        # The day's cheapest fare comes from the route price index, so it matches search_flexible_dates
+        cheapest_fare = route_prices.cheapest(origin, destination, transport_type, date)
+        
         for i in range(num_options):
             # Generate departure time (between 6am and 10pm)
             departure_hour = random.randint(6, 22)
@@ -58,14 +89,27 @@ def generate_transport_options(origin: str, destination: str, date: str, transpo
             # Calculate arrival time
             arrival_time = departure_time + datetime.timedelta(minutes=duration_minutes)
             
-            # Random price (varies by transport type)
-            price = price_base + random.randint(-20, 100)
+            # Random price above the day's cheapest fare, which the first option gets
+            price = cheapest_fare if i == 0 else cheapest_fare + random.randint(0, 120)
             
             # Random company
             company = random.choice(companies)
             
+            # Random ticket class
+            ticket_class = random.choice(["Economy", "Business", "First Class"]) if transport_type == "flight" else random.choice(["Standard", "Premium", "Deluxe"])
+            
             # Generate a transport ID
-            transport_id = f"{transport_type[0]}{random.randint(1000, 9999)}"
+            transport_id = new_id(transport_type[0].upper())
+            departure = departure_time.strftime("%Y-%m-%d %H:%M")
+            
+            # Booking details carried by reservations of this option
+            booking_info = {
+                "origin": origin,
+                "destination": destination,
+                "departure": departure,
+                "company": company,
+                "ticket_class": ticket_class,
+            }
             
             options.append({
                 "id": transport_id,
@@ -73,13 +117,13 @@ def generate_transport_options(origin: str, destination: str, date: str, transpo
                 "company": company,
                 "origin": origin,
                 "destination": destination,
-                "departure": departure_time.strftime("%Y-%m-%d %H:%M"),
+                "departure": departure,
                 "arrival": arrival_time.strftime("%Y-%m-%d %H:%M"),
                 "duration": f"{duration_minutes // 60}h {duration_minutes % 60}m",
                 "price": price,
                 "currency": "USD",
-                "seats_available": random.randint(1, 30),
-                "class": random.choice(["Economy", "Business", "First Class"]) if transport_type == "flight" else random.choice(["Standard", "Premium", "Deluxe"])
+                "seats_available": reservations.register(transport_id, random.randint(1, 30), booking_info),
+                "class": ticket_class
             })
         
         return sorted(options, key=lambda x: x["price"])
@@ -88,76 +132,24 @@ def generate_transport_options(origin: str, destination: str, date: str, transpo
         print(f"Error generating transport options: {e}")
         return []
 
-def generate_hotel_options(city: str, check_in: str, check_out: str, guests: int) -> List[Dict]:
-    """Generate sample hotel options for a city and date range."""
-    try:
-        # Parse dates
-        check_in_date = datetime.datetime.strptime(check_in, "%Y-%m-%d")
-        check_out_date = datetime.datetime.strptime(check_out, "%Y-%m-%d")
-        
-        # Calculate number of nights
-        nights = (check_out_date - check_in_date).days
-        if nights <= 0:
-            return []
-        
-        # Generate 3-7 hotel options
-        num_options = random.randint(3, 7)
-        options = []
-        
-        for i in range(num_options):
-            # Random hotel chain
-            hotel_chain = random.choice(HOTEL_CHAINS)
-            
-            # Hotel name (chain + city + descriptor)
-            descriptors = ["Plaza", "Grand", "Royal", "Central", "Resort", "Suites", "Inn"]
-            hotel_name = f"{hotel_chain} {city} {random.choice(descriptors)}"
-            
-            # Random star rating (3-5)
-            stars = random.randint(3, 5)
-            
-            # Base price per night (varies by star rating)
-            base_price = 50 + (stars * 30) + random.randint(0, 100)
-            
-            # Adjust price for number of guests
-            guest_factor = 1.0 + ((guests - 1) * 0.3)  # Each additional guest adds 30%
-            price_per_night = int(base_price * guest_factor)
-            
-            # Total price for the stay
-            total_price = price_per_night * nights
-            
-            # Random amenities
-            all_amenities = ["WiFi", "Pool", "Gym", "Restaurant", "Bar", "Room Service", "Spa", "Parking", "Airport Shuttle", "Breakfast Included"]
-            num_amenities = random.randint(3, len(all_amenities))
-            amenities = random.sample(all_amenities, num_amenities)
-            
-            # Generate hotel ID
-            hotel_id = f"H{random.randint(1000, 9999)}"
-            
-            options.append({
-                "id": hotel_id,
-                "name": hotel_name,
-                "chain": hotel_chain,
-                "city": city,
-                "address": f"{random.randint(1, 999)} {random.choice(['Main', 'First', 'Park', 'Oak', 'Maple', 'Pine'])} {random.choice(['Street', 'Avenue', 'Boulevard', 'Road'])}",
-                "stars": stars,
-                "price_per_night": price_per_night,
-                "total_price": total_price,
-                "currency": "USD",
-                "check_in": check_in,
-                "check_out": check_out,
-                "nights": nights,
-                "guests": guests,
-                "amenities": amenities,
-                "rooms_available": random.randint(1, 10),
-                "rating": round(3.0 + random.random() * 2.0, 1),  # Random rating between 3.0 and 5.0
-                "reviews": random.randint(50, 500)
-            })
-        
-        return sorted(options, key=lambda x: x["total_price"])
-        
-    except Exception as e:
-        print(f"Error generating hotel options: {e}")
-        return []
+# Helper function to make a hotel search result bookable
+def register_hotel_offer(hotel: Dict, index: HotelIndex, first_day: int, night_rooms: np.ndarray) -> None:
+    """Register the rooms of a hotel for one stay and give the result that stay's id.
+
+    `night_rooms` are the hotel's rooms on each night of the stay before any
+    holds (HotelIndex.rooms_left with held=False).
+    """
+    # Rooms are held per night, so stays that share a night draw from the same rooms
+    nights = {night_id(hotel["id"], first_day + offset): int(rooms) for offset, rooms in enumerate(night_rooms.tolist())}
+    hotel["id"] = f"{hotel['id']}-{hotel['check_in'].replace('-', '')}-{hotel['nights']}N{hotel['guests']}G"
+    booking_info = {
+        "name": hotel["name"],
+        "address": f"{hotel['address']}, {hotel['city']}",
+        "check_in": hotel["check_in"],
+        "check_out": hotel["check_out"],
+        "guests": hotel["guests"],
+    }
+    hotel["rooms_available"] = reservations.register_bundle(hotel["id"], nights, booking_info, group=index.prefix)
 
 # MCP Tools
 @mcp.tool()
@@ -206,7 +198,58 @@ async def search_buses(origin: str, destination: str, date: str) -> str:
     return json.dumps(buses, indent=2)
 
 @mcp.tool()
-async def search_hotels(city: str, check_in: str, check_out: str, guests: int = 1) -> str:
+async def search_flexible_dates(origin: str, destination: str, start_date: str, end_date: str,
+                                transport_types: str = "flight,train,bus") -> str:
+    """Find the cheapest fare for each day of a date range, for each transport type, in one call.
+    
+    Use this for questions like "what is the cheapest day to fly next week", then call
+    search_flights, search_trains or search_buses for the chosen date to get bookable options.
+    
+    Args:
+        origin: City of departure
+        destination: City of arrival
+        start_date: First travel date in YYYY-MM-DD format
+        end_date: Last travel date in YYYY-MM-DD format (at most 62 days after start_date)
+        transport_types: Comma-separated transport types to compare (default: "flight,train,bus")
+    
+    Returns:
+        JSON string with the dates, the cheapest fare per date for each transport type,
+        and the cheapest date for each type and overall
+    """
+    try:
+        days = day_number(end_date) - day_number(start_date) + 1
+        if not 1 <= days <= MAX_FLEXIBLE_DAYS:
+            raise ValueError(f"end_date must be on or up to {MAX_FLEXIBLE_DAYS - 1} days after start_date")
+        types = [name.strip().lower() for name in transport_types.split(",") if name.strip()]
+        fares = {name: route_prices.fares(origin, destination, name, start_date, days) for name in types}
+    except ValueError as e:
+        return json.dumps({
+            "success": False,
+            "error": str(e)
+        }, indent=2)
+    
+    first_day = day_number(start_date)
+    dates = [day_string(first_day + offset) for offset in range(days)]
+    cheapest = {}
+    for name, prices in fares.items():
+        best = int(prices.argmin())
+        cheapest[name] = {"date": dates[best], "price": int(prices[best])}
+    overall = min(cheapest.items(), key=lambda item: item[1]["price"]) if cheapest else None
+    
+    return json.dumps({
+        "origin": origin,
+        "destination": destination,
+        "currency": "USD",
+        "dates": dates,
+        "min_price": {name: prices.tolist() for name, prices in fares.items()},
+        "cheapest": cheapest,
+        "cheapest_overall": {"transport_type": overall[0], **overall[1]} if overall else None
+    }, indent=2)
+
+@mcp.tool()
+async def search_hotels(city: str, check_in: str, check_out: str, guests: int = 1, max_price: Optional[int] = None,
+                        min_stars: Optional[int] = None, min_rating: Optional[float] = None,
+                        amenities: Optional[str] = None, sort_by: str = "price", limit: int = 10) -> str:
     """Search for available hotels in a city for a specific date range.
     
     Args:
@@ -214,13 +257,125 @@ async def search_hotels(city: str, check_in: str, check_out: str, guests: int =
         check_in: Check-in date in YYYY-MM-DD format
         check_out: Check-out date in YYYY-MM-DD format
         guests: Number of guests (default: 1)
+        max_price: Maximum price per night in USD for the given number of guests (optional)
+        min_stars: Minimum star rating, 3-5 (optional)
+        min_rating: Minimum guest rating, 3.0-5.0 (optional)
+        amenities: Comma-separated amenities every hotel must have, e.g. "WiFi, Pool" (optional)
+        sort_by: "price" (cheapest first), "rating" or "stars" (highest first) (default: "price")
+        limit: Maximum number of hotels to return (default: 10)
     
     Returns:
-        JSON string containing available hotel options
+        JSON string containing the matching hotel options
     """
-    hotels = generate_hotel_options(city, check_in, check_out, guests)
+    try:
+        first_day = day_number(check_in)
+        nights = day_number(check_out) - first_day
+        required = amenity_mask(parse_amenities(amenities))
+        index = hotel_inventory.city(city)
+        if nights <= 0:
+            return json.dumps([], indent=2)
+        rows = index.search(max_price=max_price, min_stars=min_stars, min_rating=min_rating, amenities=required,
+                            sort_by=sort_by, limit=limit, guests=guests, stay=(first_day, nights))
+    except ValueError as e:
+        return json.dumps({
+            "success": False,
+            "error": str(e)
+        }, indent=2)
+    
+    night_rooms = index.rooms_left(rows, first_day, nights, held=False)
+    hotels = index.rows(rows, first_day, nights, guests, night_rooms)
+    for hotel, rooms in zip(hotels, night_rooms):
+        register_hotel_offer(hotel, index, first_day, rooms)
     return json.dumps(hotels, indent=2)
 
+@mcp.tool()
+async def hotel_availability_calendar(city: str, month: str, nights: int = 1, guests: int = 1, rooms: int = 1,
+                                      hotel_id: Optional[str] = None, min_stars: Optional[int] = None,
+                                      limit: int = 5) -> str:
+    """Find the cheapest stay of a given length in a month, with a nightly price and availability grid.
+    
+    Answers questions like "when is the cheapest 3-night stay in Paris in November" in one call,
+    instead of searching hotels for every check-in date.
+    
+    Args:
+        city: City name
+        month: Month of the check-in date in YYYY-MM format
+        nights: Length of the stay in nights (default: 1)
+        guests: Number of guests (default: 1)
+        rooms: Rooms needed every night (default: 1)
+        hotel_id: Only consider this hotel, as returned by search_hotels (optional)
+        min_stars: Minimum star rating, 3-5 (optional)
+        limit: Number of hotels to return, cheapest stay first, up to 50 (default: 5)
+    
+    Returns:
+        JSON string with each hotel's cheapest stay (bookable with reserve_hotel) and its
+        nightly rates and rooms left for every night of the month (0 rooms means sold out)
+    """
+    try:
+        month_start = datetime.datetime.strptime(month, "%Y-%m")
+        if not 1 <= nights <= MAX_CALENDAR_NIGHTS:
+            raise ValueError(f"nights must be between 1 and {MAX_CALENDAR_NIGHTS}")
+        if rooms < 1:
+            raise ValueError("rooms must be at least 1")
+        if not 1 <= limit <= MAX_CALENDAR_HOTELS:
+            raise ValueError(f"limit must be between 1 and {MAX_CALENDAR_HOTELS}")
+    except ValueError as e:
+        return json.dumps({
+            "success": False,
+            "error": f"Invalid month, nights, rooms or limit: {e}"
+        }, indent=2)
+    
+    index = hotel_inventory.city(city)
+    if hotel_id:
+        # Ids from search_hotels carry the stay after the hotel id
+        hotel_id = hotel_id.split("-")[0]
+        if not hotel_id.startswith(index.prefix):
+            return json.dumps({
+                "success": False,
+                "error": f"Hotel {hotel_id} is not in {city}",
+                "city": city
+            }, indent=2)
+        row = index.find(hotel_id)
+        rows = np.array([] if row is None else [row], dtype=np.int64)
+    else:
+        rows = np.arange(len(index))
+    if min_stars is not None:
+        rows = rows[index.batch.stars[rows] >= min_stars]
+    if len(rows) == 0:
+        return json.dumps({
+            "success": False,
+            "error": "No matching hotels found",
+            "city": city
+        }, indent=2)
+    
+    first_day = day_number(month_start.strftime("%Y-%m-%d"))
+    days = calendar.monthrange(month_start.year, month_start.month)[1]
+    hotels = []
+    for found in index.cheapest_stays(rows, first_day, days, nights, guests, rooms, limit):
+        stay = index.rows(np.array([found["row"]]), found["check_in"], nights, guests, found["night_rooms"])[0]
+        hotel_id = stay["id"]
+        register_hotel_offer(stay, index, found["check_in"], found["night_rooms"][0])
+        hotels.append({
+            "hotel_id": hotel_id,
+            "name": stay["name"],
+            "stars": stay["stars"],
+            "rating": stay["rating"],
+            "cheapest_stay": {key: stay[key] for key in ("id", "check_in", "check_out", "nights", "guests",
+                                                          "price_per_night", "total_price", "rooms_available")},
+            "nightly_rates": found["nightly_rates"],
+            "rooms_left": found["rooms_left"],
+        })
+    
+    return json.dumps({
+        "city": city,
+        "month": month_start.strftime("%Y-%m"),
+        "nights": nights,
+        "guests": guests,
+        "currency": "USD",
+        "hotels": hotels,
+        "message": None if hotels else f"No hotel has {rooms} room(s) free for {nights} nights in a row this month"
+    }, indent=2)
+
 @mcp.tool()
 async def get_transport_details(transport_id: str) -> str:
     """Get detailed information about a specific transport booking.
@@ -243,7 +398,7 @@ async def get_transport_details(transport_id: str) -> str:
         "origin": random.choice(CITIES),
         "destination": random.choice(CITIES),
         "departure": (datetime.datetime.now() + datetime.timedelta(days=random.randint(7, 30))).strftime("%Y-%m-%d %H:%M"),
-        "booking_reference": f"REF{random.randint(10000, 99999)}",
+        "booking_reference": new_id("REF"),
         "passenger_name": "Sample Passenger",
         "ticket_class": random.choice(["Economy", "Business", "First Class"]) if transport_type == "flight" else random.choice(["Standard", "Premium"]),
         "seat": f"{random.choice('ABCDEF')}{random.randint(1, 30)}",
@@ -287,7 +442,7 @@ async def get_hotel_details(hotel_id: str) -> str:
         "chain": hotel_chain,
         "address": f"{random.randint(1, 999)} {random.choice(['Main', 'First', 'Park', 'Oak', 'Maple', 'Pine'])} {random.choice(['Street', 'Avenue', 'Boulevard', 'Road'])}, {city}",
         "contact": f"+1 555-{random.randint(100, 999)}-{random.randint(1000, 9999)}",
-        "booking_reference": f"BK{random.randint(10000, 99999)}",
+        "booking_reference": new_id("BK"),
         "status": "Confirmed",
         "guest_name": "Sample Guest",
         "check_in": check_in_date.strftime("%Y-%m-%d"),
@@ -307,59 +462,162 @@ async def get_hotel_details(hotel_id: str) -> str:
     return json.dumps(details, indent=2)
 
 @mcp.tool()
-async def reserve_transport(transport_id: str, passenger_name: str, email: str) -> str:
+async def reserve_transport(transport_id: str, passenger_name: str, email: str, seats: int = 1) -> str:
     """Reserve a transport ticket and hold it for payment.
     
     Args:
         transport_id: The ID of the transport option to reserve
         passenger_name: Full name of the passenger
         email: Email address for booking confirmation
+        seats: Number of seats to hold (default: 1)
     
     Returns:
         JSON string containing reservation details
     """
-    # In a real app, this would create a reservation in a database
     transport_type = "flight" if transport_id.startswith("F") else "train" if transport_id.startswith("T") else "bus"
+    try:
+        hold = reservations.hold(transport_id, seats, id_prefix="R", details={
+            "transport_id": transport_id,
+            "transport_type": transport_type,
+            "passenger_name": passenger_name,
+            "email": email,
+        })
+    except ReservationError as e:
+        return json.dumps({
+            "success": False,
+            "error": str(e),
+            "transport_id": transport_id
+        }, indent=2)
+    
+    held = hold.to_dict()
     reservation = {
-        "reservation_id": f"R{random.randint(10000, 99999)}",
+        "reservation_id": hold.reservation_id,
         "transport_id": transport_id,
         "transport_type": transport_type,
-        "status": "Reserved",
+        "status": hold.status,
         "passenger_name": passenger_name,
         "email": email,
-        "reservation_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "expiry_time": (datetime.datetime.now() + datetime.timedelta(minutes=30)).strftime("%Y-%m-%d %H:%M:%S"),
+        "seats": hold.quantity,
+        "seats_available": reservations.available(transport_id),
+        "reservation_time": held["reservation_time"],
+        "expiry_time": held["expiry_time"],
         "message": "Reservation successful. Please complete payment within 30 minutes to confirm your booking."
     }
     
     return json.dumps(reservation, indent=2)
 
 @mcp.tool()
-async def reserve_hotel(hotel_id: str, guest_name: str, email: str) -> str:
+async def reserve_hotel(hotel_id: str, guest_name: str, email: str, rooms: int = 1) -> str:
     """Reserve a hotel room and hold it for payment.
     
     Args:
         hotel_id: The ID of the hotel option to reserve
         guest_name: Full name of the guest
         email: Email address for booking confirmation
+        rooms: Number of rooms to hold (default: 1)
     
     Returns:
         JSON string containing reservation details
     """
-    # In a real app, this would create a reservation in a database
+    try:
+        hold = reservations.hold(hotel_id, rooms, id_prefix="HR", details={
+            "hotel_id": hotel_id,
+            "guest_name": guest_name,
+            "email": email,
+        })
+    except ReservationError as e:
+        return json.dumps({
+            "success": False,
+            "error": str(e),
+            "hotel_id": hotel_id
+        }, indent=2)
+    
+    held = hold.to_dict()
     reservation = {
-        "reservation_id": f"HR{random.randint(10000, 99999)}",
+        "reservation_id": hold.reservation_id,
         "hotel_id": hotel_id,
-        "status": "Reserved",
+        "status": hold.status,
         "guest_name": guest_name,
         "email": email,
-        "reservation_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "expiry_time": (datetime.datetime.now() + datetime.timedelta(minutes=30)).strftime("%Y-%m-%d %H:%M:%S"),
+        "rooms": hold.quantity,
+        "rooms_available": reservations.available(hotel_id),
+        "reservation_time": held["reservation_time"],
+        "expiry_time": held["expiry_time"],
         "message": "Reservation successful. Please complete payment within 30 minutes to confirm your booking."
     }
     
     return json.dumps(reservation, indent=2)
 
+@mcp.tool()
+async def get_reservation_status(reservation_id: str) -> str:
+    """Check the status of a transport or hotel reservation.
+    
+    Args:
+        reservation_id: The ID of the reservation to check
+    
+    Returns:
+        JSON string containing reservation status
+    """
+    try:
+        hold = reservations.get(reservation_id)
+    except ReservationError as e:
+        return json.dumps({
+            "success": False,
+            "error": str(e),
+            "reservation_id": reservation_id
+        }, indent=2)
+    
+    return json.dumps(hold.to_dict(), indent=2)
+
+@mcp.tool()
+async def cancel_reservation(reservation_id: str) -> str:
+    """Cancel a reservation and release the held seats or rooms.
+    
+    Args:
+        reservation_id: The ID of the reservation to cancel
+    
+    Returns:
+        JSON string containing the cancelled reservation
+    """
+    try:
+        hold = reservations.cancel(reservation_id)
+    except ReservationError as e:
+        return json.dumps({
+            "success": False,
+            "error": str(e),
+            "reservation_id": reservation_id
+        }, indent=2)
+    
+    response = hold.to_dict()
+    response["success"] = True
+    response["message"] = "Reservation cancelled. The held inventory has been released."
+    return json.dumps(response, indent=2)
+
+# Event handlers
+async def on_payment_completed(event):
+    """Confirm the reservation a completed payment was for and announce the booking"""
+    payment = event.payload
+    try:
+        hold = reservations.confirm(payment["reservation_id"])
+    except ReservationError as e:
+        # Held by another server process, or expired/cancelled before the payment went through
+        logger.warning("Payment %s: cannot confirm reservation %s: %s",
+                       payment["payment_id"], payment["reservation_id"], e)
+        return
+    
+    details = hold.details
+    await events.publish(RESERVATION_CONFIRMED, {
+        "reservation_id": hold.reservation_id,
+        "payment_id": payment["payment_id"],
+        "booking_type": details.get("transport_type", "hotel"),
+        "recipient_email": details.get("email") or payment["email"],
+        "recipient_name": details.get("passenger_name") or details.get("guest_name", ""),
+        "booking": {"booking_reference": hold.reservation_id, **details},
+    }, f"{RESERVATION_CONFIRMED}:{hold.reservation_id}")
+
+events.subscribe("transport-hotels", [PAYMENT_COMPLETED], on_payment_completed)
+mcp.add_background_task(events.run_consumers)
+
 if __name__ == "__main__":
-    # Initialize and run the server
-    mcp.run(transport='stdio') 
\ No newline at end of file
+    # Initialize and run the server (stdio by default, see --help for network transports)
+    run_server(mcp) 
\ No newline at end of file